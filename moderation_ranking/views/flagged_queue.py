@@ -4,7 +4,7 @@ from django.core.paginator import Paginator
 from django.db.models import Count, Q
 from django.shortcuts import render
 
-from posting.models import Comment, CommentVote, Post, Vote
+from posting.models import Comment, CommentVote, Post
 
 
 @login_required
@@ -18,15 +18,11 @@ def flagged_queue(request):
 
     # Get all flagged posts (not hidden)
     # Sort by AI severity (high severity first), then by created date
-    # Annotate vote counts to avoid N+1 queries in template
+    # Vote counts are stored on Post, so no aggregation is needed
     flagged_posts_qs = (
         Post.objects.filter(is_flagged=True)
         .select_related("author")
         .prefetch_related("tags")
-        .annotate(
-            upvotes_count=Count("votes", filter=Q(votes__vote_type=Vote.UPVOTE)),
-            downvotes_count=Count("votes", filter=Q(votes__vote_type=Vote.DOWNVOTE)),
-        )
         .order_by("-ai_severity_score", "-created_at")
     )
 
@@ -48,7 +44,7 @@ def flagged_queue(request):
 
     # Add net_votes attribute to each item (avoids template calling model method)
     for post in flagged_posts_list:
-        post.net_votes = post.upvotes_count - post.downvotes_count
+        post.net_votes = post.score
     for comment in flagged_comments_list:
         comment.net_votes = comment.upvotes_count - comment.downvotes_count
 
@@ -1,11 +1,11 @@
 from django.contrib import admin
 
-from .models import Post, Tag, Vote
+from .models import LexiconTerm, Post, Tag, Vote
 
 
 @admin.register(Tag)
 class TagAdmin(admin.ModelAdmin):
-    list_display = ("name", "slug")
+    list_display = ("name", "slug", "visible_posts_count")
     search_fields = ("name",)
     prepopulated_fields = {"slug": ("name",)}
 
@@ -23,3 +23,10 @@ class PostAdmin(admin.ModelAdmin):
 class VoteAdmin(admin.ModelAdmin):
     list_display = ("post", "voter", "created_at")
     autocomplete_fields = ("post", "voter")
+
+
+@admin.register(LexiconTerm)
+class LexiconTermAdmin(admin.ModelAdmin):
+    list_display = ("term", "category", "is_regex", "is_active", "updated_at")
+    list_filter = ("category", "is_regex", "is_active")
+    search_fields = ("term",)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class PostingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'posting'
+
+    def ready(self):
+        # Keep the in-memory search suggestion index in step with writes
+        from . import signals  # noqa: F401
@@ -1,4 +1,5 @@
 from django import forms
+from django.db import transaction
 
 from ..models import Comment
 
@@ -59,40 +60,22 @@ class CommentForm(forms.ModelForm):
         if self.parent_comment is not None:
             comment.parent_comment = self.parent_comment
 
-        # Run AI content moderation before saving
-        self._run_ai_moderation(comment)
-
+        # Comment.save() applies the crisis lexicon; AI moderation runs in the background (see moderation_queue.py)
         if commit:
-            comment.save()
+            # One transaction, so a saved comment always has its moderation job
+            with transaction.atomic():
+                comment.save()
+                self._enqueue_ai_moderation(comment)
 
         return comment
 
-    def _run_ai_moderation(self, comment):
-        """
-        Run AI content moderation on the comment.
-
-        Sets ai_flagged, ai_severity_score, ai_categories, and show_crisis_resources.
-        """
-        try:
-            from django.conf import settings
-            # Only run AI moderation if API key is configured
-            if settings.OPENAI_API_KEY:
-                from ..utils.ai_moderator import get_moderator
-
-                moderator = get_moderator()
-                result = moderator.check_content(comment.body)
-
-                comment.ai_flagged = result.get("flagged", False)
-                comment.ai_severity_score = result.get("severity_score")
-                comment.ai_categories = result.get("category_scores")
-                comment.show_crisis_resources = result.get("is_crisis", False)
-
-                # Auto-flag for human review if AI flags it
-                if comment.ai_flagged:
-                    comment.is_flagged = True
+    def _enqueue_ai_moderation(self, comment):
+        """Queue the saved comment for moderation by the background pool or worker."""
+        from ..models import ModerationJob
+        from ..utils.ai_moderator import moderation_enabled, run_moderation_async
+        from ..utils.moderation_queue import enqueue_moderation
 
-        except Exception as e:
-            # If AI moderation fails, log the error and continue without it
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"AI moderation failed for comment: {e}")
+        if moderation_enabled():
+            job_id = enqueue_moderation(ModerationJob.COMMENT, comment.pk)
+            # Usually moderated right away; the queued job is the fallback
+            transaction.on_commit(lambda: run_moderation_async(job_id))
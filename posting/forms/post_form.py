@@ -1,6 +1,7 @@
 import re
 
 from django import forms
+from django.db import transaction
 from django.utils.text import slugify
 
 from ..models import Post, Tag
@@ -142,96 +143,64 @@ class PostForm(forms.ModelForm):
         if author is not None:
             post.author = author
 
-        # Run AI moderation BEFORE saving (synchronous)
-        self._run_ai_moderation(post)
-
         # Handle identity choice
         # If post_as_identity is True, is_anonymous is False
         # If post_as_identity is False, is_anonymous is True
         post.is_anonymous = not self.cleaned_data.get('post_as_identity', False)
 
+        # Post.save() applies the crisis lexicon; AI moderation runs in the background (see moderation_queue.py)
         if commit:
-            post.save()
-
-            # Collect all tags from both sources
-            all_tags = []
-
-            # 1. Get tags from tags_input field
-            tags_input_str = self.cleaned_data.get("tags_input", "").strip()
-            if tags_input_str:
-                # Split by comma and clean each tag
-                tag_list = []
-                for tag in tags_input_str.split(","):
-                    tag = tag.strip()
-                    if tag:
-                        # Remove any # symbols from manual input (we'll handle hashtags separately)
-                        tag = tag.lstrip("#").strip()
+            # One transaction, so a saved post always has its moderation job
+            with transaction.atomic():
+                post.save()
+
+                # Collect all tags from both sources
+                all_tags = []
+
+                # 1. Get tags from tags_input field
+                tags_input_str = self.cleaned_data.get("tags_input", "").strip()
+                if tags_input_str:
+                    # Split by comma and clean each tag
+                    tag_list = []
+                    for tag in tags_input_str.split(","):
+                        tag = tag.strip()
+                        if tag:
+                            # Remove any # symbols from manual input (we'll handle hashtags separately)
+                            tag = tag.lstrip("#").strip()
+                            if tag:
+                                tag_list.append(tag)
+
+                    for tag_name in tag_list:
+                        tag = self.get_or_create_tag(tag_name)
                         if tag:
-                            tag_list.append(tag)
+                            all_tags.append(tag)
 
-                for tag_name in tag_list:
+                # 2. Extract hashtags from body text
+                body_text = self.cleaned_data.get("body", "")
+                hashtags = self.extract_hashtags(body_text)
+
+                for tag_name in hashtags:
                     tag = self.get_or_create_tag(tag_name)
                     if tag:
                         all_tags.append(tag)
 
-            # 2. Extract hashtags from body text
-            body_text = self.cleaned_data.get("body", "")
-            hashtags = self.extract_hashtags(body_text)
-
-            for tag_name in hashtags:
-                tag = self.get_or_create_tag(tag_name)
-                if tag:
-                    all_tags.append(tag)
+                # Remove duplicates (in case same tag appears in both sources)
+                unique_tags = list(set(all_tags))
 
-            # Remove duplicates (in case same tag appears in both sources)
-            unique_tags = list(set(all_tags))
+                # Set tags on post
+                post.tags.set(unique_tags)
 
-            # Set tags on post
-            post.tags.set(unique_tags)
+                self._enqueue_ai_moderation(post)
 
         return post
 
-    def _run_ai_moderation(self, post):
-        """
-        Run AI content moderation on the post (synchronous).
-
-        Calls OpenAI Moderation API and sets:
-        - ai_flagged: Whether content was flagged
-        - ai_severity_score: Max severity across categories
-        - ai_categories: Category scores
-        - show_crisis_resources: Whether to show crisis help
-        - is_flagged: Auto-flag for human review if AI flags it
-        """
-        import logging
-        logger = logging.getLogger(__name__)
-
-        try:
-            from django.conf import settings
-            if not getattr(settings, 'OPENAI_API_KEY', None):
-                logger.debug("AI moderation skipped: OPENAI_API_KEY not configured")
-                return
-
-            from ..utils.ai_moderator import get_moderator
-
-            moderator = get_moderator()
-            text = f"{post.title}\n\n{post.body}"
-
-            result = moderator.check_content(text)
-
-            logger.info(f"AI Moderation result: flagged={result.get('flagged')}, is_crisis={result.get('is_crisis')}")
-
-            post.ai_flagged = result.get("flagged", False)
-            post.ai_severity_score = result.get("severity_score")
-            post.ai_categories = result.get("category_scores")
-            post.show_crisis_resources = result.get("is_crisis", False)
-
-            # Auto-flag for human review if AI flags it
-            if post.ai_flagged:
-                post.is_flagged = True
-                logger.info("Post auto-flagged by AI moderation")
+    def _enqueue_ai_moderation(self, post):
+        """Queue the saved post for moderation by the background pool or worker."""
+        from ..models import ModerationJob
+        from ..utils.ai_moderator import moderation_enabled, run_moderation_async
+        from ..utils.moderation_queue import enqueue_moderation
 
-        except Exception as e:
-            logger.error(f"AI moderation failed: {e}")
-            # Set defaults so post can still be saved
-            post.ai_flagged = False
-            post.show_crisis_resources = False
+        if moderation_enabled():
+            job_id = enqueue_moderation(ModerationJob.POST, post.pk)
+            # Usually moderated right away; the queued job is the fallback
+            transaction.on_commit(lambda: run_moderation_async(job_id))
@@ -0,0 +1,111 @@
+"""Management command timing the crisis lexicon check on comment-sized text.
+
+Every post and comment save scans its text (see
+posting/utils/crisis_lexicon.py), so the check must stay cheap at the
+5000-character comment limit. This times, per call:
+
+- the old check (the built-in keywords as one case-insensitive alternation)
+- the current lexicon: is_crisis() and the full scan() of all categories
+- a lexicon with --terms extra plain terms, compiled as a trie, against the
+  same terms as a naive alternation
+
+on benign text and on text with a crisis phrase at the very end, e.g.:
+
+    python manage.py benchmark_crisis_check --iterations 2000 --terms 500
+"""
+
+import random
+import re
+import time
+
+from django.core.management.base import BaseCommand
+
+from posting.utils.crisis_lexicon import ABUSE, CRISIS_KEYWORDS, Lexicon, get_lexicon
+
+WORDS = (
+    "the exam was hard but office hours with the professor helped a lot and "
+    "our study group meets again on friday before the career fair internship "
+    "deadline so bring notes coffee and questions about problem sets"
+).split()
+
+
+class Command(BaseCommand):
+    """Time the inline crisis check on comment-sized text."""
+
+    help = "Benchmark the crisis lexicon check at the comment length limit"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=1000,
+            help="Calls timed per case (default: 1000)",
+        )
+        parser.add_argument(
+            "--length",
+            type=int,
+            default=5000,
+            help="Characters per text (default: 5000, the comment limit)",
+        )
+        parser.add_argument(
+            "--terms",
+            type=int,
+            default=500,
+            help="Extra plain terms for the large-lexicon comparison (default: 500)",
+        )
+
+    def _text(self, rng, length, ending=""):
+        words = []
+        size = len(ending)
+        while size < length:
+            word = rng.choice(WORDS)
+            words.append(word)
+            size += len(word) + 1
+        return (" ".join(words)[: length - len(ending)] + ending)[:length]
+
+    def _time(self, check, text, iterations):
+        """Return (mean, p99) microseconds per call."""
+        timings = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            check(text)
+            timings.append((time.perf_counter() - started) * 1e6)
+        timings.sort()
+        return sum(timings) / len(timings), timings[int(0.99 * (len(timings) - 1))]
+
+    def handle(self, *args, **options):
+        iterations = max(options["iterations"], 1)
+        length = options["length"]
+        rng = random.Random(0)
+        texts = {
+            "benign": self._text(rng, length),
+            "crisis at end": self._text(rng, length, ending=" i want to die"),
+        }
+
+        old_pattern = re.compile("|".join(CRISIS_KEYWORDS), re.IGNORECASE)
+        lexicon = get_lexicon()
+        terms = sorted({
+            f"{rng.choice(WORDS)}{rng.randrange(10_000)} {rng.choice(WORDS)}"
+            for _ in range(options["terms"])
+        })
+        large = Lexicon([(term, ABUSE, False) for term in terms])
+        naive = re.compile(
+            r"\b(?:" + "|".join(re.escape(term).replace(r"\ ", r"\s+") for term in terms) + r")\b",
+            re.IGNORECASE,
+        )
+
+        cases = [
+            ("old keyword regex", old_pattern.search),
+            (f"lexicon is_crisis ({lexicon.size} terms)", lexicon.is_crisis),
+            (f"lexicon scan ({lexicon.size} terms)", lexicon.scan),
+            (f"trie scan (+{len(terms)} terms)", large.scan),
+            (f"naive alternation ({len(terms)} terms)", naive.search),
+        ]
+        self.stdout.write(f"{length}-character texts; {iterations} call(s) per case\n")
+        for label, text in texts.items():
+            self.stdout.write(f"{label}:")
+            for name, check in cases:
+                mean, p99 = self._time(check, text, iterations)
+                self.stdout.write(f"  {name:<34} {mean:8.1f} us mean, {p99:8.1f} us p99")
+
+        self.stdout.write(self.style.SUCCESS("\nBenchmark complete."))
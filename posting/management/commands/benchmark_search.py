@@ -0,0 +1,77 @@
+"""Management command comparing full-text search with the old icontains filter.
+
+Runs each query through both paths the way the home feed does (visible
+posts, first page) and reports the mean time per query and the number of
+matches, e.g.:
+
+    python manage.py benchmark_search --query "exam" --query "career fair"
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from posting.models import Post
+from posting.utils.search import search_posts
+
+DEFAULT_QUERIES = ["exam", "internship", "career fair", "professor office hours"]
+
+
+class Command(BaseCommand):
+    """Time feed search queries with icontains and with the search index."""
+
+    help = "Benchmark full-text search against the icontains search path"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--query",
+            action="append",
+            dest="queries",
+            help="Search query to time (repeatable; defaults to a few sample queries)",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=20,
+            help="Times to run each query per path (default: 20)",
+        )
+        parser.add_argument(
+            "--page-size",
+            type=int,
+            default=12,
+            help="Rows fetched per query, like one feed page (default: 12)",
+        )
+
+    def _time(self, queryset, iterations, page_size):
+        """Return (mean ms, match count) for fetching the first page."""
+        started = time.perf_counter()
+        for _ in range(iterations):
+            list(queryset[:page_size])
+        elapsed_ms = (time.perf_counter() - started) * 1000 / iterations
+        return elapsed_ms, queryset.count()
+
+    def handle(self, *args, **options):
+        queries = options["queries"] or DEFAULT_QUERIES
+        iterations = max(options["iterations"], 1)
+        page_size = options["page_size"]
+        visible = Post.objects.filter(is_hidden=False)
+
+        self.stdout.write(
+            f"{Post.objects.count()} post(s); {iterations} iteration(s) per query\n"
+        )
+        for query in queries:
+            icontains = visible.filter(
+                Q(title__icontains=query) | Q(body__icontains=query)
+            ).order_by("-created_at")
+            full_text = search_posts(visible, query).order_by("-search_rank", "-created_at")
+
+            old_ms, old_count = self._time(icontains, iterations, page_size)
+            new_ms, new_count = self._time(full_text, iterations, page_size)
+            speedup = old_ms / new_ms if new_ms else float("inf")
+            self.stdout.write(
+                f"  {query!r}: icontains {old_ms:.2f} ms ({old_count} matches), "
+                f"full-text {new_ms:.2f} ms ({new_count} matches), {speedup:.1f}x"
+            )
+
+        self.stdout.write(self.style.SUCCESS("\nBenchmark complete."))
@@ -0,0 +1,137 @@
+"""Management command to measure vote throughput on a single hot post.
+
+Creates a throwaway post and one voter per thread, then has every thread
+toggle its vote on that post as fast as it can, first with the counters on
+the post row and then with them sharded over --shards rows (see
+posting/utils/counter_shards.py). Reports votes per second for each run and
+checks the counters against the vote rows afterwards. Everything it creates
+is deleted again.
+
+Run it against the production database engine: SQLite serializes all writes
+to the whole file, so sharding cannot help there.
+"""
+
+import threading
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+from django.test.utils import override_settings
+
+from posting.models import Post, Vote
+from posting.utils.counter_shards import fold_all_counter_shards
+from posting.utils.vote_service import post_votes
+
+
+class Command(BaseCommand):
+    """Benchmark concurrent votes on one post with and without sharded counters."""
+
+    help = "Hammer one post with concurrent votes and compare sharded and unsharded counters"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=8,
+            help="Number of concurrent voters (default: 8)",
+        )
+        parser.add_argument(
+            "--votes",
+            type=int,
+            default=200,
+            help="Vote clicks per thread (default: 200)",
+        )
+        parser.add_argument(
+            "--shards",
+            type=int,
+            default=8,
+            help="Counter shards per post for the sharded run (default: 8)",
+        )
+
+    def handle(self, *args, **options):
+        threads = options["threads"]
+        votes = options["votes"]
+        shards = options["shards"]
+
+        if connection.vendor == "sqlite":
+            self.stdout.write(
+                self.style.WARNING(
+                    "SQLite locks the whole database for every write; "
+                    "expect no difference between the runs.\n"
+                )
+            )
+
+        User = get_user_model()
+        run_id = uuid.uuid4().hex[:8]
+        author = User.objects.create_user(
+            username=f"bench-{run_id}-author", email=f"bench-{run_id}-author@yale.edu"
+        )
+        voters = [
+            User.objects.create_user(
+                username=f"bench-{run_id}-{i}", email=f"bench-{run_id}-{i}@yale.edu"
+            )
+            for i in range(threads)
+        ]
+        post = Post.objects.create(
+            title="Vote counter benchmark", body="Benchmark post", author=author
+        )
+
+        try:
+            for label, shard_setting in (("unsharded", 0), (f"{shards} shards", shards)):
+                with override_settings(VOTE_COUNTER_SHARDS=shard_setting, VOTE_WRITE_BEHIND=False):
+                    elapsed, errors = self._run(post, voters, votes)
+                    fold_all_counter_shards()
+                clicks = threads * votes - errors
+                self.stdout.write(
+                    f"  {label:>12}: {clicks} votes in {elapsed:.2f} s "
+                    f"({clicks / elapsed:.0f} votes/s, {errors} failed)"
+                )
+                self._check_counters(post)
+        finally:
+            post.delete()
+            User.objects.filter(pk__in=[author.pk] + [voter.pk for voter in voters]).delete()
+
+        self.stdout.write(self.style.SUCCESS("Benchmark complete."))
+
+    def _run(self, post, voters, votes):
+        """Run one round of concurrent votes; returns (seconds, failed votes)."""
+        barrier = threading.Barrier(len(voters) + 1)
+        errors = []
+
+        def vote(voter):
+            failed = 0
+            try:
+                barrier.wait()
+                for i in range(votes):
+                    # Alternate buttons so every click changes the counters
+                    clicked = Vote.UPVOTE if i % 2 == 0 else Vote.DOWNVOTE
+                    try:
+                        post_votes.toggle(post, voter, clicked)
+                    except DatabaseError:
+                        failed += 1
+            finally:
+                errors.append(failed)
+                connection.close()
+
+        workers = [threading.Thread(target=vote, args=(voter,)) for voter in voters]
+        for worker in workers:
+            worker.start()
+        barrier.wait()
+        started = time.monotonic()
+        for worker in workers:
+            worker.join()
+        return time.monotonic() - started, sum(errors)
+
+    def _check_counters(self, post):
+        post.refresh_from_db()
+        upvotes = Vote.objects.filter(post=post, vote_type=Vote.UPVOTE).count()
+        downvotes = Vote.objects.filter(post=post, vote_type=Vote.DOWNVOTE).count()
+        if (post.upvotes_count, post.downvotes_count) != (upvotes, downvotes):
+            self.stdout.write(
+                self.style.ERROR(
+                    f"  Counters drifted: stored {post.upvotes_count}/{post.downvotes_count}, "
+                    f"votes {upvotes}/{downvotes}"
+                )
+            )
@@ -0,0 +1,57 @@
+"""Management command to build the tag suggestion model and save it for web processes.
+
+Fits the model on all visible tagged posts and saves it as a new version
+under TAG_MODEL_DIR. Web processes memory-map it at startup and switch to
+it within seconds of a new build, instead of each training its own on the
+first suggestion request. The web service's build runs it on every deploy
+(render.yaml); rerun it in between so deleted, hidden and edited posts drop
+out sooner; new posts are added in between anyway.
+See posting/utils/tag_suggester.py.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posting.utils.tag_suggester import get_suggester
+
+
+class Command(BaseCommand):
+    """Fit the tag suggester and save it as a new model version."""
+
+    help = "Build the tag suggestion model and save it for web processes to memory-map"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            default=settings.TAG_MODEL_DIR,
+            help=f"Directory of model versions (default: {settings.TAG_MODEL_DIR})",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Fit and report without saving",
+        )
+
+    def handle(self, *args, **options):
+        suggester = get_suggester()
+        started = time.monotonic()
+        suggester.refresh()
+        if suggester.tag_vectors is None:
+            raise CommandError("Nothing to build: no tags found, or scikit-learn is not installed")
+        elapsed = time.monotonic() - started
+
+        matrix = suggester.tag_vectors
+        self.stdout.write(
+            f"Fitted {len(suggester.tags)} tag(s) on {suggester.n_docs} post-tag pair(s) "
+            f"in {elapsed:.1f}s ({matrix.nnz} non-zero weights, "
+            f"{(matrix.data.nbytes + matrix.indices.nbytes) / 1e6:.1f} MB)"
+        )
+
+        if options["dry_run"]:
+            self.stdout.write(self.style.WARNING("DRY RUN - model not saved"))
+            return
+
+        version = suggester.save(options["output"])
+        self.stdout.write(self.style.SUCCESS(f"Saved tag model {version} to {options['output']}."))
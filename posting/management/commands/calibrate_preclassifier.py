@@ -0,0 +1,81 @@
+"""Management command to train and calibrate the moderation pre-classifier.
+
+Trains the local benign-text classifier on posts and comments that already
+have moderation results, picks the skip threshold that keeps --target-recall
+of the risky held-out texts going to the API, and prints the recall and
+skip rate at that and other thresholds. The model is saved to
+MODERATION_PRECLASSIFIER_PATH (which running processes pick up) unless
+--dry-run is given. See posting/utils/moderation_preclassifier.py.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posting.utils.moderation_preclassifier import (
+    DEFAULT_TARGET_RECALL,
+    MIN_TRAINING_SAMPLES,
+    mode,
+    train_preclassifier,
+)
+
+
+class Command(BaseCommand):
+    """Train the moderation pre-classifier and report its calibration."""
+
+    help = "Train the moderation pre-classifier and report recall and skip rate per threshold"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--target-recall",
+            type=float,
+            default=DEFAULT_TARGET_RECALL,
+            help=f"Share of risky texts that must still reach the API (default: {DEFAULT_TARGET_RECALL})",
+        )
+        parser.add_argument(
+            "--min-samples",
+            type=int,
+            default=MIN_TRAINING_SAMPLES,
+            help=f"Minimum number of moderated texts to train on (default: {MIN_TRAINING_SAMPLES})",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report without saving the model",
+        )
+
+    def handle(self, *args, **options):
+        target_recall = options["target_recall"]
+        if not 0 < target_recall <= 1:
+            raise CommandError("--target-recall must be between 0 and 1")
+
+        try:
+            classifier, report = train_preclassifier(
+                target_recall=target_recall, min_samples=options["min_samples"]
+            )
+        except ImportError:
+            raise CommandError("scikit-learn is not installed")
+
+        self.stdout.write(f"Training data: {report['samples']} texts, {report['risky']} risky")
+        if classifier is None:
+            raise CommandError(report["error"])
+
+        self.stdout.write("\nValidation (texts below the threshold skip the API):")
+        self.stdout.write(f"  {'threshold':>9}  {'recall':>7}  {'skipped':>7}")
+        for row in report["curve"]:
+            self.stdout.write(
+                f"  {row['threshold']:>9.2f}  {row['recall']:>7.1%}  {row['skip_rate']:>7.1%}"
+            )
+        self.stdout.write(
+            f"\nChosen threshold {report['threshold']:.4f}: recall {report['recall']:.1%}, "
+            f"skips {report['skip_rate']:.1%} of API calls (target recall {target_recall:.1%})"
+        )
+
+        if options["dry_run"]:
+            self.stdout.write(self.style.WARNING("DRY RUN - model not saved"))
+            return
+
+        path = settings.MODERATION_PRECLASSIFIER_PATH
+        classifier.save(path)
+        self.stdout.write(
+            self.style.SUCCESS(f"Saved pre-classifier to {path} (mode: {mode()}).")
+        )
@@ -0,0 +1,60 @@
+"""Management command to apply buffered (write-behind) votes.
+
+With VOTE_WRITE_BEHIND on, vote clicks are stored as PendingVote rows and
+only reach the votes table and post counters when this command flushes
+them. Run it continuously with --interval (as a worker process), or from
+cron for a one-off flush. See posting/utils/vote_buffer.py.
+
+With VOTE_COUNTER_SHARDS set, each run also folds the sharded vote counters
+into their posts (see posting/utils/counter_shards.py).
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from posting.utils.counter_shards import fold_all_counter_shards
+from posting.utils.vote_buffer import DEFAULT_BATCH_SIZE, flush_all_pending_votes
+
+
+class Command(BaseCommand):
+    """Apply buffered vote clicks in bulk."""
+
+    help = (
+        "Apply buffered write-behind votes to the votes table and post counters, "
+        "and fold sharded vote counters into their posts"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f"Number of clicks to apply per transaction (default: {DEFAULT_BATCH_SIZE})",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Keep running, flushing every N seconds (default: flush once and exit)",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        interval = options["interval"]
+
+        while True:
+            started = time.monotonic()
+            flushed = flush_all_pending_votes(batch_size=batch_size)
+            folded = fold_all_counter_shards(batch_size=batch_size)
+            elapsed_ms = (time.monotonic() - started) * 1000
+            if flushed or folded or not interval:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Flushed {flushed} vote(s) and folded {folded} counter shard(s) "
+                        f"in {elapsed_ms:.1f} ms."
+                    )
+                )
+            if not interval:
+                return
+            time.sleep(interval)
@@ -0,0 +1,88 @@
+"""Management command to run AI moderation jobs from the queue.
+
+New posts and comments are saved without waiting for the moderation API and
+queued as ModerationJob rows; this worker moderates them and fills in their
+AI fields. Run it continuously with --interval (as a worker process; several
+can run side by side on PostgreSQL), or once to drain the queue. See
+posting/utils/moderation_queue.py.
+
+The worker also deletes expired cached moderation results, at start-up and
+then hourly (see posting/utils/moderation_cache.py).
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from posting.models import ModerationJob
+from posting.utils.moderation_cache import purge_expired
+from posting.utils.moderation_queue import (
+    DEFAULT_BATCH_SIZE,
+    default_worker_id,
+    process_moderation_jobs,
+    requeue_dead_jobs,
+)
+
+
+class Command(BaseCommand):
+    """Moderate queued posts and comments."""
+
+    help = "Run queued AI moderation jobs for new posts and comments"
+
+    # Seconds between purges of expired cached results
+    purge_interval = 3600
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f"Number of jobs to claim at a time (default: {DEFAULT_BATCH_SIZE})",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Keep running, polling every N seconds when idle (default: drain the queue and exit)",
+        )
+        parser.add_argument(
+            "--requeue-dead",
+            action="store_true",
+            help="Retry dead-lettered jobs from scratch before starting",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        interval = options["interval"]
+        worker_id = default_worker_id()
+
+        if options["requeue_dead"]:
+            requeued = requeue_dead_jobs()
+            self.stdout.write(f"Requeued {requeued} dead-lettered job(s).")
+
+        total_completed = total_failed = 0
+        last_purge = None
+        while True:
+            if last_purge is None or time.monotonic() - last_purge > self.purge_interval:
+                purged = purge_expired()
+                last_purge = time.monotonic()
+                if purged:
+                    self.stdout.write(f"Purged {purged} expired cached result(s).")
+            completed, failed = process_moderation_jobs(batch_size=batch_size, worker_id=worker_id)
+            total_completed += completed
+            total_failed += failed
+            if completed or failed:
+                if interval:
+                    self.stdout.write(f"Moderated {completed} item(s), {failed} failed.")
+                continue
+            if not interval:
+                break
+            time.sleep(interval)
+
+        dead = ModerationJob.objects.filter(status=ModerationJob.DEAD).count()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Moderated {total_completed} item(s), {total_failed} failed attempt(s); "
+                f"{dead} job(s) dead-lettered."
+            )
+        )
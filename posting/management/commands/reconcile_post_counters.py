@@ -0,0 +1,108 @@
+"""Management command to repair drift in the denormalized post counters.
+
+Recomputes upvotes_count, downvotes_count, score and visible_comments_count
+from the votes and comments tables and rewrites any post whose stored values
+disagree (e.g. after bulk deletes or raw SQL that bypassed the model hooks).
+Tag.visible_posts_count is checked the same way against the post-tag links.
+Sharded vote counters are folded into their posts first, so their pending
+changes are not counted twice.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from posting.models import Post, Tag
+from posting.utils.counter_shards import fold_all_counter_shards
+from posting.utils.feed_cache import invalidate_feed_pages
+from posting.utils.tag_sidebar import invalidate_tag_sidebar
+
+
+class Command(BaseCommand):
+    """Recompute stored vote and comment counters on posts and tags."""
+
+    help = "Repair drift in denormalized post vote/comment and tag post counters"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Show what would be done without making changes",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of posts to write per bulk update (default: 500)",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        batch_size = options["batch_size"]
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING("DRY RUN - no changes will be made\n"))
+        else:
+            fold_all_counter_shards()
+
+        drifted = Post.objects.with_actual_counters().exclude(
+            upvotes_count=F("actual_upvotes"),
+            downvotes_count=F("actual_downvotes"),
+            score=F("actual_upvotes") - F("actual_downvotes"),
+            visible_comments_count=F("actual_comments"),
+        ).order_by("pk")
+
+        fixed = []
+        for post in drifted.iterator():
+            self.stdout.write(
+                f"  - Post #{post.pk}: "
+                f"up {post.upvotes_count}->{post.actual_upvotes}, "
+                f"down {post.downvotes_count}->{post.actual_downvotes}, "
+                f"comments {post.visible_comments_count}->{post.actual_comments}"
+            )
+            post.upvotes_count = post.actual_upvotes
+            post.downvotes_count = post.actual_downvotes
+            post.score = post.actual_upvotes - post.actual_downvotes
+            post.visible_comments_count = post.actual_comments
+            post.render_version = F("render_version") + 1
+            fixed.append(post)
+
+        drifted_tags = Tag.objects.with_actual_counts().exclude(
+            visible_posts_count=F("actual_visible_posts")
+        ).order_by("pk")
+
+        fixed_tags = []
+        for tag in drifted_tags:
+            self.stdout.write(
+                f"  - Tag {tag.name!r}: "
+                f"visible posts {tag.visible_posts_count}->{tag.actual_visible_posts}"
+            )
+            tag.visible_posts_count = tag.actual_visible_posts
+            fixed_tags.append(tag)
+
+        if not fixed and not fixed_tags:
+            self.stdout.write(self.style.SUCCESS("All post counters are consistent."))
+            return
+
+        self.stdout.write("")
+        if dry_run:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Would repair {len(fixed)} post(s) and {len(fixed_tags)} tag(s)."
+                )
+            )
+            return
+
+        Post.objects.bulk_update(
+            fixed,
+            [
+                "upvotes_count", "downvotes_count", "score",
+                "visible_comments_count", "render_version",
+            ],
+            batch_size=batch_size,
+        )
+        Tag.objects.bulk_update(fixed_tags, ["visible_posts_count"], batch_size=batch_size)
+        invalidate_tag_sidebar()
+        invalidate_feed_pages()
+        self.stdout.write(
+            self.style.SUCCESS(f"Repaired {len(fixed)} post(s) and {len(fixed_tags)} tag(s).")
+        )
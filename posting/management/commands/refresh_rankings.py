@@ -0,0 +1,27 @@
+"""Management command to refresh the precomputed trending scores.
+
+Intended to run on a schedule (e.g. every few minutes from cron); the
+trending feed doesn't refresh the scores itself unless
+TRENDING_REFRESH_IN_REQUESTS is set (for development without a scheduler).
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from posting.models import Post
+
+
+class Command(BaseCommand):
+    """Recompute Post.trending_score for recently active posts."""
+
+    help = "Refresh precomputed trending scores for recently active posts"
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        updated = Post.objects.refresh_trending_scores()
+        elapsed_ms = (time.monotonic() - started) * 1000
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Refreshed {updated} post(s) in {elapsed_ms:.1f} ms.")
+        )
@@ -0,0 +1,109 @@
+"""Management command to re-run AI moderation over existing posts and comments.
+
+Use after changing MODERATION_MODEL or the moderation thresholds: every
+post and/or comment is re-scored and rows whose AI fields change are
+rewritten. Progress is checkpointed after each chunk, so an interrupted run
+continues where it stopped when started again (--restart starts over).
+MODERATION_CLIENT=fake runs it against the local keyword-based client. See
+posting/utils/remoderation.py.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posting.models import ModerationJob
+from posting.utils.ai_moderator import get_moderator
+from posting.utils.remoderation import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_WORKERS,
+    remoderate,
+    reset_checkpoint,
+)
+
+TARGETS = {
+    "posts": [ModerationJob.POST],
+    "comments": [ModerationJob.COMMENT],
+    "all": [ModerationJob.POST, ModerationJob.COMMENT],
+}
+
+
+class Command(BaseCommand):
+    """Re-moderate existing posts and comments, resumably."""
+
+    help = "Re-run AI moderation over existing posts and comments (resumable)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--target",
+            choices=sorted(TARGETS),
+            default="all",
+            help="What to re-moderate (default: all)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help=f"Rows read and written per chunk (default: {DEFAULT_CHUNK_SIZE})",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=DEFAULT_WORKERS,
+            help=f"Concurrent moderation calls (default: {DEFAULT_WORKERS})",
+        )
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=0,
+            help="Maximum moderation calls per second (default: no limit)",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore the saved progress and start from the first row",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1 or options["workers"] < 1 or options["rate"] < 0:
+            raise CommandError("--batch-size and --workers must be positive, --rate not negative")
+        if not get_moderator().client:
+            raise CommandError("No moderation client configured (set OPENAI_API_KEY or MODERATION_CLIENT=fake)")
+
+        for target in TARGETS[options["target"]]:
+            if options["restart"]:
+                reset_checkpoint(target)
+
+            def progress(stats, target=target):
+                self.stdout.write(
+                    f"  {target}s: {stats['processed']} processed, {stats['updated']} updated "
+                    f"(through #{stats['last_pk']}, {self._throughput(stats)})"
+                )
+
+            stats = remoderate(
+                target,
+                chunk_size=options["batch_size"],
+                workers=options["workers"],
+                rate=options["rate"],
+                progress=progress,
+            )
+            if not stats["processed"]:
+                self.stdout.write(f"No {target}s left to re-moderate (use --restart to start over).")
+                continue
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Re-moderated {stats['processed']} {target}(s) in {stats['seconds']:.1f}s "
+                    f"({self._throughput(stats)}): {stats['updated']} updated, "
+                    f"{stats['cache_hits']} from cache, {stats['skipped']} skipped, "
+                    f"{stats['failed']} failed."
+                )
+            )
+            if stats["failed"]:
+                self.stdout.write(
+                    self.style.WARNING(
+                        f"{stats['failed']} {target}(s) could not be moderated and kept their "
+                        f"old results; rerun with --restart to retry them."
+                    )
+                )
+
+    @staticmethod
+    def _throughput(stats):
+        return f"{stats['processed'] / max(stats['seconds'], 1e-6):.1f}/s"
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.8 on 2026-10-17 23:43
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_counters(apps, schema_editor):
+    """Populate the new counter columns from existing votes and comments."""
+    Post = apps.get_model('posting', 'Post')
+    posts = Post.objects.annotate(
+        up=Count('votes', filter=Q(votes__vote_type='UPVOTE'), distinct=True),
+        down=Count('votes', filter=Q(votes__vote_type='DOWNVOTE'), distinct=True),
+        visible=Count('comments', filter=Q(comments__is_deleted=False), distinct=True),
+    )
+    for post in posts.iterator():
+        Post.objects.filter(pk=post.pk).update(
+            upvotes_count=post.up,
+            downvotes_count=post.down,
+            score=post.up - post.down,
+            visible_comments_count=post.visible,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posting', '0005_post_posting_pos_is_flag_6d619b_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='downvotes_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='score',
+            field=models.IntegerField(default=0, help_text='Upvotes minus downvotes'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='upvotes_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='visible_comments_count',
+            field=models.IntegerField(default=0, help_text='Number of comments that are not soft-deleted'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['is_hidden', '-created_at'], name='posting_pos_is_hidd_4a200e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['is_hidden', '-score', '-created_at'], name='posting_pos_is_hidd_a24734_idx'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-17 23:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posting', '0006_post_denormalized_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='trending_score',
+            field=models.FloatField(default=0.0, help_text='Precomputed by refresh_trending_scores()'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['created_at'], name='posting_com_created_7f3b6e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['is_hidden', '-trending_score', '-created_at'], name='posting_pos_is_hidd_9da0d6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vote',
+            index=models.Index(fields=['created_at'], name='posting_vot_created_4af698_idx'),
+        ),
+    ]
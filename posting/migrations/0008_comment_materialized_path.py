@@ -0,0 +1,69 @@
+# Generated by Django 5.2.8 on 2026-10-18 00:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+PATH_SEGMENT_LENGTH = 7
+PATH_DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def path_segment(pk):
+    """Fixed-width base-36 pk, matching posting.models.comment.path_segment."""
+    digits = ''
+    while pk:
+        pk, remainder = divmod(pk, 36)
+        digits = PATH_DIGITS[remainder] + digits
+    return digits.rjust(PATH_SEGMENT_LENGTH, '0')
+
+
+def backfill_paths(apps, schema_editor):
+    """Compute path and depth for existing comments from their parent links."""
+    Comment = apps.get_model('posting', 'Comment')
+    parents = dict(Comment.objects.values_list('pk', 'parent_comment_id'))
+    paths = {}
+
+    def resolve(pk):
+        # Walk up iteratively to the nearest resolved ancestor, then back down
+        chain = []
+        while pk is not None and pk not in paths:
+            chain.append(pk)
+            pk = parents[pk]
+        prefix, depth = paths[pk] if pk is not None else ('', -1)
+        for node in reversed(chain):
+            prefix, depth = prefix + path_segment(node), depth + 1
+            paths[node] = (prefix, depth)
+
+    for pk in parents:
+        resolve(pk)
+
+    comments = []
+    for comment in Comment.objects.only('pk').iterator():
+        comment.path, comment.depth = paths[comment.pk]
+        comments.append(comment)
+    Comment.objects.bulk_update(comments, ['path', 'depth'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posting', '0007_post_trending_score'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, help_text='0 for top-level comments'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Materialized path of ancestor pks, root first', max_length=252),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'path'], name='posting_com_post_id_7c76de_idx'),
+        ),
+        migrations.RunPython(backfill_paths, migrations.RunPython.noop),
+    ]
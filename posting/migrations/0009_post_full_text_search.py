@@ -0,0 +1,62 @@
+# Generated by Django 5.2.8 on 2026-10-18 00:11
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Weighted title/body/visible-comments document, as built by
+# posting.utils.search.index_posts()
+PG_DOCUMENT = """
+    setweight(to_tsvector('english', coalesce(p.title, '')), 'A')
+    || setweight(to_tsvector('english', coalesce(p.body, '')), 'B')
+    || setweight(to_tsvector('english', coalesce((
+        SELECT string_agg(c.body, E'\\n' ORDER BY c.id)
+        FROM posting_comment c
+        WHERE c.post_id = p.id AND NOT c.is_deleted
+    ), '')), 'C')
+"""
+
+
+def create_search_index(apps, schema_editor):
+    """Create and populate the backend-specific full-text index."""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX posting_post_search_gin ON posting_post USING gin (search_vector)'
+        )
+        schema_editor.execute(f'UPDATE posting_post p SET search_vector = {PG_DOCUMENT}')
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            'CREATE VIRTUAL TABLE posting_post_fts USING fts5('
+            "title, body, comments, tokenize='porter unicode61')"
+        )
+        schema_editor.execute(
+            'INSERT INTO posting_post_fts (rowid, title, body, comments) '
+            'SELECT p.id, p.title, p.body, coalesce(('
+            "  SELECT group_concat(c.body, char(10)) FROM posting_comment c"
+            '  WHERE c.post_id = p.id AND NOT c.is_deleted'
+            "), '') FROM posting_post p"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS posting_post_search_gin')
+    elif vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS posting_post_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posting', '0008_comment_materialized_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
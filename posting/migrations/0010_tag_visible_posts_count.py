@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-18 00:21
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_visible_posts_count(apps, schema_editor):
+    """Count each tag's non-hidden posts."""
+    Tag = apps.get_model('posting', 'Tag')
+    tags = list(Tag.objects.annotate(
+        visible=Count('posts', filter=Q(posts__is_hidden=False))
+    ))
+    for tag in tags:
+        tag.visible_posts_count = tag.visible
+    Tag.objects.bulk_update(tags, ['visible_posts_count'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posting', '0009_post_full_text_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tag',
+            name='visible_posts_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_visible_posts_count, migrations.RunPython.noop),
+    ]
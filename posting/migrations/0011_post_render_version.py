@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 00:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posting', '0010_tag_visible_posts_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='render_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
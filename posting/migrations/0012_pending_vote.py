@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-18 00:39
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posting', '0011_post_render_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingVote',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target', models.CharField(choices=[('post', 'Post'), ('comment', 'Comment')], max_length=10)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('vote_type', models.CharField(choices=[('UPVOTE', 'Upvote'), ('DOWNVOTE', 'Downvote')], max_length=10)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('voter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_votes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['pk'],
+                'indexes': [models.Index(fields=['voter', 'target', 'object_id'], name='posting_pen_voter_i_82a0c8_idx')],
+            },
+        ),
+    ]
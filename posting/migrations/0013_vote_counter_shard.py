@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 00:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posting', '0012_pending_vote'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VoteCounterShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('upvotes', models.IntegerField(default=0)),
+                ('downvotes', models.IntegerField(default=0)),
+                ('changes', models.PositiveIntegerField(default=0)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='counter_shards', to='posting.post')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('post', 'shard'), name='unique_post_counter_shard')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-18 00:55
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posting', '0013_vote_counter_shard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModerationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target', models.CharField(choices=[('post', 'Post'), ('comment', 'Comment')], max_length=10)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('leased', 'Leased'), ('dead', 'Dead-lettered')], default='pending', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('leased_until', models.DateTimeField(blank=True, null=True)),
+                ('lease_owner', models.CharField(blank=True, max_length=100)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['pk'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='posting_mod_status_3c7b56_idx'), models.Index(fields=['target', 'object_id'], name='posting_mod_target_ac895e_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-18 01:04
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posting', '0014_moderation_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModerationResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64)),
+                ('model_version', models.CharField(max_length=100)),
+                ('result', models.JSONField()),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('content_hash', 'model_version'), name='unique_moderation_result')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 01:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posting', '0015_moderation_result'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackfillCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('last_pk', models.PositiveBigIntegerField(default=0)),
+                ('processed', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 01:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posting', '0016_backfill_checkpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LexiconTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(help_text='Word or phrase (case-insensitive, any whitespace between words), or a regex matched against lower-cased text', max_length=200)),
+                ('category', models.CharField(choices=[('crisis', 'Crisis'), ('abuse', 'Abuse')], default='crisis', max_length=10)),
+                ('is_regex', models.BooleanField(default=False, help_text='Treat the term as a regular expression')),
+                ('is_active', models.BooleanField(default=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['category', 'term'],
+                'constraints': [models.UniqueConstraint(fields=('term', 'category'), name='unique_lexicon_term')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posting', '0017_lexicon_term'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tag',
+            name='visible_posts_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+    ]
@@ -1,11 +1,20 @@
 # Import all models for backward compatibility
 # This allows `from posting.models import Post, Tag, Vote` to work as before
 
+from .backfill_checkpoint import BackfillCheckpoint
 from .comment import Comment
 from .comment_vote import CommentVote
+from .lexicon_term import LexiconTerm
+from .moderation_job import ModerationJob
+from .moderation_result import ModerationResult
+from .pending_vote import PendingVote
 from .post import Post
 from .tag import Tag
 from .vote import Vote
+from .vote_counter_shard import VoteCounterShard
 
-__all__ = ["Post", "Tag", "Vote", "Comment", "CommentVote"]
-
+__all__ = [
+    "Post", "Tag", "Vote", "Comment", "CommentVote", "PendingVote",
+    "VoteCounterShard", "ModerationJob", "ModerationResult", "BackfillCheckpoint",
+    "LexiconTerm",
+]
@@ -0,0 +1,20 @@
+from django.db import models
+
+
+class BackfillCheckpoint(models.Model):
+    """
+    Progress of a resumable backfill over a table, in primary key order.
+
+    A backfill saves the last primary key it finished after every chunk, so
+    an interrupted run continues after it instead of starting over (see
+    utils/remoderation.py).
+    """
+
+    name = models.CharField(max_length=100, unique=True)
+    # Rows with a primary key up to this one are done
+    last_pk = models.PositiveBigIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} (after #{self.last_pk})"
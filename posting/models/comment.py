@@ -1,9 +1,48 @@
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Q
 from django.utils import timezone
 
 from .post import Post
 
+# Each level of Comment.path is the comment's pk in fixed-width base 36, so
+# sorting by path yields depth-first thread order and every subtree is a
+# contiguous range sharing its root's path as a prefix
+PATH_SEGMENT_LENGTH = 7
+PATH_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def path_segment(pk):
+    """Return the fixed-width base-36 path segment for a comment pk."""
+    digits = ""
+    while pk:
+        pk, remainder = divmod(pk, 36)
+        digits = PATH_DIGITS[remainder] + digits
+    return digits.rjust(PATH_SEGMENT_LENGTH, "0")
+
+
+class CommentQuerySet(models.QuerySet):
+    """QuerySet with materialized-path thread lookups."""
+
+    def subtrees(self, roots, max_depth=None):
+        """
+        Return every comment in the subtrees rooted at roots, in thread order.
+
+        One query regardless of thread size: each subtree is a path-prefix
+        range on the (post, path) index. Pass max_depth to stop at a given
+        absolute depth (top-level comments are depth 0).
+        """
+        condition = Q()
+        for root in roots:
+            condition |= Q(post_id=root.post_id, path__startswith=root.path)
+        if not condition:
+            return self.none()
+
+        queryset = self.filter(condition)
+        if max_depth is not None:
+            queryset = queryset.filter(depth__lte=max_depth)
+        return queryset.order_by("path")
+
 
 class Comment(models.Model):
     """
@@ -11,8 +50,15 @@ class Comment(models.Model):
 
     Top-level comments have parent_comment=None.
     Replies have parent_comment pointing to another Comment.
+
+    Threads are also stored as a materialized path (see path_segment) with
+    the comment's depth, so a whole thread or subtree loads in one ordered
+    query instead of one query per level.
     """
 
+    # Deepest reply level whose path still fits in the path column
+    MAX_DEPTH = 35
+
     post = models.ForeignKey(
         Post,
         on_delete=models.CASCADE,
@@ -54,14 +100,29 @@ class Comment(models.Model):
         default=False, help_text="Show mental health resources (self-harm detected)"
     )
 
+    path = models.CharField(
+        max_length=(MAX_DEPTH + 1) * PATH_SEGMENT_LENGTH,
+        blank=True,
+        default="",
+        editable=False,
+        help_text="Materialized path of ancestor pks, root first",
+    )
+    depth = models.PositiveSmallIntegerField(
+        default=0, editable=False, help_text="0 for top-level comments"
+    )
+
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CommentQuerySet.as_manager()
+
     class Meta:
         ordering = ["created_at"]
         indexes = [
             models.Index(fields=["post", "-created_at"]),
             models.Index(fields=["parent_comment", "created_at"]),
+            models.Index(fields=["created_at"]),
+            models.Index(fields=["post", "path"]),
         ]
 
     def __str__(self) -> str:
@@ -70,6 +131,64 @@ class Comment(models.Model):
         preview = self.body[:50] + "..." if len(self.body) > 50 else self.body
         return f"Comment by {self.get_author_display()}: {preview}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the stored soft-delete state so save() can adjust post counters."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_is_deleted = instance.__dict__.get("is_deleted")
+        return instance
+
+    def save(self, *args, **kwargs):
+        """
+        Save the comment and keep the post's visible comment count in step.
+
+        New comments get their depth from the parent before the insert and
+        their path once the pk is known. Changed text is checked against the
+        crisis lexicon, which can turn on show_crisis_resources and is_flagged.
+        """
+        from ..utils.crisis_lexicon import apply_lexicon
+        from ..utils.search import index_post
+
+        adding = self._state.adding
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "body" in update_fields:
+            flagged = apply_lexicon(self, self.body)
+            if update_fields is not None and flagged:
+                kwargs["update_fields"] = update_fields = [*update_fields, *flagged]
+        if adding:
+            delta = 0 if self.is_deleted else 1
+            parent = self.parent_comment
+            self.depth = parent.depth + 1 if parent else 0
+        else:
+            was_deleted = getattr(self, "_loaded_is_deleted", self.is_deleted)
+            delta = int(was_deleted) - int(self.is_deleted)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                self.path = (parent.path if parent else "") + path_segment(self.pk)
+                type(self).objects.filter(pk=self.pk).update(path=self.path)
+            Post.objects.apply_comment_change(self.post_id, delta)
+            # Visible comment bodies are part of the post's search document
+            if delta or update_fields is None or "body" in update_fields:
+                index_post(self.post_id)
+        self._loaded_is_deleted = self.is_deleted
+
+    def delete(self, *args, **kwargs):
+        """
+        Hard-delete the comment and recount the post's visible comments.
+
+        Replies are removed by the cascade, so the count is recomputed
+        rather than decremented. The post's search document is rebuilt.
+        """
+        from ..utils.search import index_post
+
+        post_id = self.post_id
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            Post.objects.refresh_comment_count(post_id)
+            index_post(post_id)
+        return result
+
     def get_author_display(self):
         """Return author name or 'Anonymous'."""
         if self.is_anonymous or not self.author:
@@ -101,7 +220,7 @@ class Comment(models.Model):
 
     def is_reply(self):
         """Check if this is a reply to another comment."""
-        return self.parent_comment is not None
+        return self.parent_comment_id is not None
 
     def get_replies_count(self):
         """Get count of direct replies (excluding deleted)."""
@@ -1,5 +1,5 @@
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 
 from .comment import Comment
 
@@ -40,3 +40,20 @@ class CommentVote(models.Model):
 
     def __str__(self):
         return f"{self.voter.username} {self.vote_type.lower()}d comment #{self.comment.pk}"
+
+    def save(self, *args, **kwargs):
+        """Save the vote and invalidate the cached card of the comment's post."""
+        from .post import Post
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            Post.objects.bump_render_version(self.comment.post_id)
+
+    def delete(self, *args, **kwargs):
+        """Delete the vote and invalidate the cached card of the comment's post."""
+        from .post import Post
+
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            Post.objects.bump_render_version(self.comment.post_id)
+        return result
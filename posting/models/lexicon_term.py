@@ -0,0 +1,50 @@
+import re
+
+from django.core.exceptions import ValidationError
+from django.db import models
+
+
+class LexiconTerm(models.Model):
+    """
+    A crisis or abuse term checked inline on every post and comment save.
+
+    Crisis terms show crisis resources; abuse terms flag the post or comment
+    for human review. Terms are added to the built-in crisis keywords, edited
+    in the admin, and picked up by running processes within seconds (see
+    utils/crisis_lexicon.py).
+    """
+
+    CRISIS = "crisis"
+    ABUSE = "abuse"
+    CATEGORIES = [
+        (CRISIS, "Crisis"),
+        (ABUSE, "Abuse"),
+    ]
+
+    term = models.CharField(
+        max_length=200,
+        help_text=(
+            "Word or phrase (case-insensitive, any whitespace between words), "
+            "or a regex matched against lower-cased text"
+        ),
+    )
+    category = models.CharField(max_length=10, choices=CATEGORIES, default=CRISIS)
+    is_regex = models.BooleanField(default=False, help_text="Treat the term as a regular expression")
+    is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["category", "term"]
+        constraints = [
+            models.UniqueConstraint(fields=["term", "category"], name="unique_lexicon_term"),
+        ]
+
+    def clean(self):
+        if self.is_regex:
+            try:
+                re.compile(self.term)
+            except re.error as e:
+                raise ValidationError({"term": f"Invalid regular expression: {e}"})
+
+    def __str__(self):
+        return f"{self.term} ({self.category})"
@@ -0,0 +1,52 @@
+from django.db import models
+from django.utils import timezone
+
+
+class ModerationJob(models.Model):
+    """
+    A post or comment waiting for AI moderation.
+
+    Posts and comments are saved right away with only the local crisis
+    keyword check applied; the form enqueues one of these and `python
+    manage.py moderation_worker` fills in the AI fields later. Workers lease
+    jobs, failed calls are retried with exponential backoff, and jobs that
+    keep failing are dead-lettered for inspection (see
+    utils/moderation_queue.py).
+    """
+
+    POST = "post"
+    COMMENT = "comment"
+    TARGETS = [
+        (POST, "Post"),
+        (COMMENT, "Comment"),
+    ]
+
+    PENDING = "pending"
+    LEASED = "leased"
+    DEAD = "dead"
+    STATUSES = [
+        (PENDING, "Pending"),
+        (LEASED, "Leased"),
+        (DEAD, "Dead-lettered"),
+    ]
+
+    target = models.CharField(max_length=10, choices=TARGETS)
+    object_id = models.PositiveBigIntegerField()
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    # Claims so far, including the current lease
+    attempts = models.PositiveSmallIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    leased_until = models.DateTimeField(null=True, blank=True)
+    lease_owner = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["pk"]
+        indexes = [
+            models.Index(fields=["status", "run_after"]),
+            models.Index(fields=["target", "object_id"]),
+        ]
+
+    def __str__(self):
+        return f"Moderate {self.target} #{self.object_id} ({self.status})"
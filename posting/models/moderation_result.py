@@ -0,0 +1,29 @@
+from django.db import models
+from django.utils import timezone
+
+
+class ModerationResult(models.Model):
+    """
+    A cached moderation API result, keyed by the hash of the normalized text.
+
+    Identical texts (short stock comments, re-imported reviews, re-moderation
+    runs) reuse the stored result instead of calling the API again. Results
+    are tagged with the moderation model that produced them and expire after
+    MODERATION_CACHE_TTL_DAYS (see utils/moderation_cache.py).
+    """
+
+    content_hash = models.CharField(max_length=64)
+    model_version = models.CharField(max_length=100)
+    # The check_content() result dict
+    result = models.JSONField()
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["content_hash", "model_version"], name="unique_moderation_result"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.content_hash[:12]} ({self.model_version})"
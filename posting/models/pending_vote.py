@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class PendingVote(models.Model):
+    """
+    A buffered vote click waiting to be applied.
+
+    With settings.VOTE_WRITE_BEHIND on, the vote views append one of these
+    instead of writing Vote/CommentVote rows and post counters, so a burst of
+    votes on one post doesn't serialize on its rows. `python manage.py
+    flush_votes` applies them in bulk (see utils/vote_buffer.py).
+    """
+
+    POST = "post"
+    COMMENT = "comment"
+    TARGETS = [
+        (POST, "Post"),
+        (COMMENT, "Comment"),
+    ]
+
+    UPVOTE = "UPVOTE"
+    DOWNVOTE = "DOWNVOTE"
+    VOTE_TYPES = [
+        (UPVOTE, "Upvote"),
+        (DOWNVOTE, "Downvote"),
+    ]
+
+    target = models.CharField(max_length=10, choices=TARGETS)
+    object_id = models.PositiveBigIntegerField()
+    voter = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="pending_votes",
+    )
+    # The button clicked; like a synchronous vote it toggles the voter's state
+    vote_type = models.CharField(max_length=10, choices=VOTE_TYPES)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["pk"]
+        indexes = [
+            models.Index(fields=["voter", "target", "object_id"]),
+        ]
+
+    def __str__(self):
+        return f"{self.voter_id} clicked {self.vote_type.lower()} on {self.target} #{self.object_id}"
@@ -1,62 +1,155 @@
+from datetime import timedelta
+
 from django.conf import settings
-from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
+from django.db.models import F
 from django.utils import timezone
 
 from .tag import Tag
 
+# Votes and comments newer than this count towards a post's trending score
+TRENDING_WINDOW = timedelta(hours=24)
 
 
 class PostManager(models.Manager):
     def get_trending_posts(self, queryset):
         """
-        Annotate and sort queryset by trending score.
-        Algorithm: (recent_votes * 2 + recent_comments) / (age_hours + 2)
+        Sort queryset by the stored trending score.
+
+        Scores are precomputed by refresh_trending_scores(), so this is a
+        plain indexed ORDER BY rather than a per-request aggregation.
+        """
+        return queryset.order_by('-trending_score', '-created_at')
+
+    def refresh_trending_scores(self, now=None):
+        """
+        Recompute the stored trending_score for posts whose score can change.
+
+        Algorithm: (recent_votes * 2 + recent_comments) / (age_hours + 2),
+        counting activity inside TRENDING_WINDOW. Only posts with votes or
+        comments in the window are rescanned, plus any post still holding a
+        nonzero score so it decays back to zero - so the cost follows recent
+        activity, not the size of the votes table.
+
+        Returns the number of posts whose score was rewritten.
+        """
+        from django.db.models import Count
+
+        from .comment import Comment
+        from .vote import Vote
+
+        now = now or timezone.now()
+        window_start = now - TRENDING_WINDOW
+
+        recent_votes = dict(
+            Vote.objects.filter(created_at__gte=window_start)
+            .values("post")
+            .annotate(cnt=Count("id"))
+            .values_list("post", "cnt")
+        )
+        recent_comments = dict(
+            Comment.objects.filter(created_at__gte=window_start, is_deleted=False)
+            .values("post")
+            .annotate(cnt=Count("id"))
+            .values_list("post", "cnt")
+        )
+        active_ids = set(recent_votes) | set(recent_comments)
+
+        # Posts that dropped out of the window keep a stale score until zeroed
+        decayed = (
+            self.filter(trending_score__gt=0)
+            .exclude(pk__in=active_ids)
+            .update(trending_score=0.0)
+        )
+
+        posts = list(self.filter(pk__in=active_ids).only("pk", "created_at"))
+        for post in posts:
+            age_hours = max((now - post.created_at).total_seconds() / 3600.0, 0.0)
+            activity = recent_votes.get(post.pk, 0) * 2.0 + recent_comments.get(post.pk, 0)
+            post.trending_score = activity / (age_hours + 2.0)
+        self.bulk_update(posts, ["trending_score"], batch_size=500)
+
+        return decayed + len(posts)
+
+    def apply_vote_change(self, post_id, old_type=None, new_type=None):
+        """
+        Atomically move a post's stored vote counters from old_type to new_type.
+
+        Pass old_type=None for a new vote and new_type=None for a removed one.
+        Uses F() expressions so concurrent votes never overwrite each other.
+        """
+        upvotes = (new_type == "UPVOTE") - (old_type == "UPVOTE")
+        downvotes = (new_type == "DOWNVOTE") - (old_type == "DOWNVOTE")
+        return self.apply_vote_deltas(post_id, upvotes, downvotes)
+
+    def apply_vote_deltas(self, post_id, upvotes, downvotes):
+        """Atomically shift a post's stored vote counters by the given deltas."""
+        if not upvotes and not downvotes:
+            return 0
+        return self.filter(pk=post_id).update(
+            upvotes_count=F("upvotes_count") + upvotes,
+            downvotes_count=F("downvotes_count") + downvotes,
+            score=F("score") + (upvotes - downvotes),
+            render_version=F("render_version") + 1,
+        )
+
+    def apply_comment_change(self, post_id, delta):
+        """
+        Record a change to one of the post's comments.
+
+        Atomically shifts the stored visible comment count by delta and bumps
+        render_version, since any comment edit shows up in the post's card.
         """
-        from django.db import connection
-        from django.db.models import Count, Q, F, ExpressionWrapper, FloatField, Value
-        from django.db.models.functions import Extract
-        from datetime import timedelta
-
-        now = timezone.now()
-        hours_ago_24 = now - timedelta(hours=24)
-
-        # Annotate with recent activity counts first
-        queryset = queryset.annotate(
-            recent_votes=Count('votes', filter=Q(votes__created_at__gte=hours_ago_24)),
-            recent_comments=Count('comments', filter=Q(comments__created_at__gte=hours_ago_24, comments__is_deleted=False))
+        return self.filter(pk=post_id).update(
+            visible_comments_count=F("visible_comments_count") + delta,
+            render_version=F("render_version") + 1,
         )
 
-        # Calculate age in hours - use database-specific approach
-        if 'postgresql' in connection.vendor:
-            # PostgreSQL: Extract epoch from datetime difference
-            queryset = queryset.annotate(
-                age_hours=ExpressionWrapper(
-                    Extract(now - F('created_at'), 'epoch') / 3600.0,
-                    output_field=FloatField()
-                )
-            )
-        elif 'sqlite' in connection.vendor:
-            # SQLite: Use julianday for date difference calculation
-            # Calculate hours using (julianday('now') - julianday(created_at)) * 24
-            queryset = queryset.extra(
-                select={'age_hours': "(julianday('now') - julianday(posting_post.created_at)) * 24"}
-            )
-        else:
-            # Fallback: calculate age using Extract with epoch
-            queryset = queryset.annotate(
-                age_hours=ExpressionWrapper(
-                    (Extract(Value(now), 'epoch') - Extract(F('created_at'), 'epoch')) / 3600.0,
-                    output_field=FloatField()
-                )
-            )
-
-        # Calculate trending score
+    def bump_render_version(self, post_id):
+        """Invalidate the post's cached feed card (see utils/fragment_cache.py)."""
+        return self.filter(pk=post_id).update(render_version=F("render_version") + 1)
+
+    def with_actual_counters(self, queryset=None):
+        """
+        Annotate posts with counters recomputed from the votes and comments tables.
+
+        Adds actual_upvotes, actual_downvotes and actual_comments so callers
+        can compare them against the stored columns.
+        """
+        from .comment import Comment
+        from .vote import Vote
+
+        if queryset is None:
+            queryset = self.get_queryset()
         return queryset.annotate(
-            trending_score=ExpressionWrapper(
-                (F('recent_votes') * 2.0 + F('recent_comments') * 1.0) / (F('age_hours') + 2.0),
-                output_field=FloatField()
-            )
-        ).order_by('-trending_score', '-created_at')
+            actual_upvotes=_related_count(Vote, vote_type=Vote.UPVOTE),
+            actual_downvotes=_related_count(Vote, vote_type=Vote.DOWNVOTE),
+            actual_comments=_related_count(Comment, is_deleted=False),
+        )
+
+    def refresh_comment_count(self, post_id):
+        """Recompute one post's visible comment count from the comments table."""
+        from .comment import Comment
+
+        return self.filter(pk=post_id).update(
+            visible_comments_count=_related_count(Comment, is_deleted=False),
+            render_version=F("render_version") + 1,
+        )
+
+
+def _related_count(model, **filters):
+    """Correlated COUNT subquery over rows of `model` pointing at the outer post."""
+    from django.db.models import Count, IntegerField, OuterRef, Subquery
+    from django.db.models.functions import Coalesce
+
+    subquery = (
+        model.objects.filter(post=OuterRef("pk"), **filters)
+        .values("post")
+        .annotate(cnt=Count("id"))
+        .values("cnt")
+    )
+    return Coalesce(Subquery(subquery, output_field=IntegerField()), 0)
 
 
 class Post(models.Model):
@@ -92,20 +185,94 @@ class Post(models.Model):
         default=False, help_text="Show mental health resources (self-harm detected)"
     )
 
+    # Denormalized counters, kept in step by the Vote and Comment write paths.
+    # Run `python manage.py reconcile_post_counters` to repair any drift.
+    upvotes_count = models.IntegerField(default=0)
+    downvotes_count = models.IntegerField(default=0)
+    score = models.IntegerField(default=0, help_text="Upvotes minus downvotes")
+    trending_score = models.FloatField(
+        default=0.0, help_text="Precomputed by refresh_trending_scores()"
+    )
+    visible_comments_count = models.IntegerField(
+        default=0, help_text="Number of comments that are not soft-deleted"
+    )
+
+    # Bumped by every write that changes how the post's feed card renders
+    # (edits, moderation, votes, comments); part of the card's cache key
+    render_version = models.PositiveIntegerField(default=0, editable=False)
+
+    # Weighted title/body/comments document (PostgreSQL only; SQLite uses an
+    # FTS5 table instead). Maintained by posting.utils.search.index_post().
+    search_vector = SearchVectorField(null=True, editable=False)
+
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-created_at"]
         indexes = [
+            models.Index(fields=["is_hidden", "-created_at"]),
+            models.Index(fields=["is_hidden", "-score", "-created_at"]),
+            models.Index(fields=["is_hidden", "-trending_score", "-created_at"]),
             models.Index(fields=["is_flagged", "-created_at"]),
             models.Index(fields=["is_flagged", "-ai_severity_score", "-created_at"]),
             models.Index(fields=["ai_flagged"]),
         ]
 
+    # Written only by F() updates (and refresh_trending_scores()), never by a full save()
+    COUNTER_FIELDS = frozenset({
+        "upvotes_count",
+        "downvotes_count",
+        "score",
+        "trending_score",
+        "visible_comments_count",
+        "render_version",
+    })
+
     def __str__(self) -> str:
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the stored visibility so tag post counts can follow changes."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_is_hidden = instance.__dict__.get("is_hidden")
+        return instance
+
+    def save(self, *args, **kwargs):
+        """
+        Save the post and refresh its search document if the text may have changed.
+
+        Changed text is also checked against the crisis lexicon, which can
+        turn on show_crisis_resources and is_flagged. Updates also bump
+        render_version so cached feed cards are re-rendered.
+
+        A full save of an existing post (admin or form edits) leaves out the
+        COUNTER_FIELDS, so stale in-memory counters can't overwrite concurrent
+        F() updates; save them with update_fields or queryset.update().
+        """
+        from ..utils.crisis_lexicon import apply_lexicon
+        from ..utils.search import index_post
+
+        adding = self._state.adding
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None and not adding and not kwargs.get("force_insert"):
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        if update_fields is None or {"title", "body"} & set(update_fields):
+            flagged = apply_lexicon(self, f"{self.title}\n\n{self.body}")
+            if update_fields is not None and flagged:
+                kwargs["update_fields"] = update_fields = [*update_fields, *flagged]
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if not adding:
+                type(self).objects.bump_render_version(self.pk)
+            if update_fields is None or {"title", "body"} & set(update_fields):
+                index_post(self.pk)
+
     def get_upvotes_count(self):
         """Return the number of upvotes for this post."""
         return self.votes.filter(vote_type="UPVOTE").count()
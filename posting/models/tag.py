@@ -1,5 +1,36 @@
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+
+
+class TagManager(models.Manager):
+    def adjust_visible_counts(self, tag_ids, delta):
+        """
+        Atomically shift the stored visible post count of the given tags.
+
+        Uses an F() expression so concurrent retagging never loses updates,
+        and drops the cached tag sidebar once the transaction commits.
+        """
+        tag_ids = list(tag_ids)
+        if not tag_ids or not delta:
+            return 0
+        from ..utils.tag_sidebar import invalidate_tag_sidebar
+
+        updated = self.filter(pk__in=tag_ids).update(
+            visible_posts_count=F("visible_posts_count") + delta
+        )
+        transaction.on_commit(invalidate_tag_sidebar)
+        return updated
+
+    def with_actual_counts(self, queryset=None):
+        """Annotate tags with actual_visible_posts recomputed from the post links."""
+        from django.db.models import Count, Q
+
+        if queryset is None:
+            queryset = self.get_queryset()
+        return queryset.annotate(
+            actual_visible_posts=Count("posts", filter=Q(posts__is_hidden=False))
+        )
 
 
 class Tag(models.Model):
@@ -13,6 +44,14 @@ class Tag(models.Model):
 
     name = models.CharField(max_length=50, unique=True)
     slug = models.SlugField(unique=True)
+    # Number of non-hidden posts with this tag, kept in step by posting.signals.
+    # Run `python manage.py reconcile_post_counters` to repair any drift.
+    visible_posts_count = models.IntegerField(default=0, editable=False)
+
+    objects = TagManager()
+
+    # Written only by F() updates (and reconcile_post_counters), never by a full save()
+    COUNTER_FIELDS = frozenset({"visible_posts_count"})
 
     class Meta:
         ordering = ["name"]
@@ -32,7 +71,20 @@ class Tag(models.Model):
                 raise ValidationError({"name": "Tag name must be at least 2 characters."})
 
     def save(self, *args, **kwargs):
-        """Save with validation."""
+        """
+        Save with validation.
+
+        A full save of an existing tag (admin edits) leaves out the
+        COUNTER_FIELDS, so a stale in-memory count can't overwrite
+        concurrent F() updates from TagManager.adjust_visible_counts().
+        """
         self.full_clean()
+        adding = self._state.adding
+        if kwargs.get("update_fields") is None and not adding and not kwargs.get("force_insert"):
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
         super().save(*args, **kwargs)
 
@@ -1,5 +1,5 @@
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 
 from .post import Post
 
@@ -29,8 +29,32 @@ class Vote(models.Model):
         unique_together = ("post", "voter")
         indexes = [
             models.Index(fields=["post", "vote_type"]),
+            models.Index(fields=["created_at"]),
         ]
 
     def __str__(self):
         return f"{self.voter.username} {self.vote_type.lower()}d {self.post.title}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the stored vote type so save() can adjust post counters."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_vote_type = instance.__dict__.get("vote_type")
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Save the vote and update the post's stored counters in one transaction."""
+        old_type = None if self._state.adding else getattr(self, "_loaded_vote_type", None)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            Post.objects.apply_vote_change(self.post_id, old_type, self.vote_type)
+        self._loaded_vote_type = self.vote_type
+
+    def delete(self, *args, **kwargs):
+        """Delete the vote and take it back out of the post's stored counters."""
+        old_type = getattr(self, "_loaded_vote_type", self.vote_type)
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            Post.objects.apply_vote_change(self.post_id, old_type, None)
+        return result
+
@@ -0,0 +1,35 @@
+from django.db import models
+
+
+class VoteCounterShard(models.Model):
+    """
+    One of a post's vote counter shards.
+
+    With settings.VOTE_COUNTER_SHARDS set, votes add their counter changes
+    to a randomly chosen shard row instead of the post row, so concurrent
+    votes on a viral post spread over several rows rather than queueing on
+    one. A post's counts are its stored counters plus the sum of its shards;
+    `python manage.py flush_votes` folds the shards back into the post (see
+    utils/counter_shards.py).
+    """
+
+    post = models.ForeignKey(
+        "posting.Post",
+        on_delete=models.CASCADE,
+        related_name="counter_shards",
+    )
+    shard = models.PositiveSmallIntegerField()
+    # Changes not yet folded into the post's counters
+    upvotes = models.IntegerField(default=0)
+    downvotes = models.IntegerField(default=0)
+    # Votes recorded since the last fold, including comment votes (which
+    # change no counters but do change the post's card)
+    changes = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["post", "shard"], name="unique_post_counter_shard"),
+        ]
+
+    def __str__(self):
+        return f"Post #{self.post_id} shard {self.shard}: +{self.upvotes}/-{self.downvotes}"
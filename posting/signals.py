@@ -0,0 +1,157 @@
+"""
+Signal handlers for state derived from posts and tags.
+
+- Tag.visible_posts_count follows tags being added to or removed from
+  posts, and posts being hidden, unhidden or deleted. Signals catch every
+  write path, including m2m add/set/clear and cascaded deletes.
+- The in-memory suggestion index applies the same changes after the
+  surrounding transaction commits, so a rolled-back write never reaches
+  it. Only an index this process has already built is touched; a process
+  that hasn't built one yet reads fresh data when it first needs it.
+- Cached feed pages are invalidated by changes to which posts the feed
+  lists or what they say: posts created, edited, hidden or deleted, comments
+  edited or deleted, and tag changes. Votes and new comments only shift
+  scores and counts, which FEED_PAGE_CACHE_SECONDS lets catch up.
+- The crisis lexicon is reloaded after its terms change.
+"""
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import Comment, LexiconTerm, Post, Tag
+from .utils.crisis_lexicon import invalidate_lexicon
+from .utils.feed_cache import invalidate_feed_pages
+from .utils.suggestion_index import peek_suggestion_index
+from .utils.tag_sidebar import invalidate_tag_sidebar
+
+
+def _on_commit(callback):
+    """Run callback after commit if this process has a suggestion index."""
+    if peek_suggestion_index() is not None:
+        transaction.on_commit(lambda: callback(peek_suggestion_index()))
+
+
+def _was_hidden(post):
+    """The post's visibility as last stored, ignoring unsaved changes."""
+    return getattr(post, "_loaded_is_hidden", post.is_hidden)
+
+
+def _apply_tag_counts(counts, sign):
+    """Shift visible post counts by sign * n for each {tag_id: n}."""
+    by_delta = defaultdict(list)
+    for tag_id, n in counts.items():
+        if n:
+            by_delta[sign * n].append(tag_id)
+    for delta, tag_ids in by_delta.items():
+        Tag.objects.adjust_visible_counts(tag_ids, delta)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(m2m_changed, sender=Post.tags.through)
+def feed_changed(sender, created=False, **kwargs):
+    """Invalidate cached feed pages after commit, except for new comments."""
+    if (sender is Comment and created) or kwargs.get("action", "").startswith("pre_"):
+        return
+    transaction.on_commit(invalidate_feed_pages)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    """Follow visibility changes in tag counts and index the post's title."""
+    visibility_changed = not created and _was_hidden(instance) != instance.is_hidden
+    tag_ids = []
+    if visibility_changed:
+        tag_ids = list(instance.tags.values_list("pk", flat=True))
+        Tag.objects.adjust_visible_counts(tag_ids, -1 if instance.is_hidden else 1)
+    instance._loaded_is_hidden = instance.is_hidden
+
+    def update(index):
+        index.update_post(instance)
+        index.update_tags(tag_ids)
+
+    _on_commit(update)
+
+
+@receiver(pre_delete, sender=Post)
+def remember_deleted_post_tags(sender, instance, **kwargs):
+    """Capture the post's tags before the cascade removes the links."""
+    instance._deleted_tag_ids = list(instance.tags.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    """Uncount a deleted visible post from its tags and drop its title."""
+    tag_ids = getattr(instance, "_deleted_tag_ids", [])
+    if not _was_hidden(instance):
+        Tag.objects.adjust_visible_counts(tag_ids, -1)
+
+    def update(index):
+        index.remove_post(instance.pk)
+        index.update_tags(tag_ids)
+
+    _on_commit(update)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def tag_changed(sender, instance, **kwargs):
+    """Refresh (or drop) a renamed or deleted tag."""
+    transaction.on_commit(invalidate_tag_sidebar)
+    _on_commit(lambda index: index.update_tags([instance.pk]))
+
+
+def _visible_links(instance, reverse, pk_set, existing):
+    """
+    Return {tag_id: visible posts} for the links an m2m_changed signal names.
+
+    With existing=True only links currently stored are counted (remove and
+    clear are sent for the ids passed in, linked or not); pk_set=None means
+    all of the instance's links.
+    """
+    if reverse:
+        posts = instance.posts.all() if existing else Post.objects.filter(pk__in=pk_set)
+        if existing and pk_set is not None:
+            posts = posts.filter(pk__in=pk_set)
+        return {instance.pk: posts.filter(is_hidden=False).count()}
+
+    if _was_hidden(instance):
+        return {}
+    if not existing:
+        return dict.fromkeys(pk_set, 1)
+    tags = instance.tags.all()
+    if pk_set is not None:
+        tags = tags.filter(pk__in=pk_set)
+    return dict.fromkeys(tags.values_list("pk", flat=True), 1)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def post_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Count links added to or removed from the post-tag relation."""
+    if action in ("pre_remove", "pre_clear"):
+        # Removed links are gone by the post_ signal, so count them now
+        instance._removed_tag_links = _visible_links(instance, reverse, pk_set, existing=True)
+        return
+    if action == "post_add":
+        counts, sign = _visible_links(instance, reverse, pk_set, existing=False), 1
+    elif action in ("post_remove", "post_clear"):
+        counts, sign = getattr(instance, "_removed_tag_links", {}), -1
+    else:
+        return
+
+    _apply_tag_counts(counts, sign)
+    _on_commit(lambda index: index.update_tags(counts))
+
+
+@receiver(post_save, sender=LexiconTerm)
+@receiver(post_delete, sender=LexiconTerm)
+def lexicon_changed(sender, **kwargs):
+    """Reload this process's crisis lexicon (other processes notice within seconds)."""
+    transaction.on_commit(invalidate_lexicon)
@@ -1,4 +1,7 @@
 from django import template
+from django.utils.safestring import mark_safe
+
+from ..utils.fragment_cache import owner_block, vote_marker
 
 register = template.Library()
 
@@ -11,6 +14,21 @@ def get_item(dictionary, key):
     return dictionary.get(key)
 
 
+@register.simple_tag(takes_context=True)
+def cursor_query(context, direction, cursor):
+    """
+    Build the feed query string for a cursor link.
+
+    Keeps the current filters (q, tag, sort, ...) and swaps any existing
+    page cursor for `direction` ("after" or "before").
+    """
+    params = context["request"].GET.copy()
+    for key in ("after", "before", "page"):
+        params.pop(key, None)
+    params[direction] = cursor
+    return f"?{params.urlencode()}"
+
+
 @register.filter
 def smart_date(value):
     """
@@ -31,3 +49,39 @@ def smart_date(value):
     else:
         # Format: Dec 06, 23:45 (No seconds)
         return value.strftime("%b %d, %H:%M")
+
+
+@register.simple_tag
+def viewer_vote_class(kind, pk, vote_type):
+    """
+    "active" class of a vote button, resolved per viewer.
+
+    Renders a marker that apply_viewer_state() replaces, so the surrounding
+    HTML can be cached and shared (see utils/fragment_cache.py).
+    """
+    return mark_safe(vote_marker(kind, pk, vote_type))
+
+
+class OwnerOnlyNode(template.Node):
+    def __init__(self, author_id, nodelist):
+        self.author_id = author_id
+        self.nodelist = nodelist
+
+    def render(self, context):
+        return owner_block(self.author_id.resolve(context), self.nodelist.render(context))
+
+
+@register.tag
+def owneronly(parser, token):
+    """
+    {% owneronly author_id %}...{% endowneronly %}
+
+    Content shown only to the given author and staff; resolved per viewer
+    by apply_viewer_state() like viewer_vote_class.
+    """
+    bits = token.split_contents()
+    if len(bits) != 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' takes one argument: the author id")
+    nodelist = parser.parse(("endowneronly",))
+    parser.delete_first_token()
+    return OwnerOnlyNode(parser.compile_filter(bits[1]), nodelist)
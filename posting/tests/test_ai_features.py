@@ -1,19 +1,66 @@
 """Tests for AI moderation and tag suggestion features."""
 
 import json
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
 from unittest.mock import MagicMock, patch
 
+import numpy as np
 from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
 from django.test import TestCase, override_settings
 from django.urls import reverse
-
-from posting.models import Post, Tag
-from posting.utils.ai_moderator import AIContentModerator, get_moderator
+from django.utils import timezone
+
+from posting.models import (
+    BackfillCheckpoint,
+    Comment,
+    LexiconTerm,
+    ModerationJob,
+    ModerationResult,
+    Post,
+    Tag,
+)
+from posting.utils.ai_moderator import AIContentModerator, get_moderator, run_moderation_async
+from posting.utils import crisis_lexicon
+from posting.utils.crisis_lexicon import ABUSE, CRISIS, Lexicon, get_lexicon, invalidate_lexicon
+from posting.utils.fake_moderation import FakeModerationClient, FakeModerationTimeout
+from posting.utils.moderation_batcher import ModerationBatcher
+from posting.utils import moderation_preclassifier
+from posting.utils.moderation_cache import ModerationCache, purge_expired
+from posting.utils.moderation_executor import ModerationExecutor
+from posting.utils.moderation_queue import (
+    MAX_ATTEMPTS,
+    claim_jobs,
+    enqueue_moderation,
+    moderate_job_now,
+    moderation_text,
+    process_moderation_jobs,
+    requeue_dead_jobs,
+)
+from posting.utils.moderation_resilience import (
+    CLOSED,
+    OPEN,
+    CircuitBreaker,
+    ModerationUnavailable,
+    ResilientCaller,
+)
+from posting.utils.remoderation import remoderate, reset_checkpoint
+from posting.utils import tag_suggester
 from posting.utils.tag_suggester import TagSuggester, get_suggester
 
 User = get_user_model()
 
 
+# Simulated API failures reach the job queue and cache instead of being
+# retried by the client (see ResilienceTests for the client's retries)
+no_client_retries = override_settings(MODERATION_MAX_RETRIES=0)
+
+
 class AIContentModeratorTests(TestCase):
     """Tests for AIContentModerator class."""
 
@@ -103,6 +150,12 @@ class TagSuggesterTests(TestCase):
 
     def setUp(self):
         """Set up test data."""
+        # No saved model unless a test builds one
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.model_dir = tmpdir.name
+        self.enterContext(override_settings(TAG_MODEL_DIR=self.model_dir))
+
         self.user = User.objects.create_user(
             username="testuser",
             email="test@yale.edu",
@@ -172,6 +225,129 @@ class TagSuggesterTests(TestCase):
         # After refresh and retrain, should have tags
         self.assertTrue(len(suggester.tags) >= 0)
 
+    def _fresh_suggester_without_training(self):
+        suggester = TagSuggester()
+        suggester._initialized = False
+        suggester.__init__()
+        return suggester
+
+    def _fresh_suggester(self):
+        suggester = self._fresh_suggester_without_training()
+        suggester.train()
+        return suggester
+
+    def test_update_adds_new_posts_without_refit(self):
+        """Posts tagged after training are picked up by update()."""
+        suggester = self._fresh_suggester()
+        self.assertNotIn("Academics", suggester.suggest("Organic chemistry midterm", "Curve on the exam"))
+        fitted_at = suggester._fitted_at
+
+        post = Post.objects.create(
+            title="Organic chemistry midterm",
+            body="Anyone know the curve on the exam?",
+            author=self.user,
+        )
+        post.tags.add(self.academics_tag)
+        self.assertEqual(suggester.update(), 1)
+        self.assertEqual(suggester.update(), 0)
+
+        self.assertEqual(suggester._fitted_at, fitted_at)
+        self.assertEqual(
+            suggester.suggest("Organic chemistry midterm", "Curve on the exam")[0], "Academics"
+        )
+
+    def test_update_adds_new_tags(self):
+        """A tag created after training gets a row once it has a post."""
+        suggester = self._fresh_suggester()
+        tag = Tag.objects.create(name="Housing", slug="housing")
+        post = Post.objects.create(title="Sublet near campus", body="Summer sublet available", author=self.user)
+        post.tags.add(tag)
+
+        suggester.update()
+
+        self.assertIn("Housing", suggester.tags)
+        self.assertIn("Housing", suggester.suggest("Sublet for the summer", "near campus"))
+
+    def test_refresh_drops_hidden_posts(self):
+        """A full re-fit leaves out posts hidden since they were added."""
+        post = Post.objects.create(title="Organic chemistry midterm", body="Exam curve", author=self.user)
+        post.tags.add(self.academics_tag)
+        suggester = self._fresh_suggester()
+        self.assertIn("Academics", suggester.suggest("Organic chemistry midterm", "Exam curve"))
+
+        Post.objects.filter(pk=post.pk).update(is_hidden=True)
+        suggester.refresh()
+
+        self.assertNotIn("Academics", suggester.suggest("Organic chemistry midterm", "Exam curve"))
+
+    def test_build_tag_model_saves_version_that_loads_memory_mapped(self):
+        """build_tag_model writes a version that another process maps instead of training."""
+        trained = self._fresh_suggester()
+        expected = trained.suggest("Python machine learning", "neural network code")
+        out = StringIO()
+        call_command("build_tag_model", stdout=out)
+        self.assertIn("Saved tag model", out.getvalue())
+
+        suggester = self._fresh_suggester_without_training()
+        with patch.object(TagSuggester, "train") as train:
+            self.assertEqual(suggester.suggest("Python machine learning", "neural network code"), expected)
+        train.assert_not_called()
+        self.assertIsNotNone(suggester.version)
+        # Views of the read-only file mapping, not copies
+        self.assertFalse(suggester.tag_vectors.data.flags.writeable)
+        self.assertFalse(suggester.tag_vectors.indices.flags.writeable)
+        self.assertEqual(suggester.tag_vectors.dtype, np.float32)
+
+    def test_loaded_model_applies_new_posts_and_switches_versions(self):
+        """Posts added after a build are applied; a newer build replaces the model."""
+        call_command("build_tag_model", stdout=StringIO())
+        suggester = self._fresh_suggester_without_training()
+        self.assertTrue(suggester.load())
+        self.assertFalse(suggester.load())
+        first = suggester.version
+
+        post = Post.objects.create(title="Organic chemistry midterm", body="Exam curve", author=self.user)
+        post.tags.add(self.academics_tag)
+        self.assertEqual(suggester.update(), 1)
+        self.assertIn("Academics", suggester.suggest("Organic chemistry midterm", "Exam curve"))
+
+        call_command("build_tag_model", stdout=StringIO())
+        suggester._checked_at -= 60
+        suggester.suggest("Organic chemistry midterm", "Exam curve")
+        self.assertNotEqual(suggester.version, first)
+        self.assertEqual(suggester.update(), 0)
+
+    def test_model_built_with_other_vectorizer_settings_rejected(self):
+        """A saved model whose n-grams or stop words differ from the live vectorizer isn't loaded."""
+        call_command("build_tag_model", stdout=StringIO())
+        with open(os.path.join(self.model_dir, tag_suggester.CURRENT_FILE)) as f:
+            version = f.read()
+        meta_path = os.path.join(self.model_dir, version, "meta.json")
+        with open(meta_path) as f:
+            meta = json.load(f)
+        meta["ngram_range"] = [1, 1]
+        with open(meta_path, "w") as f:
+            json.dump(meta, f)
+
+        suggester = self._fresh_suggester_without_training()
+        with self.assertLogs("posting.utils.tag_suggester", "ERROR"):
+            self.assertFalse(suggester.load())
+        self.assertIsNone(suggester.version)
+        # Not retried until a new version is built
+        self.assertFalse(suggester.load())
+
+    def test_build_tag_model_dry_run_and_pruning(self):
+        """--dry-run saves nothing; only the newest versions are kept."""
+        call_command("build_tag_model", "--dry-run", stdout=StringIO())
+        self.assertEqual(os.listdir(self.model_dir), [])
+
+        for _ in range(tag_suggester.KEEP_VERSIONS + 2):
+            call_command("build_tag_model", stdout=StringIO())
+        versions = [name for name in os.listdir(self.model_dir) if name.startswith("v")]
+        self.assertEqual(len(versions), tag_suggester.KEEP_VERSIONS)
+        with open(os.path.join(self.model_dir, tag_suggester.CURRENT_FILE)) as f:
+            self.assertEqual(f.read(), max(versions))
+
 
 class TagSuggestionAPITests(TestCase):
     """Tests for the tag suggestion API endpoint."""
@@ -249,6 +425,7 @@ class TagSuggestionAPITests(TestCase):
         self.assertEqual(response.status_code, 400)
 
 
+@override_settings(MODERATION_CLIENT="fake")
 class PostFormAIModerationTests(TestCase):
     """Tests for AI moderation in post form."""
 
@@ -259,123 +436,839 @@ class PostFormAIModerationTests(TestCase):
             email="test@yale.edu",
             password="testpass123",
         )
-
-    def test_ai_moderation_called_on_save(self):
-        """Test that AI moderation is called when saving a post."""
+        self.client_stub = FakeModerationClient()
+        self.moderator = AIContentModerator(client=self.client_stub)
+
+    def _save_post(self, title, body):
+        from posting.forms import PostForm
+
+        form = PostForm(data={
+            "title": title,
+            "body": body,
+            "is_anonymous": True,
+            "tags_input": "",
+        })
+        self.assertTrue(form.is_valid())
+        return form.save(author=self.user)
+
+    def test_save_queues_post_without_calling_api(self):
+        """Saving a post enqueues a moderation job instead of calling the API."""
         mock_moderator = MagicMock()
-        mock_moderator.check_content.return_value = {
-            "flagged": False,
-            "severity_score": 0.1,
-            "category_scores": {"hate": 0.1},
-            "is_crisis": False,
-        }
-
         with patch("posting.utils.ai_moderator.get_moderator", return_value=mock_moderator):
-            from posting.forms import PostForm
+            post = self._save_post("Test Post", "This is a test post body")
 
-            form = PostForm(data={
-                "title": "Test Post",
-                "body": "This is a test post body",
-                "is_anonymous": True,
-                "tags_input": "",
-            })
+        mock_moderator.check_content.assert_not_called()
+        self.assertTrue(
+            ModerationJob.objects.filter(target=ModerationJob.POST, object_id=post.pk).exists()
+        )
+        self.assertFalse(post.ai_flagged)
+
+    def test_worker_sets_ai_fields(self):
+        """The worker moderates the queued post and auto-flags it for review."""
+        post = self._save_post("Bad Post", "You are an idiot")
+
+        self.assertEqual(process_moderation_jobs(moderator=self.moderator), (1, 0))
+        post.refresh_from_db()
+        self.assertTrue(post.ai_flagged)
+        self.assertTrue(post.is_flagged)
+        self.assertAlmostEqual(post.ai_severity_score, 0.9)
+        self.assertEqual(self.client_stub.calls, [["Bad Post\n\nYou are an idiot"]])
+        self.assertFalse(ModerationJob.objects.exists())
+
+    def test_crisis_check_applied_inline(self):
+        """Crisis keywords show crisis resources before the worker runs."""
+        post = self._save_post("Concerning Post", "I want to die")
+
+        self.assertTrue(Post.objects.get(pk=post.pk).show_crisis_resources)
+        process_moderation_jobs(moderator=self.moderator)
+        post.refresh_from_db()
+        self.assertTrue(post.show_crisis_resources)
+        self.assertTrue(post.ai_flagged)
+
+    @override_settings(MODERATION_CLIENT="openai", OPENAI_API_KEY=None)
+    def test_no_job_without_moderation_client(self):
+        """Nothing is queued when no moderation client is configured."""
+        self._save_post("Test Post", "This is a test post body")
+        self.assertFalse(ModerationJob.objects.exists())
+
+    def test_failed_enqueue_rolls_back_post(self):
+        """The post, its tags and its job are saved together or not at all."""
+        with patch("posting.utils.moderation_queue.enqueue_moderation", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self._save_post("Test Post", "This is a test post body #finals")
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(Tag.objects.filter(slug="finals").exists())
+
+
+@override_settings(MODERATION_CLIENT="fake")
+class CommentFormAIModerationTests(TestCase):
+    """Tests for AI moderation in comment form."""
 
-            self.assertTrue(form.is_valid())
-            post = form.save(author=self.user)
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="test@yale.edu",
+            password="testpass123",
+        )
+        self.post = Post.objects.create(
+            title="Test Post",
+            body="Test body",
+            author=self.user,
+        )
 
-            mock_moderator.check_content.assert_called_once()
-            self.assertFalse(post.ai_flagged)
-            self.assertFalse(post.is_flagged)
+    def test_comment_moderated_by_worker(self):
+        """A saved comment is queued and its AI fields set by the worker."""
+        from posting.forms import CommentForm
 
-    def test_flagged_content_sets_is_flagged(self):
-        """Test that AI-flagged content also sets is_flagged."""
-        mock_moderator = MagicMock()
-        mock_moderator.check_content.return_value = {
-            "flagged": True,
-            "severity_score": 0.9,
-            "category_scores": {"hate": 0.9},
-            "is_crisis": False,
-        }
+        form = CommentForm(
+            data={"body": "What an idiot take", "is_anonymous": True},
+            post=self.post,
+        )
+        self.assertTrue(form.is_valid())
+        comment = form.save(author=self.user)
+        self.assertFalse(comment.ai_flagged)
+        version = Post.objects.get(pk=self.post.pk).render_version
 
-        with patch("posting.utils.ai_moderator.get_moderator", return_value=mock_moderator):
-            from posting.forms import PostForm
+        moderator = AIContentModerator(client=FakeModerationClient())
+        self.assertEqual(process_moderation_jobs(moderator=moderator), (1, 0))
+        comment.refresh_from_db()
+        self.assertTrue(comment.ai_flagged)
+        self.assertTrue(comment.is_flagged)
+        self.assertEqual(Post.objects.get(pk=self.post.pk).render_version, version + 1)
 
-            form = PostForm(data={
-                "title": "Bad Post",
-                "body": "This is problematic content",
-                "is_anonymous": True,
-                "tags_input": "",
-            })
 
-            self.assertTrue(form.is_valid())
-            post = form.save(author=self.user)
+@no_client_retries
+class ModerationQueueTests(TestCase):
+    """Tests for leasing, retries and dead-lettering of moderation jobs."""
 
-            self.assertTrue(post.ai_flagged)
-            self.assertTrue(post.is_flagged)
-            self.assertAlmostEqual(post.ai_severity_score, 0.9)
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="test@yale.edu",
+            password="testpass123",
+        )
+        self.post = Post.objects.create(title="Queued", body="Plain text", author=self.user)
+        enqueue_moderation(ModerationJob.POST, self.post.pk)
+
+    def _make_due(self):
+        ModerationJob.objects.update(run_after=timezone.now())
+
+    def test_enqueue_skips_waiting_duplicates(self):
+        """A post already waiting in the queue is not queued twice."""
+        enqueue_moderation(ModerationJob.POST, self.post.pk)
+        self.assertEqual(ModerationJob.objects.count(), 1)
+
+    def test_failed_job_retried_after_backoff(self):
+        """A failed call schedules a retry instead of losing the job."""
+        moderator = AIContentModerator(client=FakeModerationClient(fail_times=1))
+
+        self.assertEqual(process_moderation_jobs(moderator=moderator), (0, 1))
+        job = ModerationJob.objects.get()
+        self.assertEqual((job.status, job.attempts), (ModerationJob.PENDING, 1))
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertIn("Simulated", job.last_error)
+
+        # Not due yet
+        self.assertEqual(process_moderation_jobs(moderator=moderator), (0, 0))
+        self._make_due()
+        self.assertEqual(process_moderation_jobs(moderator=moderator), (1, 0))
+        self.assertFalse(ModerationJob.objects.exists())
+
+    def test_job_dead_lettered_after_max_attempts(self):
+        """Jobs that keep failing are dead-lettered and can be requeued."""
+        moderator = AIContentModerator(client=FakeModerationClient(fail_times=MAX_ATTEMPTS))
+        for _ in range(MAX_ATTEMPTS):
+            self._make_due()
+            process_moderation_jobs(moderator=moderator)
+
+        job = ModerationJob.objects.get()
+        self.assertEqual((job.status, job.attempts), (ModerationJob.DEAD, MAX_ATTEMPTS))
+        self._make_due()
+        self.assertEqual(process_moderation_jobs(moderator=moderator), (0, 0))
+
+        self.assertEqual(requeue_dead_jobs(), 1)
+        self.assertEqual(process_moderation_jobs(moderator=moderator), (1, 0))
+
+    def test_expired_lease_is_reclaimed(self):
+        """A job leased by a worker that died is picked up once the lease expires."""
+        self.assertEqual(len(claim_jobs("worker-a")), 1)
+        self.assertEqual(claim_jobs("worker-b"), [])
+
+        ModerationJob.objects.update(leased_until=timezone.now() - timedelta(seconds=1))
+        jobs = claim_jobs("worker-b")
+        self.assertEqual([(job.lease_owner, job.attempts) for job in jobs], [("worker-b", 2)])
+
+    def test_job_for_deleted_post_is_dropped(self):
+        """Jobs whose post is gone complete without a moderation call."""
+        client = FakeModerationClient()
+        self.post.delete()
+        process_moderation_jobs(moderator=AIContentModerator(client=client))
+        self.assertFalse(ModerationJob.objects.exists())
+        self.assertEqual(client.calls, [])
+
+    @override_settings(MODERATION_CLIENT="fake")
+    def test_worker_command(self):
+        """The worker command drains the queue."""
+        from posting.utils import ai_moderator
+        ai_moderator._moderator_instance = None
 
-    def test_crisis_content_sets_show_crisis_resources(self):
-        """Test that crisis content sets show_crisis_resources."""
-        mock_moderator = MagicMock()
-        mock_moderator.check_content.return_value = {
-            "flagged": True,
-            "severity_score": 0.8,
-            "category_scores": {"self-harm": 0.8},
-            "is_crisis": True,
-        }
+        out = StringIO()
+        call_command("moderation_worker", stdout=out)
+        self.assertIn("Moderated 1 item(s)", out.getvalue())
+        self.post.refresh_from_db()
+        self.assertIsNotNone(self.post.ai_severity_score)
+        ai_moderator._moderator_instance = None
 
-        with patch("posting.utils.ai_moderator.get_moderator", return_value=mock_moderator):
-            from posting.forms import PostForm
 
-            form = PostForm(data={
-                "title": "Concerning Post",
-                "body": "Content that indicates distress",
-                "is_anonymous": True,
-                "tags_input": "",
-            })
+@no_client_retries
+class ModerationBatchingTests(TestCase):
+    """Tests for sending several texts per moderation API call."""
 
-            self.assertTrue(form.is_valid())
-            post = form.save(author=self.user)
+    def setUp(self):
+        self.client_stub = FakeModerationClient()
+        self.moderator = AIContentModerator(client=self.client_stub)
+
+    def test_check_contents_batches_inputs(self):
+        """Texts are sent MAX_BATCH_INPUTS at a time; short ones are skipped."""
+        texts = [f"comment number {i}" for i in range(40)] + ["ok", "you idiot"]
+        results = self.moderator.check_contents(texts)
+
+        self.assertEqual([len(call) for call in self.client_stub.calls], [32, 9])
+        self.assertEqual(len(results), 42)
+        self.assertFalse(results[40]["flagged"])
+        self.assertTrue(results[41]["flagged"])
+
+    def test_failed_call_marks_each_text(self):
+        """A failed call gives every text in it an error result."""
+        self.client_stub.fail_times = 1
+        results = self.moderator.check_contents(["first text", "second text"])
+        self.assertTrue(all("error" in result for result in results))
+
+    def test_worker_moderates_batch_in_one_call(self):
+        """The worker sends all claimed jobs in a single call."""
+        user = User.objects.create_user(
+            username="testuser",
+            email="test@yale.edu",
+            password="testpass123",
+        )
+        for i in range(5):
+            post = Post.objects.create(title=f"Post {i}", body="Body text", author=user)
+            enqueue_moderation(ModerationJob.POST, post.pk)
+
+        self.assertEqual(process_moderation_jobs(moderator=self.moderator), (5, 0))
+        self.assertEqual(len(self.client_stub.calls), 1)
+        self.assertEqual(Post.objects.filter(ai_severity_score__isnull=False).count(), 5)
+
+    # The collector thread has its own database connection, outside the test transaction
+    @override_settings(MODERATION_CACHE_TTL_DAYS=0)
+    def test_batcher_coalesces_concurrent_callers(self):
+        """Concurrent check_content() calls share one API call and get their own results."""
+        batcher = ModerationBatcher(moderator=self.moderator, max_batch_size=4, max_wait=5)
+        texts = ["nice post", "you idiot", "thanks a lot", "see you there"]
+        results = {}
+
+        def check(text):
+            results[text] = batcher.check_content(text, timeout=10)
+
+        threads = [threading.Thread(target=check, args=(text,)) for text in texts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(self.client_stub.calls), 1)
+        self.assertEqual(batcher.batches_sent, 1)
+        self.assertEqual([text for text in texts if results[text]["flagged"]], ["you idiot"])
+
+    @override_settings(MODERATION_CACHE_TTL_DAYS=0)
+    def test_batcher_releases_connections_around_each_batch(self):
+        """The collector drops stale connections before a batch and closes its own after."""
+        batcher = ModerationBatcher(moderator=self.moderator, max_wait=0)
+        with patch("posting.utils.moderation_batcher.close_old_connections") as close_old, \
+                patch("posting.utils.moderation_batcher.connections") as connections:
+            batcher.check_content("nice post", timeout=10)
+            batcher.check_content("thanks a lot", timeout=10)
+            # The collector closes its connections right after handing out the results
+            for _ in range(100):
+                if connections.close_all.call_count == 2:
+                    break
+                time.sleep(0.01)
+
+        self.assertEqual(close_old.call_count, 2)
+        self.assertEqual(connections.close_all.call_count, 2)
+
+
+@no_client_retries
+class ModerationCacheTests(TestCase):
+    """Tests for reusing moderation results of identical texts."""
 
-            self.assertTrue(post.show_crisis_resources)
+    def setUp(self):
+        self.client_stub = FakeModerationClient()
+        self.moderator = AIContentModerator(client=self.client_stub)
+
+    def test_identical_texts_sent_once(self):
+        """Texts equal after normalization share one API input."""
+        results = self.moderator.check_contents(["Same here", "same  here ", "SAME HERE"])
+        self.assertEqual(self.client_stub.calls, [["Same here"]])
+        self.assertEqual(results[0], results[2])
+
+    def test_repeat_served_without_api_call(self):
+        """Repeats hit the LRU, and other processes hit the stored result."""
+        first = self.moderator.check_content("You are an idiot")
+        self.assertEqual(self.moderator.check_content("you are an idiot"), first)
+        self.assertEqual(len(self.client_stub.calls), 1)
+        self.assertEqual(self.moderator.cache.lru_hits, 1)
+
+        other_client = FakeModerationClient()
+        other = AIContentModerator(client=other_client)
+        self.assertTrue(other.check_content("You are an idiot")["flagged"])
+        self.assertEqual(other_client.calls, [])
+        self.assertEqual(other.cache.db_hits, 1)
+
+    def test_failed_calls_not_cached(self):
+        """An error result is retried on the next call."""
+        self.client_stub.fail_times = 1
+        self.assertIn("error", self.moderator.check_content("retry me please"))
+        self.assertNotIn("error", self.moderator.check_content("retry me please"))
+        self.assertEqual(len(self.client_stub.calls), 2)
+        self.assertEqual(ModerationResult.objects.count(), 1)
+
+    def test_results_scoped_by_model_version_and_ttl(self):
+        """Results from another model version or past the TTL are not reused."""
+        cache = ModerationCache()
+        cache.set_many({"hello world": {"flagged": False}}, "model-a")
+
+        self.assertEqual(ModerationCache().get_many(["hello world"], "model-b"), {})
+        self.assertEqual(len(ModerationCache().get_many(["Hello World"], "model-a")), 1)
+
+        ModerationResult.objects.update(created_at=timezone.now() - timedelta(days=31))
+        cache.clear()
+        self.assertEqual(cache.get_many(["hello world"], "model-a"), {})
+        self.assertEqual(purge_expired(), 1)
+
+    def test_verdict_rederived_from_cached_scores(self):
+        """Only the API's output is stored; severity and crisis follow the current thresholds."""
+        self.moderator.check_content("hello world")
+        stored = ModerationResult.objects.get().result
+        self.assertEqual(set(stored), {"flagged", "categories", "category_scores"})
+
+        # An entry stored with a verdict from older thresholds
+        self.moderator.cache.set_many(
+            {"hello world": {
+                "flagged": False, "categories": {}, "category_scores": {"self-harm/intent": 0.4},
+                "severity_score": 0.0, "is_crisis": False,
+            }},
+            self.moderator.model_version,
+        )
+        result = AIContentModerator(client=self.client_stub).check_content("hello world")
+        self.assertTrue(result["is_crisis"])
+        self.assertEqual(result["severity_score"], 0.4)
+        self.assertEqual(len(self.client_stub.calls), 1)
 
+    @override_settings(MODERATION_CACHE_TTL_DAYS=0)
+    def test_cache_can_be_disabled(self):
+        """With a TTL of 0 every text is sent to the API."""
+        self.moderator.check_content("hello there")
+        self.moderator.check_content("hello there")
+        self.assertEqual(len(self.client_stub.calls), 2)
+        self.assertFalse(ModerationResult.objects.exists())
 
-class CommentFormAIModerationTests(TestCase):
-    """Tests for AI moderation in comment form."""
+
+class PreClassifierTests(TestCase):
+    """Tests for the local pre-classifier that skips the API for benign text."""
+
+    def setUp(self):
+        user = User.objects.create_user(
+            username="testuser",
+            email="test@yale.edu",
+            password="testpass123",
+        )
+        for i in range(20):
+            Post.objects.create(
+                title=f"Rant {i}", body="You idiot, I hate you and your stupid club",
+                author=user, ai_flagged=True, ai_severity_score=0.9,
+            )
+        for i in range(40):
+            Post.objects.create(
+                title=f"Study group {i}", body="Looking for people to review lecture notes with",
+                author=user, ai_severity_score=0.01, ai_categories={"hate": 0.01},
+            )
+        # Moderated by the pre-classifier itself: never used for training
+        Post.objects.create(title="Skipped", body="Not scored", author=user)
+
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, "preclassifier.joblib")
+        self.addCleanup(setattr, moderation_preclassifier, "_classifier_mtime", None)
+        self.addCleanup(setattr, moderation_preclassifier, "_classifier_instance", None)
+
+    def _calibrate(self):
+        out = StringIO()
+        with override_settings(MODERATION_PRECLASSIFIER_PATH=self.path):
+            call_command("calibrate_preclassifier", "--min-samples", "10", stdout=out)
+        return out.getvalue()
+
+    def test_calibrate_reports_and_saves(self):
+        """The command reports recall and skip rate and saves the model."""
+        output = self._calibrate()
+        self.assertIn("Training data: 60 texts, 20 risky", output)
+        self.assertIn("Chosen threshold", output)
+        self.assertTrue(os.path.exists(self.path))
+
+    def test_calibrate_needs_enough_data(self):
+        """Too few moderated texts is an error, not a useless model."""
+        with self.assertRaises(CommandError):
+            call_command("calibrate_preclassifier", "--dry-run", stdout=StringIO())
+
+    def test_on_mode_skips_benign_text(self):
+        """Benign text gets an unscored result; risky and crisis text still reach the API."""
+        self._calibrate()
+        client = FakeModerationClient()
+        moderator = AIContentModerator(client=client)
+        texts = [
+            "Study group: looking for people to review lecture notes with",
+            "I hate you, idiot",
+            "Looking for people, I want to die",
+        ]
+        with override_settings(MODERATION_PRECLASSIFIER="on", MODERATION_PRECLASSIFIER_PATH=self.path):
+            results = moderator.check_contents(texts)
+
+        self.assertEqual(client.calls, [texts[1:]])
+        self.assertTrue(results[0]["skipped"])
+        self.assertIsNone(results[0]["severity_score"])
+        self.assertTrue(results[1]["flagged"])
+        self.assertTrue(results[2]["is_crisis"])
+
+    def test_shadow_mode_sends_everything(self):
+        """Shadow mode calls the API for every text and counts agreement."""
+        self._calibrate()
+        client = FakeModerationClient()
+        moderator = AIContentModerator(client=client)
+        texts = ["Study group: looking for people to review lecture notes with", "I hate you, idiot"]
+        with override_settings(MODERATION_PRECLASSIFIER="shadow", MODERATION_PRECLASSIFIER_PATH=self.path):
+            moderator.check_contents(texts)
+            classifier = moderation_preclassifier.get_preclassifier()
+
+        self.assertEqual(client.calls, [texts])
+        self.assertEqual(classifier.shadow_agreed + classifier.shadow_disagreed, 2)
+
+
+class ResilienceTests(TestCase):
+    """Tests for deadlines, retries, the circuit breaker and the concurrency cap."""
+
+    def setUp(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def _clock(self):
+        return self.now
+
+    def _moderator(self, client, **caller_options):
+        moderator = AIContentModerator(client=client)
+        moderator.caller = ResilientCaller(sleep=self.sleeps.append, **caller_options)
+        return moderator
+
+    def test_transient_errors_retried_with_backoff(self):
+        """Connection errors and 5xx are retried, with jittered backoff, until one succeeds."""
+        client = FakeModerationClient(fail_times=2, status_code=503)
+        moderator = self._moderator(client, max_retries=2)
+
+        result = moderator.check_content("you idiot")
+
+        self.assertNotIn("error", result)
+        self.assertTrue(result["flagged"])
+        self.assertEqual(len(client.calls), 3)
+        self.assertEqual(len(self.sleeps), 2)
+        self.assertTrue(all(0 <= delay <= 0.4 for delay in self.sleeps))
+        self.assertEqual(moderator.caller.stats()["retries"], 2)
+
+    def test_client_errors_not_retried(self):
+        """A 400 is our mistake and fails at once."""
+        client = FakeModerationClient(fail_times=1, status_code=400)
+        result = self._moderator(client, max_retries=2).check_content("hello there")
+        self.assertIn("error", result)
+        self.assertEqual(len(client.calls), 1)
+
+    def test_deadline_bounds_slow_calls(self):
+        """A slow upstream is cut off at the deadline; crisis text is still detected locally."""
+        client = FakeModerationClient(latency=2)
+        moderator = self._moderator(client, deadline=0.1, max_retries=2)
+
+        result = moderator.check_content("I want to die")
+
+        self.assertIn("Simulated timeout", result["error"])
+        self.assertTrue(result["is_crisis"])
+        # No time left for a retry
+        self.assertEqual(len(client.calls), 1)
+        latency = moderator.caller.stats()["latency"]
+        self.assertEqual(latency["samples"], 1)
+        self.assertLess(latency["max"], 1)
+
+    def test_breaker_fails_fast_and_recovers(self):
+        """Once enough calls fail the breaker opens; after the cooldown one probe closes it."""
+        client = FakeModerationClient(fail_times=4)
+        breaker = CircuitBreaker(error_rate=0.5, cooldown=30, min_calls=4, clock=self._clock)
+        moderator = self._moderator(client, max_retries=0, breaker=breaker, clock=self._clock)
+
+        for i in range(4):
+            moderator.check_content(f"failing text {i}")
+        self.assertEqual(breaker.state, OPEN)
+
+        result = moderator.check_content("I want to die")
+        self.assertEqual(len(client.calls), 4)
+        self.assertIn("circuit breaker", result["error"])
+        self.assertTrue(result["is_crisis"])
+        self.assertEqual(moderator.caller.stats()["rejected"], 1)
+
+        self.now += 31
+        self.assertNotIn("error", moderator.check_content("back to normal"))
+        self.assertEqual(breaker.state, CLOSED)
+        self.assertEqual(moderator.caller.stats()["breaker_trips"], 1)
+
+    def test_concurrency_cap(self):
+        """Calls beyond the in-flight cap wait only until their deadline, then fail fast."""
+        caller = ResilientCaller(deadline=0.05, max_in_flight=1)
+        started, release = threading.Event(), threading.Event()
+
+        def hold_slot(timeout):
+            started.set()
+            release.wait(5)
+
+        holder = threading.Thread(target=caller.call, args=(hold_slot,))
+        holder.start()
+        started.wait(5)
+        try:
+            with self.assertRaises(ModerationUnavailable):
+                caller.call(lambda timeout: "never called")
+            self.assertEqual(caller.stats()["in_flight"], 1)
+            self.assertEqual(caller.stats()["saturated"], 1)
+        finally:
+            release.set()
+            holder.join()
+        self.assertEqual(caller.stats()["in_flight"], 0)
+
+    def test_fake_client_timeout(self):
+        """The fake client honours the per-call timeout it is given."""
+        client = FakeModerationClient(latency=1)
+        with self.assertRaises(FakeModerationTimeout):
+            client.moderations.create(input=["text"], timeout=0.01)
+
+    def test_status_endpoint_staff_only(self):
+        """Breaker state and latency are exposed to staff for monitoring."""
+        User.objects.create_user(
+            username="admin", email="admin@yale.edu", password="testpass123", is_staff=True
+        )
+        User.objects.create_user(
+            username="regular", email="regular@yale.edu", password="testpass123"
+        )
+        url = reverse("posting:moderation_status")
+
+        self.client.login(username="regular", password="testpass123")
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.login(username="admin", password="testpass123")
+        data = self.client.get(url).json()
+        self.assertIn(data["client"]["breaker"], (CLOSED, OPEN))
+        self.assertIn("p95", data["client"]["latency"])
+        self.assertEqual(data["queue"], {"pending": 0, "dead": 0})
+
+
+class ModerationExecutorTests(TestCase):
+    """Tests for the bounded background moderation pool."""
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+        self.deferred = []
+
+    def _blocked_executor(self):
+        """An executor with one worker, busy until self.release is set, and a queue of one."""
+        executor = ModerationExecutor(max_workers=1, queue_size=1)
+        started = threading.Event()
+
+        def block():
+            started.set()
+            self.release.wait(5)
+
+        executor.submit(block)
+        started.wait(5)
+        return executor
+
+    def test_full_queue_falls_back(self):
+        """Beyond the queue size, tasks are handed to their fallback instead of a new thread."""
+        executor = self._blocked_executor()
+        self.assertTrue(executor.submit(self.deferred.append, "queued", fallback=lambda: None))
+        self.assertFalse(
+            executor.submit(self.deferred.append, "ran", fallback=lambda: self.deferred.append("fallback"))
+        )
+
+        self.assertEqual(self.deferred, ["fallback"])
+        self.assertEqual(
+            {key: executor.stats()[key] for key in ("queued", "running", "deferred")},
+            {"queued": 1, "running": 1, "deferred": 1},
+        )
+
+        self.release.set()
+        executor.shutdown()
+        self.assertEqual(self.deferred, ["fallback", "queued"])
+        self.assertEqual(executor.stats()["completed"], 2)
+
+    def test_failed_task_counted_and_deferred(self):
+        """A task that raises is counted as failed and its fallback runs."""
+        executor = ModerationExecutor(max_workers=1, queue_size=4)
+
+        def fail():
+            raise RuntimeError("API down")
+
+        executor.submit(fail, fallback=lambda: self.deferred.append("retry later"))
+        executor.shutdown()
+        self.assertEqual(self.deferred, ["retry later"])
+        self.assertEqual(executor.stats()["failed"], 1)
+
+    def test_shutdown_defers_undrained_tasks(self):
+        """Tasks still queued when the drain times out are deferred, and new ones are refused."""
+        executor = self._blocked_executor()
+        executor.submit(lambda: None, fallback=lambda: self.deferred.append("queued"))
+
+        self.assertEqual(executor.shutdown(timeout=0.05), 1)
+        self.assertEqual(self.deferred, ["queued"])
+        self.assertFalse(executor.submit(lambda: None, fallback=lambda: self.deferred.append("late")))
+        self.assertEqual(self.deferred, ["queued", "late"])
+
+    def test_run_moderation_async_leaves_job_to_worker_when_refused(self):
+        """A job the pool can't take stays queued for the moderation worker."""
+        user = User.objects.create_user(
+            username="testuser", email="test@yale.edu", password="testpass123"
+        )
+        post = Post.objects.create(title="Busy", body="Posted during a burst", author=user)
+        job_id = enqueue_moderation(ModerationJob.POST, post.pk)
+        executor = ModerationExecutor(max_workers=1, queue_size=1)
+        executor.shutdown()
+
+        with patch("posting.utils.moderation_executor.get_executor", return_value=executor):
+            self.assertFalse(run_moderation_async(job_id))
+
+        job = ModerationJob.objects.get()
+        self.assertEqual((job.pk, job.status), (job_id, ModerationJob.PENDING))
+
+    @override_settings(MODERATION_CLIENT="fake")
+    def test_form_save_hands_job_to_pool_after_commit(self):
+        """A saved post's job is submitted to the pool once the transaction commits."""
+        from posting.forms import PostForm
+
+        user = User.objects.create_user(
+            username="testuser", email="test@yale.edu", password="testpass123"
+        )
+        form = PostForm(data={"title": "Hello", "body": "A new post", "is_anonymous": True, "tags_input": ""})
+        self.assertTrue(form.is_valid())
+        with patch("posting.utils.ai_moderator.run_moderation_async") as run_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                post = form.save(author=user)
+                run_async.assert_not_called()
+
+        job = ModerationJob.objects.get(object_id=post.pk)
+        run_async.assert_called_once_with(job.pk)
+
+    def test_moderate_job_now_writes_like_the_worker(self):
+        """The pool writes results through apply_result: flags are only ever raised."""
+        user = User.objects.create_user(
+            username="testuser", email="test@yale.edu", password="testpass123"
+        )
+        post = Post.objects.create(title="Reported", body="A perfectly nice post", author=user)
+        Post.objects.filter(pk=post.pk).update(is_flagged=True)  # Reported by a user
+        job_id = enqueue_moderation(ModerationJob.POST, post.pk)
+
+        moderate_job_now(job_id, moderator=AIContentModerator(client=FakeModerationClient()))
+
+        post.refresh_from_db()
+        self.assertFalse(post.ai_flagged)
+        self.assertIsNotNone(post.ai_severity_score)
+        self.assertTrue(post.is_flagged)
+        self.assertFalse(ModerationJob.objects.exists())
+        # Already processed: nothing left to claim
+        moderate_job_now(job_id, moderator=AIContentModerator(client=FakeModerationClient()))
+
+
+class RemoderateTests(TestCase):
+    """Tests for re-moderating existing posts and comments."""
 
     def setUp(self):
-        """Set up test data."""
         self.user = User.objects.create_user(
             username="testuser",
             email="test@yale.edu",
             password="testpass123",
         )
-        self.post = Post.objects.create(
-            title="Test Post",
-            body="Test body",
-            author=self.user,
+        self.posts = [
+            Post.objects.create(title=f"Post {i}", body=body, author=self.user)
+            for i, body in enumerate(["You idiot", "Nice day", "Good luck", "Thanks all", "I hate mondays"])
+        ]
+        self.client_stub = FakeModerationClient()
+        self.moderator = AIContentModerator(client=self.client_stub)
+
+    def test_rescores_posts_and_saves_checkpoint(self):
+        """Every post gets fresh AI fields, written in bulk, and the checkpoint reaches the end."""
+        stats = remoderate(ModerationJob.POST, chunk_size=2, workers=1, moderator=self.moderator)
+
+        self.assertEqual((stats["processed"], stats["updated"], stats["failed"]), (5, 5, 0))
+        flagged = Post.objects.filter(ai_flagged=True, is_flagged=True).order_by("pk")
+        self.assertEqual(list(flagged), [self.posts[0], self.posts[4]])
+        self.assertFalse(Post.objects.filter(ai_severity_score__isnull=True).exists())
+        checkpoint = BackfillCheckpoint.objects.get(name="remoderate:post")
+        self.assertEqual((checkpoint.last_pk, checkpoint.processed), (self.posts[-1].pk, 5))
+
+    def test_interrupted_run_resumes(self):
+        """A run stopped after a chunk continues after the checkpoint, not from the start."""
+        def stop(stats):
+            raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            remoderate(ModerationJob.POST, chunk_size=2, workers=1, moderator=self.moderator, progress=stop)
+        self.assertEqual(len(self.client_stub.calls), 1)
+
+        stats = remoderate(ModerationJob.POST, chunk_size=2, workers=1, moderator=self.moderator)
+        self.assertEqual(stats["processed"], 3)
+        sent = [text for call in self.client_stub.calls for text in call]
+        self.assertEqual(len(sent), 5)
+
+    def test_repeat_run_uses_cache(self):
+        """Re-running with an unchanged model re-applies cached results without API calls."""
+        remoderate(ModerationJob.POST, workers=1, moderator=self.moderator)
+        calls = len(self.client_stub.calls)
+
+        # Nothing left after the checkpoint until it is reset
+        self.assertEqual(remoderate(ModerationJob.POST, moderator=self.moderator)["processed"], 0)
+        reset_checkpoint(ModerationJob.POST)
+        stats = remoderate(ModerationJob.POST, workers=1, moderator=self.moderator)
+        self.assertEqual((stats["cache_hits"], stats["updated"]), (5, 0))
+        self.assertEqual(len(self.client_stub.calls), calls)
+
+    def test_cached_scores_rejudged_and_manual_flags_kept(self):
+        """Cached texts get the current thresholds, and unflagged results keep user reports."""
+        post = self.posts[1]
+        Post.objects.filter(pk=post.pk).update(is_flagged=True)  # Reported by a user
+        self.moderator.cache.set_many(
+            {moderation_text(ModerationJob.POST, post): {
+                "flagged": False, "categories": {}, "category_scores": {"violence": 0.6},
+                "severity_score": 0.6, "is_crisis": False,
+            }},
+            self.moderator.model_version,
         )
 
-    def test_ai_moderation_called_on_comment_save(self):
-        """Test that AI moderation is called when saving a comment."""
-        mock_moderator = MagicMock()
-        mock_moderator.check_content.return_value = {
-            "flagged": False,
-            "severity_score": 0.05,
-            "category_scores": {},
-            "is_crisis": False,
-        }
+        remoderate(ModerationJob.POST, workers=1, moderator=self.moderator)
 
-        with patch("posting.utils.ai_moderator.get_moderator", return_value=mock_moderator):
-            from posting.forms import CommentForm
+        post.refresh_from_db()
+        self.assertTrue(post.show_crisis_resources)
+        self.assertFalse(post.ai_flagged)
+        self.assertTrue(post.is_flagged)
+
+    def test_comments_bump_post_render_version(self):
+        """Re-moderated comments invalidate their post's cached feed card."""
+        post = self.posts[1]
+        Comment.objects.create(post=post, author=self.user, body="You idiot")
+        version = Post.objects.get(pk=post.pk).render_version
+
+        stats = remoderate(ModerationJob.COMMENT, workers=1, moderator=self.moderator)
+
+        self.assertEqual(stats["updated"], 1)
+        self.assertTrue(Comment.objects.get().ai_flagged)
+        self.assertEqual(Post.objects.get(pk=post.pk).render_version, version + 1)
+
+    # Pool threads have their own database connections, outside the test transaction
+    @override_settings(MODERATION_CACHE_TTL_DAYS=0, MODERATION_CLIENT="fake")
+    def test_command_with_workers(self):
+        """The command moderates concurrently and reports throughput."""
+        from posting.utils import ai_moderator
+        ai_moderator._moderator_instance = None
+        self.addCleanup(setattr, ai_moderator, "_moderator_instance", None)
+
+        out = StringIO()
+        call_command(
+            "remoderate", "--target", "posts", "--batch-size", "64", "--workers", "2",
+            "--rate", "100", stdout=out,
+        )
+        self.assertIn("Re-moderated 5 post(s)", out.getvalue())
+        self.assertIn("/s", out.getvalue())
+        self.assertEqual(Post.objects.filter(ai_flagged=True).count(), 2)
 
-            form = CommentForm(
-                data={"body": "This is a test comment", "is_anonymous": True},
-                post=self.post,
-            )
 
-            self.assertTrue(form.is_valid())
-            comment = form.save(author=self.user)
+class CrisisLexiconTests(TestCase):
+    """Tests for the crisis and abuse term engine and its DB lexicon."""
 
-            mock_moderator.check_content.assert_called_once()
-            self.assertFalse(comment.ai_flagged)
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="test@yale.edu",
+            password="testpass123",
+        )
+        invalidate_lexicon()
+        self.addCleanup(invalidate_lexicon)
+
+    def test_builtin_keywords(self):
+        """The built-in crisis keywords match regardless of case."""
+        lexicon = Lexicon()
+        self.assertTrue(lexicon.is_crisis("Honestly I WANT TO DIE"))
+        self.assertEqual(lexicon.scan("thinking about self-harm"), {CRISIS})
+        self.assertFalse(lexicon.is_crisis("This exam is killing me"))
+
+    def test_plain_terms_share_one_alternation(self):
+        """Plain terms match whole words with any whitespace, per category."""
+        lexicon = Lexicon([
+            ("Jump off a bridge", CRISIS, False),
+            ("loser", ABUSE, False),
+            ("losers club", ABUSE, False),
+        ])
+        self.assertEqual(lexicon.scan("I might jump  off\na bridge"), {CRISIS})
+        self.assertEqual(lexicon.scan("what a LOSER, jump off a bridge"), {CRISIS, ABUSE})
+        self.assertEqual(lexicon.scan("the losers club meets friday"), {ABUSE})
+        self.assertEqual(lexicon.scan("closer to the bridge"), set())
+
+    def test_plain_terms_with_punctuation_edges(self):
+        """Plain terms starting or ending with a non-word character still match whole words."""
+        lexicon = Lexicon([("kms!", CRISIS, False), ("#sh", CRISIS, False), ("ugh…", ABUSE, False)])
+        self.assertTrue(lexicon.is_crisis("honestly kms! so done"))
+        self.assertTrue(lexicon.is_crisis("tonight #sh again"))
+        self.assertEqual(lexicon.scan("ugh…"), {ABUSE})
+        self.assertFalse(lexicon.is_crisis("my #shopping list"))
+        self.assertFalse(lexicon.is_crisis("bookms! club"))
+
+    def test_invalid_pattern_skipped(self):
+        """A regex term that doesn't compile is left out instead of breaking the check."""
+        lexicon = Lexicon([("(unclosed", ABUSE, True), (r"\bscum\w*", ABUSE, True)])
+        self.assertEqual(lexicon.scan("total scumbag"), {ABUSE})
+        self.assertTrue(lexicon.is_crisis("I want to die"))
+
+    def test_term_changes_reload_and_apply_on_save(self):
+        """Saving a term reloads the lexicon; post and comment saves apply it."""
+        with self.captureOnCommitCallbacks(execute=True):
+            term = LexiconTerm.objects.create(term="nobody would miss me", category=CRISIS)
+            LexiconTerm.objects.create(term="worthless troll", category=ABUSE)
+
+        post = Post.objects.create(title="Late night", body="Nobody would miss me", author=self.user)
+        self.assertTrue(Post.objects.get(pk=post.pk).show_crisis_resources)
+
+        comment = Comment.objects.create(post=post, author=self.user, body="Thanks")
+        comment.body = "you worthless troll"
+        comment.save(update_fields=["body"])
+        self.assertTrue(Comment.objects.get(pk=comment.pk).is_flagged)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            term.is_active = False
+            term.save()
+        self.assertFalse(get_lexicon().is_crisis("Nobody would miss me"))
+
+    def test_other_processes_notice_changes(self):
+        """Without the signal, a change is picked up at the next periodic check."""
+        self.assertFalse(get_lexicon().is_crisis("nobody would miss me"))
+        LexiconTerm.objects.bulk_create([LexiconTerm(term="nobody would miss me")])
+        self.assertFalse(get_lexicon().is_crisis("nobody would miss me"))
+
+        with patch.object(crisis_lexicon, "RELOAD_CHECK_SECONDS", 0):
+            self.assertTrue(get_lexicon().is_crisis("nobody would miss me"))
+
+    def test_benchmark_command(self):
+        """The benchmark reports per-call timings at the comment length limit."""
+        out = StringIO()
+        call_command("benchmark_crisis_check", "--iterations", "3", "--terms", "20", stdout=out)
+        self.assertIn("5000-character texts", out.getvalue())
+        self.assertIn("trie scan", out.getvalue())
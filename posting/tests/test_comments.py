@@ -1,6 +1,10 @@
+from datetime import timedelta
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
+from django.utils import timezone
 
 from ..models import Comment, CommentVote, Post
 
@@ -305,3 +309,200 @@ class CommentViewTests(TestCase):
         )
         comment.refresh_from_db()
         self.assertTrue(comment.is_deleted)
+
+
+class LazyCommentLoadingTests(TestCase):
+    """Tests for the feed comment preview and the on-demand comment endpoint."""
+
+    def setUp(self):
+        cache.clear()  # Render the feed rather than serve a page cached by another test
+        self.user = User.objects.create_user(
+            username="reader",
+            email="reader@yale.edu",
+            password="password123",
+        )
+        self.post = Post.objects.create(title="Busy thread", body="Body", author=self.user)
+        base = timezone.now() - timedelta(hours=1)
+        self.comments = [
+            Comment.objects.create(
+                post=self.post,
+                body=f"Comment {i}",
+                author=self.user,
+                created_at=base + timedelta(minutes=i),
+            )
+            for i in range(15)
+        ]
+        self.client.login(username="reader", password="password123")
+
+    def test_feed_renders_only_preview_comments(self):
+        """The feed shows the first few top-level comments and a load-more button."""
+        response = self.client.get(reverse("posting:home"))
+        post = response.context["posts"][0]
+        self.assertEqual(
+            [c.body for c in post.preview_comments], ["Comment 0", "Comment 1", "Comment 2"]
+        )
+        self.assertTrue(post.has_more_comments)
+        self.assertContains(response, "Load more comments")
+        self.assertNotContains(response, "Comment 3</p>")
+
+    def test_post_comments_pages_through_thread(self):
+        """The endpoint returns the next slice after the cursor and a follow-up cursor."""
+        feed = self.client.get(reverse("posting:home"))
+        cursor = feed.context["posts"][0].comments_cursor
+        url = reverse("posting:post_comments", args=[self.post.pk])
+
+        data = self.client.get(url, {"after": cursor}).json()
+        self.assertTrue(data["success"])
+        self.assertIn("Comment 3", data["html"])
+        self.assertIn("Comment 12", data["html"])
+        self.assertNotIn("Comment 13", data["html"])
+
+        data = self.client.get(url, {"after": data["next_cursor"]}).json()
+        self.assertIn("Comment 14", data["html"])
+        self.assertIsNone(data["next_cursor"])
+
+    def test_post_comments_hidden_post_404(self):
+        """Comments of hidden posts are not served."""
+        Post.objects.filter(pk=self.post.pk).update(is_hidden=True)
+        response = self.client.get(reverse("posting:post_comments", args=[self.post.pk]))
+        self.assertEqual(response.status_code, 404)
+
+
+class CommentThreadTests(TestCase):
+    """Tests for materialized-path thread storage and flat thread assembly."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="threader",
+            email="threader@yale.edu",
+            password="password123",
+        )
+        self.post = Post.objects.create(title="Threads", body="Body", author=self.user)
+        self.root = Comment.objects.create(post=self.post, body="Root", author=self.user)
+        self.other_root = Comment.objects.create(post=self.post, body="Other", author=self.user)
+
+    def _reply(self, parent, body, **kwargs):
+        return Comment.objects.create(
+            post=self.post, parent_comment=parent, body=body, author=self.user, **kwargs
+        )
+
+    def test_path_and_depth_follow_parent(self):
+        """Replies extend their parent's path and sit one level deeper."""
+        reply = self._reply(self.root, "Reply")
+        nested = self._reply(reply, "Nested")
+
+        self.assertEqual(self.root.depth, 0)
+        self.assertEqual(nested.depth, 2)
+        self.assertTrue(nested.path.startswith(reply.path))
+        self.assertTrue(reply.path.startswith(self.root.path))
+        self.assertEqual(Comment.objects.get(pk=nested.pk).path, nested.path)
+
+    def test_subtree_loads_in_thread_order_with_one_query(self):
+        """A subtree comes back depth-first in a single query."""
+        first = self._reply(self.root, "First")
+        second = self._reply(self.root, "Second")
+        under_first = self._reply(first, "Under first")
+        self._reply(self.other_root, "Elsewhere")
+
+        with self.assertNumQueries(1):
+            bodies = [c.body for c in Comment.objects.subtrees([self.root])]
+        self.assertEqual(bodies, ["Root", "First", "Under first", "Second"])
+        self.assertNotIn(second.pk, [c.pk for c in Comment.objects.subtrees([first])])
+        self.assertEqual(under_first.depth, 2)
+
+    def test_load_thread_drops_deleted_leaves_and_collapses_deep_replies(self):
+        """Deleted comments stay only with visible replies; deep levels are collapsed."""
+        from ..utils.comment_tree import MAX_INLINE_DEPTH, load_thread
+
+        self._reply(self.root, "Gone", is_deleted=True)
+        kept = self._reply(self.root, "Deleted parent", is_deleted=True)
+        self._reply(kept, "Survivor")
+        parent = self.other_root
+        for level in range(MAX_INLINE_DEPTH + 1):
+            parent = self._reply(parent, f"Level {level + 1}")
+
+        thread = load_thread([self.root, self.other_root])
+        bodies = [c.body for c in thread]
+        self.assertNotIn("Gone", bodies)
+        self.assertEqual(bodies[:3], ["Root", "Deleted parent", "Survivor"])
+        self.assertNotIn(f"Level {MAX_INLINE_DEPTH + 1}", bodies)
+        self.assertEqual(thread[-1].depth, MAX_INLINE_DEPTH)
+        self.assertEqual(thread[-1].hidden_replies_count, 1)
+
+    def test_feed_renders_replies_flat(self):
+        """Feed replies render as indented siblings, not nested includes."""
+        self._reply(self.root, "A reply")
+        self.client.login(username="threader", password="password123")
+
+        response = self.client.get(reverse("posting:home"))
+        self.assertContains(response, 'data-depth="1" style="--depth: 1"')
+        self.assertContains(response, "A reply")
+
+
+class DeepReplyLoadingTests(TestCase):
+    """Tests for loading replies below the inline depth limit on demand."""
+
+    def setUp(self):
+        from ..utils.comment_tree import MAX_INLINE_DEPTH
+
+        cache.clear()  # Render the feed rather than serve a page cached by another test
+        self.user = User.objects.create_user(
+            username="diver",
+            email="diver@yale.edu",
+            password="password123",
+        )
+        self.post = Post.objects.create(title="Deep", body="Body", author=self.user)
+        self.chain = [Comment.objects.create(post=self.post, body="Level 0", author=self.user)]
+        for level in range(1, MAX_INLINE_DEPTH + 1):
+            self.chain.append(
+                Comment.objects.create(
+                    post=self.post,
+                    parent_comment=self.chain[-1],
+                    body=f"Level {level}",
+                    author=self.user,
+                )
+            )
+        self.cutoff = self.chain[-1]
+        self.client.login(username="diver", password="password123")
+
+    def _deep_reply(self, body):
+        return Comment.objects.create(
+            post=self.post, parent_comment=self.cutoff, body=body, author=self.user
+        )
+
+    def test_feed_links_collapsed_replies_to_endpoint(self):
+        """The collapsed button points at the replies endpoint instead of an alert."""
+        self._deep_reply("Too deep")
+        response = self.client.get(reverse("posting:home"))
+        self.assertContains(response, reverse("posting:comment_replies", args=[self.cutoff.pk]))
+        self.assertContains(response, "View 1 more reply")
+        self.assertNotContains(response, "Too deep")
+        self.assertNotContains(response, "alert(")
+
+    def test_replies_endpoint_pages_direct_replies(self):
+        """Replies come back a slice at a time with a cursor for the next slice."""
+        from ..views.comments import REPLIES_PAGE_SIZE
+
+        base = timezone.now()
+        for i in range(REPLIES_PAGE_SIZE + 2):
+            reply = self._deep_reply(f"Deep {i}")
+            Comment.objects.filter(pk=reply.pk).update(created_at=base + timedelta(seconds=i))
+        url = reverse("posting:comment_replies", args=[self.cutoff.pk])
+
+        data = self.client.get(url).json()
+        self.assertTrue(data["success"])
+        self.assertIn("Deep 0<", data["html"])
+        self.assertNotIn(f"Deep {REPLIES_PAGE_SIZE}<", data["html"])
+        self.assertIn(f'data-depth="{self.cutoff.depth + 1}"', data["html"])
+        self.assertIsNotNone(data["next_cursor"])
+
+        data = self.client.get(url, {"after": data["next_cursor"]}).json()
+        self.assertIn(f"Deep {REPLIES_PAGE_SIZE}<", data["html"])
+        self.assertIn(f"Deep {REPLIES_PAGE_SIZE + 1}<", data["html"])
+        self.assertIsNone(data["next_cursor"])
+
+    def test_replies_endpoint_hidden_post_404(self):
+        """Replies under hidden posts are not served."""
+        Post.objects.filter(pk=self.post.pk).update(is_hidden=True)
+        url = reverse("posting:comment_replies", args=[self.cutoff.pk])
+        self.assertEqual(self.client.get(url).status_code, 404)
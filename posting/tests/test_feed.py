@@ -1,8 +1,18 @@
+from datetime import timedelta
+from unittest.mock import patch
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 
-from ..models import Tag
+from ..models import Comment, CommentVote, Post, Tag, Vote
+from ..utils.cursor_pagination import decode_cursor, encode_cursor
+from ..utils.feed_cache import invalidate_feed_pages
+from ..utils.fragment_cache import csrf_placeholder
 
 
 class FeedViewTests(TestCase):
@@ -26,3 +36,263 @@ class FeedViewTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "Share Your Thought")
 
+
+
+class FeedCursorPaginationTests(TestCase):
+    """Tests for keyset (cursor) pagination on the home feed."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="pager",
+            email="pager@yale.edu",
+            password="password123",
+        )
+        base = timezone.now() - timedelta(days=1)
+        self.posts = [
+            Post.objects.create(
+                title=f"Post {i}",
+                body="Body",
+                author=self.user,
+                created_at=base + timedelta(minutes=i),
+            )
+            for i in range(15)
+        ]
+        self.client.login(username="pager", password="password123")
+
+    def tearDown(self):
+        cache.clear()
+
+    def _titles(self, response):
+        return [post.title for post in response.context["posts"]]
+
+    def test_next_and_previous_cursors_walk_recent_feed(self):
+        """after= continues past the last post and before= returns to the first page."""
+        first = self.client.get(reverse("posting:home"))
+        page = first.context["posts"]
+        self.assertEqual(self._titles(first), [f"Post {i}" for i in range(14, 2, -1)])
+        self.assertTrue(page.has_next)
+        self.assertFalse(page.has_previous)
+
+        second = self.client.get(reverse("posting:home"), {"after": page.next_cursor})
+        self.assertEqual(self._titles(second), ["Post 2", "Post 1", "Post 0"])
+        self.assertFalse(second.context["posts"].has_next)
+
+        back = self.client.get(
+            reverse("posting:home"), {"before": second.context["posts"].previous_cursor}
+        )
+        self.assertEqual(self._titles(back), self._titles(first))
+        self.assertFalse(back.context["posts"].has_previous)
+
+    def test_popular_sort_breaks_score_ties_by_recency(self):
+        """Popular pages order by score, then created_at, without repeats."""
+        Post.objects.filter(pk=self.posts[0].pk).update(score=5)
+        first = self.client.get(reverse("posting:home"), {"sort": "popular"})
+        self.assertEqual(self._titles(first)[0], "Post 0")
+
+        second = self.client.get(
+            reverse("posting:home"),
+            {"sort": "popular", "after": first.context["posts"].next_cursor},
+        )
+        seen = self._titles(first) + self._titles(second)
+        self.assertEqual(len(seen), 15)
+        self.assertEqual(len(set(seen)), 15)
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        """A tampered cursor renders the first page instead of erroring."""
+        response = self.client.get(reverse("posting:home"), {"after": "not-a-cursor"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._titles(response)[0], "Post 14")
+
+    def test_cursor_round_trip(self):
+        """Cursors decode back to the values they were built from."""
+        post = self.posts[3]
+        token = encode_cursor(2.5, post.created_at, post.pk, "score")
+        self.assertEqual(decode_cursor(token, "score"), (2.5, post.created_at, post.pk))
+        self.assertIsNone(decode_cursor("@@@"))
+
+    def test_cursor_from_another_sort_falls_back_to_first_page(self):
+        """A cursor reused under another sort is ignored rather than compared to the wrong column."""
+        recent = self.client.get(reverse("posting:home")).context["posts"]
+        popular = self.client.get(reverse("posting:home"), {"sort": "popular"}).context["posts"]
+        self.assertIsNone(decode_cursor(recent.next_cursor, "score"))
+        self.assertIsNone(decode_cursor(popular.next_cursor, "trending_score"))
+
+        for sort, cursor in [("popular", recent.next_cursor), ("recent", popular.next_cursor)]:
+            for direction in ("after", "before"):
+                response = self.client.get(reverse("posting:home"), {"sort": sort, direction: cursor})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(self._titles(response)[0], "Post 14")
+
+    def test_trending_sort_uses_precomputed_score(self):
+        """The trending feed orders by the stored trending_score."""
+        cache.set("posting:trending_refreshed", True)  # Skip the lazy refresh
+        Post.objects.filter(pk=self.posts[5].pk).update(trending_score=9.0)
+        response = self.client.get(reverse("posting:home"), {"sort": "trending"})
+        self.assertEqual(self._titles(response)[0], "Post 5")
+        cache.delete("posting:trending_refreshed")
+
+    def test_trending_feed_refreshes_scores_only_when_enabled(self):
+        """The trending feed leaves the recompute to refresh_rankings by default."""
+        cache.delete("posting:trending_refreshed")
+        def render_trending():
+            invalidate_feed_pages()  # Render the page rather than serve it cached
+            self.client.get(reverse("posting:home"), {"sort": "trending"})
+
+        with patch.object(Post.objects, "refresh_trending_scores") as refresh:
+            render_trending()
+            refresh.assert_not_called()
+            with override_settings(TRENDING_REFRESH_IN_REQUESTS=True):
+                render_trending()
+                render_trending()
+            refresh.assert_called_once()
+        cache.delete("posting:trending_refreshed")
+
+    def test_vote_state_endpoint_returns_only_requested_ids(self):
+        """The vote state endpoint reports the user's votes on the given ids only."""
+        on_page, off_page = self.posts[14], self.posts[0]
+        comment = Comment.objects.create(post=on_page, body="Hi", author=self.user)
+        Vote.objects.create(post=on_page, voter=self.user, vote_type=Vote.UPVOTE)
+        Vote.objects.create(post=off_page, voter=self.user, vote_type=Vote.DOWNVOTE)
+        CommentVote.objects.create(comment=comment, voter=self.user, vote_type=CommentVote.DOWNVOTE)
+
+        with self.assertNumQueries(4):  # session, user, post votes, comment votes
+            response = self.client.get(
+                reverse("posting:vote_state"),
+                {"posts": f"{on_page.pk},{self.posts[13].pk},x", "comments": str(comment.pk)},
+            )
+        self.assertEqual(
+            response.json(),
+            {"posts": {str(on_page.pk): "UPVOTE"}, "comments": {str(comment.pk): "DOWNVOTE"}},
+        )
+
+
+class PostCardFragmentCacheTests(TestCase):
+    """Tests for the per-post rendered card cache on the home feed."""
+
+    def setUp(self):
+        cache.clear()
+        self.author = get_user_model().objects.create_user(
+            username="author",
+            email="author@yale.edu",
+            password="password123",
+        )
+        self.reader = get_user_model().objects.create_user(
+            username="reader",
+            email="reader@yale.edu",
+            password="password123",
+        )
+        self.post = Post.objects.create(title="Cached card", body="Body", author=self.author)
+        self.comment = Comment.objects.create(post=self.post, body="First!", author=self.author)
+
+    def tearDown(self):
+        cache.clear()
+
+    def _feed(self, username):
+        self.client.login(username=username, password="password123")
+        return self.client.get(reverse("posting:home"))
+
+    def test_cached_card_skips_comment_queries(self):
+        """A repeat view of an unchanged page doesn't load comment threads again."""
+        def loads_comments(queries):
+            return any('"posting_comment"."path"' in query["sql"] for query in queries)
+
+        with CaptureQueriesContext(connection) as first:
+            self._feed("reader")
+        invalidate_feed_pages()  # Rebuild the page from the cached cards
+        with CaptureQueriesContext(connection) as second:
+            response = self._feed("reader")
+        self.assertTrue(loads_comments(first))
+        self.assertFalse(loads_comments(second))
+        self.assertContains(response, "First!")
+
+    def test_owner_controls_are_overlaid_per_user(self):
+        """Shared cards show delete controls only to the comment's author."""
+        delete_url = reverse("posting:delete_comment", args=[self.comment.pk])
+
+        author_page = self._feed("author")
+        self.assertContains(author_page, delete_url)
+
+        reader_page = self._feed("reader")
+        self.assertNotContains(reader_page, delete_url)
+        self.assertNotContains(reader_page, "<!--fc:")
+        self.assertNotContains(reader_page, csrf_placeholder())
+
+    def test_writes_bump_render_version(self):
+        """Votes, comments, comment votes and edits each re-render the card."""
+        def version():
+            return Post.objects.values_list("render_version", flat=True).get(pk=self.post.pk)
+
+        before = version()
+        Vote.objects.create(post=self.post, voter=self.reader, vote_type=Vote.UPVOTE)
+        CommentVote.objects.create(comment=self.comment, voter=self.reader).delete()
+        Comment.objects.create(post=self.post, body="Second", author=self.reader)
+        self.post.is_flagged = True
+        self.post.save(update_fields=["is_flagged"])
+        self.assertEqual(version(), before + 5)
+
+        self._feed("reader")
+        self.comment.body = "Edited comment"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.comment.save(update_fields=["body"])
+        self.assertContains(self._feed("reader"), "Edited comment")
+
+
+class FeedPageCacheTests(TestCase):
+    """Tests for the shared full-page cache of the home feed."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="browser",
+            email="browser@yale.edu",
+            password="password123",
+        )
+        self.post = Post.objects.create(title="Shared page", body="Body", author=self.user)
+        self.client.login(username="browser", password="password123")
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_repeat_views_skip_feed_queries(self):
+        """An unchanged feed page is served without querying posts."""
+        self.client.get(reverse("posting:home"))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("posting:home"))
+        self.assertFalse(any("posting_post" in query["sql"] for query in queries))
+        self.assertContains(response, "Shared page")
+        self.assertContains(response, reverse("posting:vote_state"))
+
+    def test_writes_invalidate_cached_pages(self):
+        """New, edited and hidden posts show up on the next view."""
+        self.client.get(reverse("posting:home"))
+        with self.captureOnCommitCallbacks(execute=True):
+            fresh = Post.objects.create(title="Fresh post", body="Body", author=self.user)
+        self.assertContains(self.client.get(reverse("posting:home")), "Fresh post")
+
+        fresh.is_hidden = True
+        with self.captureOnCommitCallbacks(execute=True):
+            fresh.save()
+        self.assertNotContains(self.client.get(reverse("posting:home")), "Fresh post")
+
+    def test_votes_and_new_comments_keep_cached_pages(self):
+        """Score and count changes wait for the page TTL instead of invalidating."""
+        self.client.get(reverse("posting:home"))
+        with self.captureOnCommitCallbacks(execute=True):
+            Vote.objects.create(post=self.post, voter=self.user, vote_type=Vote.UPVOTE)
+            comment = Comment.objects.create(post=self.post, body="First!", author=self.user)
+        response = self.client.get(reverse("posting:home"))
+        self.assertRegex(response.content.decode(), rf'id="vote-score-{self.post.pk}">\s*0\s*<')
+        self.assertNotContains(response, "First!")
+
+        comment.is_deleted = True
+        with self.captureOnCommitCallbacks(execute=True):
+            comment.save(update_fields=["is_deleted"])
+        response = self.client.get(reverse("posting:home"))
+        self.assertRegex(response.content.decode(), rf'id="vote-score-{self.post.pk}">\s*1\s*<')
+
+    def test_filters_are_cached_separately(self):
+        """Each query string gets its own cached page."""
+        self.client.get(reverse("posting:home"))
+        response = self.client.get(reverse("posting:home"), {"q": "nothing-matches"})
+        self.assertNotContains(response, "Shared page")
@@ -1,5 +1,232 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+
+from ..models import Comment, Post, Tag, Vote
+from ..utils.tag_sidebar import get_tag_sidebar
+
+User = get_user_model()
+
+
+class PostCounterTests(TestCase):
+    """Tests for the denormalized vote and comment counters on Post."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="author",
+            email="author@yale.edu",
+            password="password123",
+        )
+        self.voter = User.objects.create_user(
+            username="voter",
+            email="voter@yale.edu",
+            password="password123",
+        )
+        self.post = Post.objects.create(title="Counted", body="Body", author=self.user)
+
+    def test_vote_create_switch_delete_updates_counters(self):
+        """Creating, switching and deleting a vote keep the stored counters in step."""
+        vote = Vote.objects.create(post=self.post, voter=self.voter, vote_type=Vote.UPVOTE)
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.upvotes_count, self.post.downvotes_count, self.post.score), (1, 0, 1))
+
+        vote = Vote.objects.get(pk=vote.pk)
+        vote.vote_type = Vote.DOWNVOTE
+        vote.save(update_fields=["vote_type"])
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.upvotes_count, self.post.downvotes_count, self.post.score), (0, 1, -1))
+
+        vote.delete()
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.upvotes_count, self.post.downvotes_count, self.post.score), (0, 0, 0))
+
+    def test_comment_soft_delete_updates_visible_count(self):
+        """Soft-deleting and restoring a comment adjusts visible_comments_count."""
+        comment = Comment.objects.create(post=self.post, body="Hello", author=self.user)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.visible_comments_count, 1)
+
+        comment.is_deleted = True
+        comment.save(update_fields=["is_deleted"])
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.visible_comments_count, 0)
+
+        comment.is_deleted = False
+        comment.save(update_fields=["is_deleted"])
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.visible_comments_count, 1)
+
+    def test_hard_delete_recounts_cascaded_replies(self):
+        """Hard-deleting a comment also removes its replies from the count."""
+        parent = Comment.objects.create(post=self.post, body="Parent", author=self.user)
+        Comment.objects.create(post=self.post, parent_comment=parent, body="Reply", author=self.user)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.visible_comments_count, 2)
+
+        parent.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.visible_comments_count, 0)
+
+    def test_full_save_keeps_concurrent_counter_updates(self):
+        """Saving a stale instance without update_fields doesn't overwrite counters."""
+        stale = Post.objects.get(pk=self.post.pk)
+        Vote.objects.create(post=self.post, voter=self.voter, vote_type=Vote.UPVOTE)
+        Comment.objects.create(post=self.post, body="Hello", author=self.user)
+
+        stale.title = "Edited title"
+        stale.save()
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.title, "Edited title")
+        self.assertEqual((self.post.upvotes_count, self.post.score), (1, 1))
+        self.assertEqual(self.post.visible_comments_count, 1)
+
+    def test_reconcile_command_repairs_drift(self):
+        """reconcile_post_counters rewrites counters that disagree with the tables."""
+        Vote.objects.create(post=self.post, voter=self.voter, vote_type=Vote.UPVOTE)
+        Post.objects.filter(pk=self.post.pk).update(
+            upvotes_count=7, score=7, visible_comments_count=3
+        )
+
+        out = StringIO()
+        call_command("reconcile_post_counters", "--dry-run", stdout=out)
+        self.assertIn("Would repair 1 post(s) and 0 tag(s).", out.getvalue())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.upvotes_count, 7)
+
+        call_command("reconcile_post_counters", stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.upvotes_count, 1)
+        self.assertEqual(self.post.score, 1)
+        self.assertEqual(self.post.visible_comments_count, 0)
+
+
+class TrendingScoreTests(TestCase):
+    """Tests for the precomputed trending score."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="author",
+            email="author@yale.edu",
+            password="password123",
+        )
+        self.voter = User.objects.create_user(
+            username="voter",
+            email="voter@yale.edu",
+            password="password123",
+        )
+        self.now = timezone.now()
+        self.post = Post.objects.create(
+            title="Fresh", body="Body", author=self.user, created_at=self.now - timedelta(hours=2)
+        )
+
+    def test_refresh_scores_recent_activity(self):
+        """Recent votes and comments produce (votes * 2 + comments) / (age + 2)."""
+        Vote.objects.create(post=self.post, voter=self.voter)
+        Comment.objects.create(post=self.post, body="Nice", author=self.voter)
+
+        Post.objects.refresh_trending_scores(now=self.now)
+        self.post.refresh_from_db()
+        self.assertAlmostEqual(self.post.trending_score, 3.0 / 4.0, places=3)
+
+    def test_refresh_decays_posts_without_recent_activity(self):
+        """Posts whose activity left the window are reset to zero."""
+        Post.objects.filter(pk=self.post.pk).update(trending_score=4.2)
+
+        updated = Post.objects.refresh_trending_scores(now=self.now)
+        self.post.refresh_from_db()
+        self.assertEqual(updated, 1)
+        self.assertEqual(self.post.trending_score, 0.0)
+
+    def test_refresh_skips_inactive_posts(self):
+        """Posts with no recent activity and a zero score are not rewritten."""
+        self.assertEqual(Post.objects.refresh_trending_scores(now=self.now), 0)
+
+
+class TagVisiblePostsCountTests(TestCase):
+    """Tests for the stored visible post count on Tag and the cached sidebar."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="tagger",
+            email="tagger@yale.edu",
+            password="password123",
+        )
+        self.tag = Tag.objects.create(name="Finance", slug="finance")
+        self.other = Tag.objects.create(name="Careers", slug="careers")
+        self.post = Post.objects.create(title="Tagged", body="Body", author=self.user)
+
+    def _counts(self):
+        return dict(Tag.objects.values_list("slug", "visible_posts_count"))
+
+    def test_adding_removing_and_clearing_tags(self):
+        """Forward and reverse m2m changes move the counts."""
+        self.post.tags.add(self.tag, self.other)
+        self.post.tags.add(self.tag)  # already linked - no double count
+        self.assertEqual(self._counts(), {"finance": 1, "careers": 1})
+
+        self.post.tags.set([self.other])
+        self.assertEqual(self._counts(), {"finance": 0, "careers": 1})
+
+        second = Post.objects.create(title="Second", body="Body", author=self.user)
+        self.tag.posts.add(self.post, second)
+        self.tag.posts.remove(second, second)
+        self.assertEqual(self._counts(), {"finance": 1, "careers": 1})
+
+        self.post.tags.clear()
+        self.assertEqual(self._counts(), {"finance": 0, "careers": 0})
+
+    def test_hiding_and_deleting_posts(self):
+        """Hidden and deleted posts stop counting towards their tags."""
+        self.post.tags.add(self.tag)
+        post = Post.objects.get(pk=self.post.pk)
+
+        post.is_hidden = True
+        post.save(update_fields=["is_hidden"])
+        self.assertEqual(self._counts()["finance"], 0)
+        post.tags.add(self.other)  # tagging a hidden post doesn't count
+        self.assertEqual(self._counts()["careers"], 0)
+
+        post.is_hidden = False
+        post.save(update_fields=["is_hidden"])
+        self.assertEqual(self._counts(), {"finance": 1, "careers": 1})
+
+        post.delete()
+        self.assertEqual(self._counts(), {"finance": 0, "careers": 0})
+
+    def test_full_save_keeps_concurrent_count_updates(self):
+        """Saving a stale tag without update_fields doesn't overwrite its count."""
+        stale = Tag.objects.get(pk=self.tag.pk)
+        Tag.objects.adjust_visible_counts([self.tag.pk], 2)
+
+        stale.name = "Money"
+        stale.save()
+
+        self.tag.refresh_from_db()
+        self.assertEqual((self.tag.name, self.tag.visible_posts_count), ("Money", 2))
+
+    def test_sidebar_is_cached_and_invalidated(self):
+        """The sidebar is served from cache until a count changes."""
+        self.assertEqual(get_tag_sidebar(), [])
+        with self.assertNumQueries(0):
+            get_tag_sidebar()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.tags.add(self.tag)
+        self.assertEqual(get_tag_sidebar(), [{"name": "Finance", "slug": "finance", "count": 1}])
 
-# Placeholder for model tests
-# Add tests for Post, Tag, and Vote models here
+    def test_reconcile_command_repairs_tag_drift(self):
+        """reconcile_post_counters rewrites drifted tag counts."""
+        self.post.tags.add(self.tag)
+        Tag.objects.filter(pk=self.tag.pk).update(visible_posts_count=5)
 
+        out = StringIO()
+        call_command("reconcile_post_counters", stdout=out)
+        self.assertIn("Repaired 0 post(s) and 1 tag(s).", out.getvalue())
+        self.assertEqual(self._counts()["finance"], 1)
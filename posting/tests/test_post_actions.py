@@ -1,8 +1,16 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.management import call_command
+from django.http import QueryDict
+from django.test import TestCase, override_settings
 from django.urls import reverse
 
-from ..models import Post, Tag, Vote
+from ..models import Comment, CommentVote, PendingVote, Post, Tag, Vote, VoteCounterShard
+from ..utils.counter_shards import fold_counter_shards
+from ..utils.feed_cache import feed_page_key
+from ..utils.vote_buffer import flush_pending_votes
+from ..utils.vote_service import comment_votes, post_votes
 
 User = get_user_model()
 
@@ -143,3 +151,241 @@ class VoteTests(TestCase):
         self.assertEqual(response.status_code, 302)  # Redirects to login
         response = self.client.post(reverse("posting:downvote", args=[self.post.pk]))
         self.assertEqual(response.status_code, 302)  # Redirects to login
+
+
+class VoteServiceTests(TestCase):
+    """Tests for the conditional-statement vote toggle."""
+
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username="author",
+            email="author@yale.edu",
+            password="password123",
+        )
+        self.voter = User.objects.create_user(
+            username="voter",
+            email="voter@yale.edu",
+            password="password123",
+        )
+        self.post = Post.objects.create(title="Post", body="Body", author=self.author)
+
+    def test_toggle_sequence(self):
+        """Add, switch and remove each report the previous vote and new counts."""
+        result = post_votes.toggle(self.post, self.voter, Vote.UPVOTE)
+        self.assertEqual((result.action, result.user_vote, result.score), ("added", "UPVOTE", 1))
+
+        result = post_votes.toggle(self.post, self.voter, Vote.DOWNVOTE)
+        self.assertEqual(result.action, "changed")
+        self.assertEqual((result.previous, result.upvotes, result.downvotes), ("UPVOTE", 0, 1))
+
+        result = post_votes.toggle(self.post, self.voter, Vote.DOWNVOTE)
+        self.assertEqual((result.action, result.user_vote, result.score), ("removed", None, 0))
+        self.assertFalse(Vote.objects.exists())
+
+    def test_counters_match_vote_rows(self):
+        """Stored counters stay equal to the Vote rows after every toggle."""
+        for voter, vote_type in [
+            (self.voter, Vote.UPVOTE),
+            (self.author, Vote.UPVOTE),
+            (self.voter, Vote.DOWNVOTE),
+            (self.author, Vote.UPVOTE),
+        ]:
+            post_votes.toggle(self.post, voter, vote_type)
+            self.post.refresh_from_db()
+            self.assertEqual(
+                (self.post.upvotes_count, self.post.downvotes_count),
+                (
+                    Vote.objects.filter(vote_type=Vote.UPVOTE).count(),
+                    Vote.objects.filter(vote_type=Vote.DOWNVOTE).count(),
+                ),
+            )
+        self.assertEqual(self.post.score, -1)
+
+    def test_new_vote_query_count(self):
+        """A new vote is one insert, one counter update and one count read."""
+        post_votes.toggle(self.post, self.author, Vote.UPVOTE)
+        # Plus the savepoint pair from transaction.atomic() inside the test transaction
+        with self.assertNumQueries(5):
+            result = post_votes.toggle(self.post, self.voter, Vote.UPVOTE)
+        self.assertEqual((result.upvotes, result.downvotes), (2, 0))
+
+    def test_toggle_keeps_cached_feed_pages(self):
+        """A vote refreshes the post's card but not the shared feed page generation."""
+        key = feed_page_key(QueryDict())
+        with self.captureOnCommitCallbacks(execute=True):
+            post_votes.toggle(self.post, self.voter, Vote.UPVOTE)
+        self.assertEqual(feed_page_key(QueryDict()), key)
+
+    def test_comment_toggle_bumps_post_version(self):
+        """Comment votes report aggregated counts and refresh the post's card."""
+        comment = Comment.objects.create(post=self.post, body="Nice", author=self.author)
+        self.post.refresh_from_db()
+        version = self.post.render_version
+
+        result = comment_votes.toggle(comment, self.voter, CommentVote.DOWNVOTE)
+        self.assertEqual((result.action, result.score), ("added", -1))
+        result = comment_votes.toggle(comment, self.voter, CommentVote.UPVOTE)
+        self.assertEqual((result.action, result.upvotes, result.downvotes), ("changed", 1, 0))
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.render_version, version + 2)
+        self.assertEqual(CommentVote.objects.get().vote_type, CommentVote.UPVOTE)
+
+    def test_comment_vote_view_reports_action(self):
+        """The comment vote endpoints return the toggle result."""
+        comment = Comment.objects.create(post=self.post, body="Nice", author=self.author)
+        self.client.login(username="voter", password="password123")
+        url = reverse("posting:upvote_comment", args=[comment.pk])
+
+        data = self.client.post(url, HTTP_X_REQUESTED_WITH="XMLHttpRequest").json()
+        self.assertEqual((data["action"], data["user_vote"], data["new_score"]), ("added", "UPVOTE", 1))
+        data = self.client.post(url, HTTP_X_REQUESTED_WITH="XMLHttpRequest").json()
+        self.assertEqual((data["action"], data["user_vote"], data["new_score"]), ("removed", None, 0))
+
+
+@override_settings(VOTE_COUNTER_SHARDS=4)
+class ShardedCounterTests(TestCase):
+    """Tests for vote counters sharded over several rows per post."""
+
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username="author",
+            email="author@yale.edu",
+            password="password123",
+        )
+        self.voters = [
+            User.objects.create_user(
+                username=f"voter{i}",
+                email=f"voter{i}@yale.edu",
+                password="password123",
+            )
+            for i in range(6)
+        ]
+        self.post = Post.objects.create(title="Viral post", body="Body", author=self.author)
+
+    def test_votes_go_to_shards(self):
+        """Votes leave the post row alone but report the summed counts."""
+        for voter in self.voters[:5]:
+            result = post_votes.toggle(self.post, voter, Vote.UPVOTE)
+        result = post_votes.toggle(self.post, self.voters[5], Vote.DOWNVOTE)
+        self.assertEqual((result.upvotes, result.downvotes), (5, 1))
+
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.upvotes_count, self.post.downvotes_count), (0, 0))
+        self.assertLessEqual(VoteCounterShard.objects.count(), 4)
+        self.assertEqual(sum(VoteCounterShard.objects.values_list("changes", flat=True)), 6)
+
+    def test_fold_moves_changes_into_post(self):
+        """Folding applies the shard totals to the post and resets the shards."""
+        for voter in self.voters:
+            post_votes.toggle(self.post, voter, Vote.UPVOTE)
+        post_votes.toggle(self.post, self.voters[0], Vote.DOWNVOTE)
+        version = Post.objects.get(pk=self.post.pk).render_version
+
+        self.assertEqual(fold_counter_shards(), VoteCounterShard.objects.count())
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.upvotes_count, self.post.downvotes_count), (5, 1))
+        self.assertEqual(self.post.score, 4)
+        self.assertEqual(self.post.render_version, version + 1)
+        self.assertFalse(VoteCounterShard.objects.exclude(upvotes=0, downvotes=0, changes=0).exists())
+        self.assertEqual(fold_counter_shards(), 0)
+
+    def test_comment_votes_refresh_card_on_fold(self):
+        """Comment votes don't touch the post row until the shards are folded."""
+        comment = Comment.objects.create(post=self.post, body="Nice", author=self.author)
+        version = Post.objects.get(pk=self.post.pk).render_version
+
+        result = comment_votes.toggle(comment, self.voters[0], CommentVote.UPVOTE)
+        self.assertEqual(result.score, 1)
+        self.assertEqual(Post.objects.get(pk=self.post.pk).render_version, version)
+
+        fold_counter_shards()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.render_version, version + 1)
+        self.assertEqual(self.post.upvotes_count, 0)
+
+    def test_reconcile_folds_shards_first(self):
+        """Counter repair doesn't count unfolded shard changes twice."""
+        post_votes.toggle(self.post, self.voters[0], Vote.UPVOTE)
+        call_command("reconcile_post_counters", stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.upvotes_count, 1)
+        self.assertEqual(post_votes.counts(self.post), (1, 0))
+
+
+@override_settings(VOTE_WRITE_BEHIND=True)
+class WriteBehindVoteTests(TestCase):
+    """Tests for buffered vote clicks and the flusher that applies them."""
+
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username="author",
+            email="author@yale.edu",
+            password="password123",
+        )
+        self.voter = User.objects.create_user(
+            username="voter",
+            email="voter@yale.edu",
+            password="password123",
+        )
+        self.post = Post.objects.create(title="Hot post", body="Body", author=self.author)
+        self.client.login(username="voter", password="password123")
+
+    def _click(self, url_name, pk):
+        return self.client.post(
+            reverse(url_name, args=[pk]), HTTP_X_REQUESTED_WITH="XMLHttpRequest"
+        ).json()
+
+    def test_clicks_are_buffered_with_optimistic_counts(self):
+        """A click only appends to the buffer but reports the expected result."""
+        data = self._click("posting:upvote", self.post.pk)
+        self.assertEqual((data["user_vote"], data["net_votes"]), ("UPVOTE", 1))
+        self.assertFalse(Vote.objects.exists())
+
+        data = self._click("posting:downvote", self.post.pk)
+        self.assertEqual((data["user_vote"], data["net_votes"]), ("DOWNVOTE", -1))
+        self.assertEqual(PendingVote.objects.count(), 2)
+
+        vote_state = self.client.get(reverse("posting:vote_state"), {"posts": str(self.post.pk)})
+        self.assertEqual(vote_state.json()["posts"], {str(self.post.pk): "DOWNVOTE"})
+
+    def test_flush_replays_clicks_per_voter(self):
+        """Flushing applies each voter's final state and the net counter change."""
+        Vote.objects.create(post=self.post, voter=self.author, vote_type=Vote.UPVOTE)
+        for url_name in ("posting:upvote", "posting:upvote", "posting:downvote"):
+            self._click(url_name, self.post.pk)
+        self.client.login(username="author", password="password123")
+        self._click("posting:upvote", self.post.pk)  # toggles the stored upvote off
+
+        self.assertEqual(flush_pending_votes(), 4)
+        self.assertFalse(PendingVote.objects.exists())
+        self.assertEqual(
+            list(Vote.objects.values_list("voter__username", "vote_type")),
+            [("voter", "DOWNVOTE")],
+        )
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.upvotes_count, self.post.downvotes_count), (0, 1))
+        self.assertEqual(self.post.score, -1)
+
+    def test_flush_upserts_changed_votes(self):
+        """A switched vote updates the existing row instead of adding one."""
+        Vote.objects.create(post=self.post, voter=self.voter, vote_type=Vote.UPVOTE)
+        self._click("posting:downvote", self.post.pk)
+        flush_pending_votes()
+
+        self.assertEqual(Vote.objects.get(voter=self.voter).vote_type, Vote.DOWNVOTE)
+        self.assertEqual(Vote.objects.count(), 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.score, -1)
+
+    def test_comment_votes_are_buffered(self):
+        """Comment vote clicks go through the same buffer."""
+        comment = Comment.objects.create(post=self.post, body="Nice", author=self.author)
+        data = self._click("posting:upvote_comment", comment.pk)
+        self.assertEqual((data["user_vote"], data["new_score"]), ("UPVOTE", 1))
+        self.assertFalse(CommentVote.objects.exists())
+
+        out = StringIO()
+        call_command("flush_votes", stdout=out)
+        self.assertIn("Flushed 1 vote(s)", out.getvalue())
+        self.assertEqual(comment.get_net_votes(), 1)
@@ -0,0 +1,176 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Comment, Post, Tag
+from ..utils import suggestion_index
+from ..utils.search import FTS_TABLE, attach_search_snippets, search_posts
+
+User = get_user_model()
+
+
+class FullTextSearchTests(TestCase):
+    """Tests for the full-text search index over posts and comments."""
+
+    def setUp(self):
+        cache.clear()  # Render the feed rather than serve a page cached by another test
+        self.user = User.objects.create_user(
+            username="searcher",
+            email="searcher@yale.edu",
+            password="password123",
+        )
+        self.title_hit = Post.objects.create(
+            title="Finance midterm review", body="Sharing my notes.", author=self.user
+        )
+        self.body_hit = Post.objects.create(
+            title="Study group", body="Anyone prepping for the finance midterm?", author=self.user
+        )
+        self.comment_hit = Post.objects.create(
+            title="Weekend plans", body="Nothing related.", author=self.user
+        )
+        self.comment = Comment.objects.create(
+            post=self.comment_hit, body="Skipping it for finance homework", author=self.user
+        )
+        self.client.login(username="searcher", password="password123")
+
+    def _search(self, query):
+        return list(
+            search_posts(Post.objects.filter(is_hidden=False), query)
+            .order_by("-search_rank", "-created_at")
+        )
+
+    def test_title_matches_rank_above_body_matches(self):
+        """Title hits outrank body hits for the same words."""
+        results = self._search("finance midterm")
+        self.assertEqual(results, [self.title_hit, self.body_hit])
+
+    def test_comment_bodies_are_searchable(self):
+        """Posts are found through their visible comments."""
+        self.assertEqual(self._search("homework"), [self.comment_hit])
+
+        self.comment.is_deleted = True
+        self.comment.save(update_fields=["is_deleted"])
+        self.assertEqual(self._search("homework"), [])
+
+    def test_edits_update_index_and_last_word_is_prefix(self):
+        """Saving a post reindexes it; the final word matches as a prefix."""
+        self.body_hit.body = "Organising a recruiting dinner"
+        self.body_hit.save()
+
+        self.assertEqual(self._search("recruit"), [self.body_hit])
+        self.assertNotIn(self.body_hit, self._search("prepping"))
+
+    def test_query_syntax_is_not_interpreted(self):
+        """Quotes and FTS operators in the query don't raise errors."""
+        self.assertEqual(self._search('"finance" (midterm*'), [self.title_hit, self.body_hit])
+        self.assertEqual(self._search("!!!"), [])
+
+    def test_snippets_highlight_and_escape(self):
+        """Snippets wrap matches in <mark> and escape post content."""
+        post = Post.objects.create(
+            title="Tips", body="<b>bold</b> advice about networking events", author=self.user
+        )
+        attach_search_snippets([post], "networking")
+        self.assertIn("<mark>networking</mark>", post.search_snippet)
+        self.assertIn("&lt;b&gt;", post.search_snippet)
+
+    def test_feed_search_orders_by_relevance(self):
+        """Searching the feed defaults to relevance order and shows snippets."""
+        response = self.client.get(reverse("posting:home"), {"q": "finance midterm"})
+        self.assertEqual(response.context["sort"], "relevance")
+        self.assertEqual(list(response.context["posts"]), [self.title_hit, self.body_hit])
+        self.assertContains(response, "<mark>")
+
+    def test_rebuild_command_restores_index(self):
+        """rebuild_search_index repopulates an emptied index."""
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        self.assertEqual(self._search("finance"), [])
+
+        out = StringIO()
+        call_command("rebuild_search_index", stdout=out)
+        self.assertIn("Indexed 3 post(s)", out.getvalue())
+        self.assertEqual(len(self._search("finance")), 3)
+
+    def test_relevance_results_page_with_cursor(self):
+        """Relevance-ordered results page through the cursor without repeats."""
+        for i in range(12):
+            Post.objects.create(
+                title=f"Finance thread {i}", body="finance " * (i % 3 + 1), author=self.user
+            )
+        first = self.client.get(reverse("posting:home"), {"q": "finance"}).context["posts"]
+        second = self.client.get(
+            reverse("posting:home"), {"q": "finance", "after": first.next_cursor}
+        ).context["posts"]
+
+        seen = [post.pk for post in first] + [post.pk for post in second]
+        self.assertEqual(len(seen), 15)
+        self.assertEqual(len(set(seen)), 15)
+        self.assertIsNone(second.next_cursor)
+
+
+class SearchSuggestionIndexTests(TestCase):
+    """Tests for the in-memory prefix index behind search suggestions."""
+
+    def setUp(self):
+        suggestion_index._index_instance = None
+        self.user = User.objects.create_user(
+            username="typist",
+            email="typist@yale.edu",
+            password="password123",
+        )
+        self.mgt = Tag.objects.create(name="Mgt-541", slug="mgt-541")
+        self.careers = Tag.objects.create(name="Careers", slug="careers")
+        self.post = Post.objects.create(
+            title="Career fair tips", body="Bring resumes.", author=self.user
+        )
+        self.post.tags.add(self.careers)
+        self.client.login(username="typist", password="password123")
+
+    def tearDown(self):
+        suggestion_index._index_instance = None
+
+    def _suggest(self, query):
+        return self.client.get(reverse("posting:search_suggestions"), {"q": query}).json()
+
+    def test_word_prefixes_match_tags_and_titles(self):
+        """Every query word must prefix a word of the tag name or title."""
+        data = self._suggest("care")
+        self.assertEqual(data["tags"], [{"name": "Careers", "count": 1}])
+        self.assertEqual(data["recent_posts"], [{"id": self.post.pk, "title": "Career fair tips"}])
+
+        self.assertEqual(self._suggest("mgt 5")["tags"], [{"name": "Mgt-541", "count": 0}])
+        self.assertEqual(self._suggest("fair car")["recent_posts"][0]["id"], self.post.pk)
+        self.assertEqual(self._suggest("air")["recent_posts"], [])
+
+    def test_suggestions_do_not_query_database_once_built(self):
+        """After the first build, suggestions are served from memory."""
+        suggestion_index.get_suggestion_index()
+        with self.assertNumQueries(0):
+            suggestion_index.get_suggestion_index().suggest("career")
+
+    def test_writes_update_index_incrementally(self):
+        """Saving, hiding and retagging posts update the built index on commit."""
+        self._suggest("warm up")
+        with self.captureOnCommitCallbacks(execute=True):
+            new_post = Post.objects.create(title="Careers panel recap", body="Notes", author=self.user)
+            new_post.tags.add(self.careers)
+        data = self._suggest("careers")
+        self.assertEqual(data["tags"], [{"name": "Careers", "count": 2}])
+        self.assertEqual(data["recent_posts"][0]["id"], new_post.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.is_hidden = True
+            self.post.save(update_fields=["is_hidden"])
+        data = self._suggest("career")
+        self.assertEqual(data["tags"], [{"name": "Careers", "count": 1}])
+        self.assertNotIn(self.post.pk, [post["id"] for post in data["recent_posts"]])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            new_post.delete()
+        self.assertEqual(self._suggest("career")["tags"], [{"name": "Careers", "count": 0}])
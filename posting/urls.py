@@ -11,7 +11,9 @@ urlpatterns = [
     path("posts/<int:pk>/downvote/", views.downvote_post, name="downvote"),
     path("posts/<int:pk>/flag/", views.flag_post, name="flag"),
     # Comment actions
+    path("posts/<int:post_pk>/comments/", views.post_comments, name="post_comments"),
     path("posts/<int:post_pk>/comments/add/", views.add_comment, name="add_comment"),
+    path("comments/<int:comment_pk>/replies/", views.comment_replies, name="comment_replies"),
     path("comments/<int:comment_pk>/reply/", views.add_reply, name="add_reply"),
     path("comments/<int:pk>/upvote/", views.upvote_comment, name="upvote_comment"),
     path("comments/<int:pk>/downvote/", views.downvote_comment, name="downvote_comment"),
@@ -25,5 +27,7 @@ urlpatterns = [
     path("api/suggest-tags/", views.suggest_tags, name="suggest_tags"),
     path("api/search-suggestions/", views.search_suggestions, name="search_suggestions"),
     path("api/tag-categories/", views.tag_categories, name="tag_categories"),
+    path("api/vote-state/", views.vote_state, name="vote_state"),
+    path("api/moderation-status/", views.moderation_status, name="moderation_status"),
 ]
 
@@ -9,6 +9,12 @@ The Moderation API is FREE and unlimited. It checks content for:
 - Violence
 - And more categories
 
+Results are cached by normalized content hash (moderation_cache.py), so
+identical texts are only sent once per moderation model. Calls run under a
+deadline, retry policy, circuit breaker and concurrency cap
+(moderation_resilience.py); when the API can't be reached, results carry
+an "error" and the local crisis keyword check.
+
 Usage:
     moderator = AIContentModerator()
     result = moderator.check_content("Some text to check")
@@ -17,34 +23,128 @@ Usage:
 """
 
 import logging
-import re
-import threading
 from typing import Optional
 
 from django.conf import settings
 
-logger = logging.getLogger(__name__)
+from .crisis_lexicon import get_lexicon
+from .moderation_cache import ModerationCache, content_hash
+from .moderation_resilience import ResilientCaller
 
-# Crisis keywords for instant detection (no API call needed)
-CRISIS_KEYWORDS = [
-    r'\b(suicid|kill\s*(my)?self|end\s*(my)?\s*life|want\s*to\s*die)\b',
-    r'\b(self[- ]?harm|cutting\s*myself|hurt\s*myself)\b',
-    r'\b(don\'?t\s*want\s*to\s*live|no\s*reason\s*to\s*live)\b',
-    r'\b(overdose|take\s*pills|slit\s*wrist)\b',
-]
-CRISIS_PATTERN = re.compile('|'.join(CRISIS_KEYWORDS), re.IGNORECASE)
+logger = logging.getLogger(__name__)
 
+# Default timeout for the moderation API client; each call is also given
+# the time left before its deadline (see moderation_resilience.py)
+MODERATION_TIMEOUT_SECONDS = 10
+# Texts sent per moderation API call
+MAX_BATCH_INPUTS = 32
 
 def quick_crisis_check(text: str) -> bool:
     """
     Fast keyword-based crisis detection (no API call).
 
-    Returns True if text contains obvious crisis/self-harm indicators.
-    This runs synchronously for immediate crisis resource display.
+    Returns True if text contains obvious crisis/self-harm indicators: the
+    built-in CRISIS_KEYWORDS or a crisis term from the lexicon table (see
+    crisis_lexicon.py). This runs synchronously for immediate crisis
+    resource display.
     """
     if not text:
         return False
-    return bool(CRISIS_PATTERN.search(text))
+    return get_lexicon().is_crisis(text)
+
+
+def moderation_enabled() -> bool:
+    """Whether a moderation client is configured (an API key or the fake client)."""
+    if getattr(settings, "MODERATION_CLIENT", "openai") == "fake":
+        return True
+    return bool(getattr(settings, "OPENAI_API_KEY", None))
+
+
+def _safe_result(error=None, text=None) -> dict:
+    """
+    Unflagged result, used for skipped texts and failed calls.
+
+    Failed calls pass their text, so crisis keywords are still detected.
+    """
+    result = {
+        "flagged": False,
+        "categories": {},
+        "category_scores": {},
+        "severity_score": 0.0,
+        "is_crisis": quick_crisis_check(text) if text else False,
+    }
+    if error:
+        result["error"] = error
+    return result
+
+
+def _skipped_result() -> dict:
+    """
+    Result for text the pre-classifier rated benign.
+
+    No scores are stored, so the text is never used to train the pre-classifier.
+    """
+    return {
+        "flagged": False,
+        "categories": {},
+        "category_scores": None,
+        "severity_score": None,
+        "is_crisis": False,
+        "skipped": True,
+    }
+
+
+def _parse_result(result) -> dict:
+    """Convert one moderation API result into the check_content() dict."""
+    return _verdict(result.flagged, result.categories.model_dump(), result.category_scores.model_dump())
+
+
+def _verdict(flagged, categories, scores) -> dict:
+    """
+    Derive the check_content() dict from the API's flag and scores.
+
+    Only the API's own output is cached (see _cached_fields()), so a change
+    to the thresholds below applies to cached texts on their next lookup.
+    """
+    # Calculate severity score (max across all categories)
+    severity_score = max(scores.values()) if scores else 0.0
+
+    # Check for crisis content (self-harm or violence indicators)
+    is_crisis = (
+        # Self-harm indicators
+        scores.get("self-harm", 0) > 0.5
+        or scores.get("self-harm/intent", 0) > 0.3
+        or scores.get("self-harm/instructions", 0) > 0.3
+        # Violence indicators
+        or scores.get("violence", 0) > 0.5
+        or scores.get("violence/graphic", 0) > 0.3
+    )
+
+    return {
+        "flagged": flagged,
+        "categories": categories,
+        "category_scores": scores,
+        "severity_score": severity_score,
+        "is_crisis": is_crisis,
+    }
+
+
+def _cached_fields(result) -> dict:
+    """The part of a result stored in the moderation cache: the API's raw output."""
+    return {
+        "flagged": result["flagged"],
+        "categories": result["categories"],
+        "category_scores": result["category_scores"],
+    }
+
+
+def _from_cache(cached) -> dict:
+    """Re-derive a check_content() dict from a cached entry."""
+    return _verdict(
+        cached.get("flagged", False),
+        cached.get("categories") or {},
+        cached.get("category_scores") or {},
+    )
 
 
 class AIContentModerator:
@@ -55,19 +155,41 @@ class AIContentModerator:
     Returns flagging decisions, severity scores, and crisis detection.
     """
 
-    def __init__(self):
-        self._client = None
+    def __init__(self, client=None):
+        # Any object with the openai client's moderations.create() interface
+        self._client = client
+        self.cache = ModerationCache()
+        self.caller = ResilientCaller()
+
+    @property
+    def model_version(self) -> str:
+        """Version tag for cached results: the moderation model in use."""
+        from .fake_moderation import FakeModerationClient
+
+        if isinstance(self.client, FakeModerationClient):
+            return FakeModerationClient.model_version
+        return getattr(settings, "MODERATION_MODEL", "omni-moderation-latest")
 
     @property
     def client(self):
-        """Lazy initialization of OpenAI client."""
+        """Lazy initialization of OpenAI client (or the fake one, see fake_moderation.py)."""
         if self._client is None:
+            if getattr(settings, "MODERATION_CLIENT", "openai") == "fake":
+                from .fake_moderation import FakeModerationClient
+
+                self._client = FakeModerationClient()
+                return self._client
             api_key = getattr(settings, "OPENAI_API_KEY", None)
             if not api_key:
                 return None
             try:
                 from openai import OpenAI
-                self._client = OpenAI(api_key=api_key)
+                # Retries are left to the ResilientCaller
+                self._client = OpenAI(
+                    api_key=api_key,
+                    timeout=getattr(settings, "MODERATION_TIMEOUT_SECONDS", MODERATION_TIMEOUT_SECONDS),
+                    max_retries=0,
+                )
             except ImportError:
                 logger.warning("openai package not installed. AI moderation disabled.")
                 return None
@@ -92,66 +214,117 @@ class AIContentModerator:
                 - is_crisis: bool - Whether self-harm content was detected
                 - error: str (optional) - Error message if API call failed
         """
+        return self.check_contents([text])[0]
+
+    def check_contents(self, texts: list[str]) -> list[dict]:
+        """
+        Check several texts, sending up to MAX_BATCH_INPUTS of them per API call.
+
+        Results are looked up in the content-hash cache first (see
+        moderation_cache.py; severity and crisis are re-derived from the
+        cached scores), and text the local pre-classifier rates clearly
+        benign can skip the API (moderation_preclassifier.py); only distinct
+        remaining texts are sent. Returns one check_content() result per
+        text, in order. If a call fails (or the circuit breaker is open),
+        each of its texts gets a result with an "error" key and is_crisis
+        from quick_crisis_check().
+        """
         # Return safe defaults if no API key or client
         if not self.client:
-            return {
-                "flagged": False,
-                "categories": {},
-                "category_scores": {},
-                "severity_score": 0.0,
-                "is_crisis": False,
-                "error": "OpenAI API not configured",
-            }
+            return [_safe_result(error="OpenAI API not configured") for _ in texts]
 
+        results = [_safe_result() for _ in texts]
         # Skip very short content
-        if not text or len(text.strip()) < 3:
-            return {
-                "flagged": False,
-                "categories": {},
-                "category_scores": {},
-                "severity_score": 0.0,
-                "is_crisis": False,
-            }
+        pending = [i for i, text in enumerate(texts) if text and len(text.strip()) >= 3]
+        if not pending:
+            return results
+
+        # Identical texts (after normalization) reuse cached results
+        model_version = self.model_version
+        try:
+            cached = self.cache.get_many([texts[i] for i in pending], model_version)
+        except Exception as e:
+            logger.error(f"Moderation cache lookup failed: {e}")
+            cached = {}
+        for i in pending:
+            if texts[i] in cached:
+                results[i] = _from_cache(cached[texts[i]])
+        uncached = [i for i in pending if texts[i] not in cached]
+        uncached = self._skip_benign(texts, uncached, results)
+
+        # Each distinct uncached text (after normalization) is sent once
+        to_send = {}  # content hash -> text sent
+        for i in uncached:
+            to_send.setdefault(content_hash(texts[i]), texts[i])
+        chunks = list(to_send.items())
+
+        fresh = {}  # content hash -> result
+        for start in range(0, len(chunks), MAX_BATCH_INPUTS):
+            chunk = chunks[start:start + MAX_BATCH_INPUTS]
+            inputs = [text for _, text in chunk]
+            try:
+                response = self.caller.call(
+                    lambda timeout: self.client.moderations.create(
+                        model=model_version, input=inputs, timeout=timeout
+                    )
+                )
+                for (digest, _), result in zip(chunk, response.results):
+                    fresh[digest] = _parse_result(result)
+            except Exception as e:
+                logger.error(f"OpenAI Moderation API error: {e}")
+                for digest, text in chunk:
+                    fresh[digest] = _safe_result(error=str(e), text=text)
 
+        for i in uncached:
+            results[i] = fresh[content_hash(texts[i])]
+        self._record_shadow(list(to_send.values()), [fresh[digest] for digest in to_send])
         try:
-            response = self.client.moderations.create(input=text)
-            result = response.results[0]
-
-            categories = result.categories.model_dump()
-            scores = result.category_scores.model_dump()
-
-            # Calculate severity score (max across all categories)
-            severity_score = max(scores.values()) if scores else 0.0
-
-            # Check for crisis content (self-harm or violence indicators)
-            is_crisis = (
-                # Self-harm indicators
-                scores.get("self-harm", 0) > 0.5
-                or scores.get("self-harm/intent", 0) > 0.3
-                or scores.get("self-harm/instructions", 0) > 0.3
-                # Violence indicators
-                or scores.get("violence", 0) > 0.5
-                or scores.get("violence/graphic", 0) > 0.3
+            self.cache.set_many(
+                {
+                    to_send[digest]: _cached_fields(result)
+                    for digest, result in fresh.items()
+                    if "error" not in result
+                },
+                model_version,
             )
+        except Exception as e:
+            logger.error(f"Moderation cache update failed: {e}")
+        return results
 
-            return {
-                "flagged": result.flagged,
-                "categories": categories,
-                "category_scores": scores,
-                "severity_score": severity_score,
-                "is_crisis": is_crisis,
-            }
+    def _skip_benign(self, texts, indexes, results):
+        """
+        Give texts the pre-classifier rates clearly benign a result without an API call.
 
+        Only in MODERATION_PRECLASSIFIER "on" mode; returns the indexes still to send.
+        """
+        from . import moderation_preclassifier
+
+        classifier = moderation_preclassifier.get_preclassifier()
+        if classifier is None or moderation_preclassifier.mode() != moderation_preclassifier.ON:
+            return indexes
+        try:
+            benign = classifier.benign_mask([texts[i] for i in indexes])
+        except Exception as e:
+            logger.error(f"Moderation pre-classifier failed: {e}")
+            return indexes
+        for i, skip in zip(indexes, benign):
+            if skip:
+                results[i] = _skipped_result()
+        return [i for i, skip in zip(indexes, benign) if not skip]
+
+    def _record_shadow(self, texts, results):
+        """In MODERATION_PRECLASSIFIER "shadow" mode, compare the pre-classifier with the API."""
+        from . import moderation_preclassifier
+
+        if not texts or moderation_preclassifier.mode() != moderation_preclassifier.SHADOW:
+            return
+        classifier = moderation_preclassifier.get_preclassifier()
+        if classifier is None:
+            return
+        try:
+            classifier.record_shadow(texts, results)
         except Exception as e:
-            logger.error(f"OpenAI Moderation API error: {e}")
-            return {
-                "flagged": False,
-                "categories": {},
-                "category_scores": {},
-                "severity_score": 0.0,
-                "is_crisis": False,
-                "error": str(e),
-            }
+            logger.error(f"Moderation pre-classifier failed: {e}")
 
     def get_top_categories(self, category_scores: dict, threshold: float = 0.3) -> list[str]:
         """
@@ -178,35 +351,17 @@ def get_moderator() -> AIContentModerator:
     return _moderator_instance
 
 
-def run_moderation_async(post_id: int, text: str):
+def run_moderation_async(job_id: int) -> bool:
     """
-    Run AI moderation in background thread.
+    Process a queued ModerationJob on this process's bounded background pool.
 
-    Updates the post's ai_flagged, ai_severity_score, ai_categories,
-    and show_crisis_resources fields after moderation completes.
+    The result is written by moderation_queue.apply_result(), as by the
+    moderation worker. The job stays in the queue until then, so if the
+    pool's queue is full, moderation fails or the process shuts down
+    first, the worker handles it instead (see moderation_executor.py).
+    Returns whether the pool accepted the job.
     """
-    def _moderate():
-        try:
-            # Import here to avoid circular imports
-            from posting.models import Post
-
-            moderator = get_moderator()
-            result = moderator.check_content(text)
-
-            logger.info(f"Async moderation for post {post_id}: flagged={result.get('flagged')}, is_crisis={result.get('is_crisis')}")
-
-            # Update post with moderation results
-            Post.objects.filter(pk=post_id).update(
-                ai_flagged=result.get("flagged", False),
-                ai_severity_score=result.get("severity_score"),
-                ai_categories=result.get("category_scores"),
-                show_crisis_resources=result.get("is_crisis", False),
-                is_flagged=result.get("flagged", False),  # Auto-flag for human review
-            )
-
-        except Exception as e:
-            logger.error(f"Async moderation failed for post {post_id}: {e}")
+    from .moderation_executor import get_executor
+    from .moderation_queue import moderate_job_now
 
-    # Run in background thread
-    thread = threading.Thread(target=_moderate, daemon=True)
-    thread.start()
+    return get_executor().submit(moderate_job_now, job_id)
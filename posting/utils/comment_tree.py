@@ -0,0 +1,87 @@
+"""
+Flat, render-ready comment threads built from materialized paths.
+
+Comment.objects.subtrees() returns whole threads in depth-first (path)
+order with a single indexed query. build_thread() turns that list into
+the sequence of comments the templates render, in one pass over the rows,
+so no template needs to recurse or query comment.replies per level.
+
+Usage:
+    roots = [...]  # top-level comments already chosen for display
+    thread = load_thread(roots)
+    for comment in thread: comment.depth, comment.hidden_replies_count
+"""
+
+from collections import Counter
+
+from ..models import Comment
+
+# Deepest level rendered inline; deeper replies are summarised on their parent
+MAX_INLINE_DEPTH = 4
+
+
+def build_thread(roots, comments, max_depth=MAX_INLINE_DEPTH):
+    """
+    Arrange path-ordered comments into the flat list a thread renders as.
+
+    Args:
+        roots: Subtree roots, in the order their subtrees should appear
+        comments: Every comment of those subtrees, ordered by path
+        max_depth: Deepest absolute depth to render, or None for no limit
+
+    Soft-deleted comments are kept only while something beneath them is
+    still shown, so a thread keeps its shape without dangling placeholders.
+    Each rendered comment gets hidden_replies_count: its direct replies
+    beyond max_depth that were loaded but not rendered.
+    """
+    hidden_replies = Counter()
+    shown = []
+    for comment in comments:
+        if max_depth is not None and comment.depth > max_depth:
+            hidden_replies[comment.parent_comment_id] += 1
+        else:
+            shown.append(comment)
+
+    # Children follow their parent in path order, so a reverse pass sees
+    # every descendant before deciding whether to keep a deleted comment
+    keep = set()
+    has_kept_reply = set()
+    for comment in reversed(shown):
+        if (
+            not comment.is_deleted
+            or comment.pk in has_kept_reply
+            or hidden_replies[comment.pk]
+        ):
+            keep.add(comment.pk)
+            has_kept_reply.add(comment.parent_comment_id)
+
+    by_root = {root.path: [] for root in roots}
+    prefix_lengths = {len(path) for path in by_root}
+    for comment in shown:
+        if comment.pk not in keep:
+            continue
+        comment.hidden_replies_count = hidden_replies[comment.pk]
+        for length in prefix_lengths:
+            subtree = by_root.get(comment.path[:length])
+            if subtree is not None:
+                subtree.append(comment)
+                break
+
+    return [comment for root in roots for comment in by_root[root.path]]
+
+
+def load_thread(roots, max_depth=MAX_INLINE_DEPTH):
+    """
+    Fetch and flatten the subtrees under roots with one query.
+
+    Rows one level below max_depth are read (not rendered) so parents at
+    the cutoff can report how many replies are collapsed.
+    """
+    roots = list(roots)
+    if not roots:
+        return []
+    fetch_depth = None if max_depth is None else max_depth + 1
+    comments = Comment.objects.subtrees(roots, max_depth=fetch_depth).select_related(
+        "author"
+    )
+    return build_thread(roots, comments, max_depth=max_depth)
@@ -0,0 +1,126 @@
+"""
+Sharded vote counters for posts.
+
+Every vote shifts its post's stored counters (upvotes_count, downvotes_count,
+score, render_version), so when a post goes viral all of its voters queue on
+that one row lock. With settings.VOTE_COUNTER_SHARDS = N, the counter change
+goes to one of N VoteCounterShard rows for the post, chosen at random, and
+concurrent votes mostly lock different rows:
+
+- writes: add_vote_deltas() upserts the change into a random shard; comment
+  votes record a zero change so the post's card is still refreshed
+- reads: vote_counts() returns the stored counters plus the sum of the
+  shards in one query, for the vote response; the feed keeps reading the
+  stored counters, which lag by up to the fold interval
+- folding: fold_counter_shards() (run by `python manage.py flush_votes`)
+  moves the accumulated changes into the post row, one update per post per
+  batch, and bumps render_version once for all of them
+
+Usage:
+    add_vote_deltas(post.pk, 1, 0)
+    upvotes, downvotes = vote_counts(post.pk)
+    fold_counter_shards()
+"""
+
+import logging
+import random
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.functions import Coalesce
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def shard_count():
+    """Number of counter shards per post; 0 means counters are not sharded."""
+    return max(getattr(settings, "VOTE_COUNTER_SHARDS", 0), 0)
+
+
+def is_enabled():
+    """Whether vote counter changes go to shard rows instead of the post row."""
+    return shard_count() > 0
+
+
+def add_vote_deltas(post_id, upvotes, downvotes):
+    """Add a vote counter change to one of the post's shards, chosen at random."""
+    from ..models import VoteCounterShard
+
+    shard = random.randrange(shard_count())
+    shard_rows = VoteCounterShard.objects.filter(post_id=post_id, shard=shard)
+    change = {
+        "upvotes": F("upvotes") + upvotes,
+        "downvotes": F("downvotes") + downvotes,
+        "changes": F("changes") + 1,
+    }
+    # Shard rows are kept once created, so this is usually the only query
+    if shard_rows.update(**change):
+        return
+    VoteCounterShard.objects.bulk_create(
+        [VoteCounterShard(post_id=post_id, shard=shard)], ignore_conflicts=True
+    )
+    shard_rows.update(**change)
+
+
+def vote_counts(post_id):
+    """Return the post's (upvotes, downvotes), including unfolded shard changes."""
+    from ..models import Post
+
+    return (
+        Post.objects.filter(pk=post_id)
+        .annotate(
+            total_upvotes=F("upvotes_count") + Coalesce(Sum("counter_shards__upvotes"), 0),
+            total_downvotes=F("downvotes_count") + Coalesce(Sum("counter_shards__downvotes"), 0),
+        )
+        .values_list("total_upvotes", "total_downvotes")
+        .get()
+    )
+
+
+def fold_counter_shards(batch_size=DEFAULT_BATCH_SIZE):
+    """Fold one batch of changed shards into their posts. Returns the number of shards folded."""
+    from ..models import Post, VoteCounterShard
+
+    with transaction.atomic():
+        rows = list(
+            VoteCounterShard.objects.select_for_update(skip_locked=True)
+            .filter(changes__gt=0)
+            .order_by("pk")
+            .values_list("pk", "post_id", "upvotes", "downvotes", "changes")[:batch_size]
+        )
+        if not rows:
+            return 0
+
+        totals = defaultdict(lambda: [0, 0])  # post_id -> [upvotes, downvotes]
+        for pk, post_id, upvotes, downvotes, changes in rows:
+            # Subtract what was read rather than zeroing, in case a vote landed since
+            VoteCounterShard.objects.filter(pk=pk).update(
+                upvotes=F("upvotes") - upvotes,
+                downvotes=F("downvotes") - downvotes,
+                changes=F("changes") - changes,
+            )
+            totals[post_id][0] += upvotes
+            totals[post_id][1] += downvotes
+
+        for post_id, (upvotes, downvotes) in totals.items():
+            if not Post.objects.apply_vote_deltas(post_id, upvotes, downvotes):
+                # Only comment votes (or changes that cancelled out) since the last fold
+                Post.objects.bump_render_version(post_id)
+
+    logger.debug(f"Folded {len(rows)} counter shard(s) into {len(totals)} post(s)")
+    return len(rows)
+
+
+def fold_all_counter_shards(batch_size=DEFAULT_BATCH_SIZE):
+    """Fold batches until no shard has changes left. Returns the number of shards folded."""
+    folded = 0
+    while True:
+        count = fold_counter_shards(batch_size)
+        folded += count
+        if count < batch_size:
+            return folded
@@ -0,0 +1,211 @@
+"""
+Crisis and abuse term matching, from built-in keywords plus a DB lexicon.
+
+Every post and comment save scans its text (Post.save() / Comment.save()
+call apply_lexicon()), so matching must stay cheap at the 5000-character
+comment limit. All terms are compiled into one regular expression:
+
+- plain terms are merged into a character trie and emitted as a single
+  alternation with shared prefixes (one pass over the text, little
+  backtracking), e.g. "kill myself", "kill yourself" -> kill\\s+(?:my|your)self,
+  matched as whole words: not preceded or followed by a word character
+- regex terms (CRISIS_KEYWORDS and LexiconTerm.is_regex rows) are added as
+  alternatives; a pattern that doesn't compile is logged and left out
+- each category is a named group, so one scan finds all categories
+- text is lower-cased once instead of matching case-insensitively, which
+  is about twice as fast; regex terms must therefore be written in lower case
+
+The compiled Lexicon is immutable; get_lexicon() swaps in a new one
+atomically when the LexiconTerm table changes. Saving or deleting a term
+reloads the lexicon in that process at once; other processes notice the
+change (count and latest update of the table) within RELOAD_CHECK_SECONDS.
+If the table can't be read, the last lexicon (or the built-in keywords) is
+used. `python manage.py benchmark_crisis_check` reports the cost per call.
+
+Usage:
+    get_lexicon().scan(text)       # {"crisis", "abuse"} or a subset
+    get_lexicon().is_crisis(text)
+"""
+
+import logging
+import re
+import threading
+import time
+from typing import Optional
+
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+CRISIS = "crisis"
+ABUSE = "abuse"
+CATEGORIES = (CRISIS, ABUSE)
+
+# Built-in crisis keywords, always checked (regexes)
+CRISIS_KEYWORDS = [
+    r'\b(suicid|kill\s*(my)?self|end\s*(my)?\s*life|want\s*to\s*die)\b',
+    r'\b(self[- ]?harm|cutting\s*myself|hurt\s*myself)\b',
+    r'\b(don\'?t\s*want\s*to\s*live|no\s*reason\s*to\s*live)\b',
+    r'\b(overdose|take\s*pills|slit\s*wrist)\b',
+]
+
+# Seconds between checks of the LexiconTerm table for changes
+RELOAD_CHECK_SECONDS = 10
+
+
+def normalize_term(term):
+    """Lower-case a plain term and collapse its whitespace."""
+    return " ".join(term.lower().split())
+
+
+def _trie_pattern(terms):
+    """A single regex alternation matching exactly the given plain terms."""
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def emit(node):
+        branches = [
+            (r"\s+" if char == " " else re.escape(char)) + emit(child)
+            for char, child in sorted(node.items())
+            if char
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            # A shorter term ends here
+            return f"(?:{body})?"
+        return body
+
+    return emit(trie)
+
+
+class Lexicon:
+    """Compiled crisis and abuse terms."""
+
+    def __init__(self, terms=()):
+        """terms: (text, category, is_regex) tuples, added to the built-in keywords."""
+        plain = {category: set() for category in CATEGORIES}
+        patterns = {category: [] for category in CATEGORIES}
+        patterns[CRISIS].extend(CRISIS_KEYWORDS)
+        for text, category, is_regex in terms:
+            if category not in plain:
+                continue
+            if not is_regex:
+                term = normalize_term(text)
+                if term:
+                    plain[category].add(term)
+                continue
+            try:
+                re.compile(text)
+            except re.error as e:
+                logger.error(f"Ignoring invalid lexicon pattern {text!r}: {e}")
+                continue
+            patterns[category].append(text)
+
+        groups = {}
+        for category in CATEGORIES:
+            alternatives = list(patterns[category])
+            if plain[category]:
+                # Lookarounds rather than \b, so terms may start or end with punctuation
+                alternatives.append(rf"(?<!\w){_trie_pattern(plain[category])}(?!\w)")
+            if alternatives:
+                groups[category] = "|".join(f"(?:{pattern})" for pattern in alternatives)
+        self.size = sum(len(plain[c]) + len(patterns[c]) for c in CATEGORIES)
+        self._pattern = re.compile(
+            "|".join(f"(?P<{category}>{pattern})" for category, pattern in groups.items())
+        )
+        self._crisis = re.compile(groups[CRISIS])
+
+    def is_crisis(self, text) -> bool:
+        """Whether text contains a crisis term."""
+        return bool(text) and self._crisis.search(text.lower()) is not None
+
+    def scan(self, text) -> set:
+        """The categories of the terms found in text."""
+        found = set()
+        if not text:
+            return found
+        for match in self._pattern.finditer(text.lower()):
+            found.add(match.lastgroup)
+            if len(found) == len(CATEGORIES):
+                break
+        return found
+
+
+# Built-in keywords only, used until the table has been read
+_lexicon = Lexicon()
+_fingerprint: Optional[tuple] = None
+_checked_at: Optional[float] = None
+_reload_lock = threading.Lock()
+
+
+def _table_fingerprint():
+    from django.db.models import Count, Max
+
+    from ..models import LexiconTerm
+
+    stats = LexiconTerm.objects.aggregate(count=Count("pk"), latest=Max("updated_at"))
+    return stats["count"], stats["latest"]
+
+
+def _load():
+    from ..models import LexiconTerm
+
+    return Lexicon(
+        LexiconTerm.objects.filter(is_active=True).values_list("term", "category", "is_regex")
+    )
+
+
+def get_lexicon() -> Lexicon:
+    """The current lexicon, reloaded when the LexiconTerm table has changed."""
+    global _lexicon, _fingerprint, _checked_at
+    now = time.monotonic()
+    if _checked_at is not None and now - _checked_at < RELOAD_CHECK_SECONDS:
+        return _lexicon
+    # One thread checks; the others keep using the current lexicon meanwhile
+    if not _reload_lock.acquire(blocking=False):
+        return _lexicon
+    try:
+        _checked_at = now
+        # In a savepoint, so a failed read can't break the caller's transaction
+        with transaction.atomic():
+            fingerprint = _table_fingerprint()
+            if fingerprint != _fingerprint:
+                lexicon = _load()
+                _lexicon, _fingerprint = lexicon, fingerprint
+                logger.info(f"Loaded crisis lexicon with {lexicon.size} terms")
+    except Exception as e:
+        logger.error(f"Failed to reload crisis lexicon: {e}")
+    finally:
+        _reload_lock.release()
+    return _lexicon
+
+
+def invalidate_lexicon():
+    """Make the next get_lexicon() call in this process check the table again."""
+    global _checked_at, _fingerprint
+    _checked_at = None
+    _fingerprint = None
+
+
+def apply_lexicon(obj, text):
+    """
+    Set show_crisis_resources / is_flagged on a post or comment whose text matches.
+
+    Flags are only ever turned on. Returns the names of the fields changed.
+    """
+    changed = []
+    found = get_lexicon().scan(text)
+    if CRISIS in found and not obj.show_crisis_resources:
+        obj.show_crisis_resources = True
+        changed.append("show_crisis_resources")
+    if ABUSE in found and not obj.is_flagged:
+        # Held for human review, like posts the moderation API flags
+        obj.is_flagged = True
+        changed.append("is_flagged")
+    return changed
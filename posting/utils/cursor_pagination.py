@@ -0,0 +1,169 @@
+"""
+Keyset (cursor) pagination for the home feed and comment threads.
+
+Offset pagination needs a COUNT for the page range and an OFFSET scan that
+gets slower the deeper you page. Keyset pagination instead continues from
+the last row already shown, using a WHERE clause on the sort columns, so
+every page costs the same single indexed query.
+
+Cursors are opaque URL-safe tokens encoding (sort field, sort key,
+created_at, pk) of a boundary row. created_at and pk break ties so the
+ordering is total; the sort field keeps a cursor from one sort (e.g. the
+recent feed) from being applied to another.
+
+Usage:
+    page = paginate_by_cursor(posts, sort_field="score", after=request.GET.get("after"))
+    for post in page: ...
+    page.next_cursor, page.previous_cursor
+"""
+
+import base64
+import binascii
+import json
+import logging
+from datetime import datetime
+from typing import Optional
+
+from django.db.models import Q
+
+logger = logging.getLogger(__name__)
+
+
+def encode_cursor(key, created_at: datetime, pk: int, sort_field: Optional[str] = None) -> str:
+    """Encode a boundary row's (sort key, created_at, pk) under sort_field as an opaque token."""
+    payload = json.dumps([sort_field, key, created_at.isoformat(), pk], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: Optional[str], sort_field: Optional[str] = None) -> Optional[tuple]:
+    """
+    Decode a cursor token for sort_field back into (sort key, created_at, pk).
+
+    Returns None for missing or malformed tokens, and for tokens built for
+    another sort field, so callers can fall back to the first page instead
+    of erroring on a tampered or reused URL.
+    """
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        field, key, created_at, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if field != sort_field:
+            raise ValueError(f"cursor is for sort field {field!r}")
+        if sort_field is None:
+            if key is not None:
+                raise ValueError("unexpected sort key")
+        elif isinstance(key, bool) or not isinstance(key, (int, float)):
+            raise ValueError("sort key must be numeric")
+        return key, datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, TypeError, binascii.Error) as e:
+        logger.debug(f"Ignoring invalid feed cursor {token!r}: {e}")
+        return None
+
+
+class CursorPage:
+    """
+    One page of keyset-paginated results.
+
+    Iterable like a Paginator page, with next_cursor/previous_cursor
+    tokens in place of page numbers.
+    """
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+def _keyset_filter(sort_field, cursor, forward=True, descending=True):
+    """Build the WHERE clause selecting rows strictly after (or before) cursor."""
+    key, created_at, pk = cursor
+    op = "lt" if forward == descending else "gt"
+
+    condition = Q(**{f"created_at__{op}": created_at}) | Q(
+        created_at=created_at, **{f"pk__{op}": pk}
+    )
+    if sort_field:
+        condition = Q(**{f"{sort_field}__{op}": key}) | (Q(**{sort_field: key}) & condition)
+    return condition
+
+
+def cursor_for(obj, sort_field=None):
+    """Return the cursor token pointing at obj as a page boundary."""
+    key = getattr(obj, sort_field) if sort_field else None
+    return encode_cursor(key, obj.created_at, obj.pk, sort_field)
+
+
+def paginate_by_cursor(
+    queryset, sort_field=None, after=None, before=None, per_page=12, descending=True
+):
+    """
+    Return a CursorPage of queryset ordered by (sort_field, created_at, pk).
+
+    Args:
+        queryset: Rows to paginate; any existing ordering is replaced
+        sort_field: Primary sort column (e.g. "score"), or None to order by time
+        after: Cursor token; return the page following this row
+        before: Cursor token; return the page preceding this row
+        per_page: Maximum number of rows per page
+        descending: Newest/highest first (feed) or oldest first (comment threads)
+
+    Fetches per_page + 1 rows to learn whether another page exists,
+    so no COUNT query is needed.
+    """
+    fields = ([sort_field] if sort_field else []) + ["created_at", "pk"]
+    ordering = [f"-{field}" for field in fields] if descending else fields
+
+    before_cursor = decode_cursor(before, sort_field)
+    if before_cursor:
+        reverse_ordering = fields if descending else [f"-{field}" for field in fields]
+        rows = list(
+            queryset.filter(
+                _keyset_filter(sort_field, before_cursor, forward=False, descending=descending)
+            ).order_by(*reverse_ordering)[: per_page + 1]
+        )
+        if rows:
+            has_previous = len(rows) > per_page
+            rows = rows[:per_page][::-1]
+            return CursorPage(
+                rows,
+                next_cursor=cursor_for(rows[-1], sort_field),
+                previous_cursor=cursor_for(rows[0], sort_field) if has_previous else None,
+            )
+        # Nothing before the cursor any more - show the first page instead
+
+    after_cursor = None if before_cursor else decode_cursor(after, sort_field)
+    queryset = queryset.order_by(*ordering)
+    if after_cursor:
+        queryset = queryset.filter(
+            _keyset_filter(sort_field, after_cursor, forward=True, descending=descending)
+        )
+
+    rows = list(queryset[: per_page + 1])
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+    return CursorPage(
+        rows,
+        next_cursor=cursor_for(rows[-1], sort_field) if has_next else None,
+        previous_cursor=cursor_for(rows[0], sort_field) if after_cursor and rows else None,
+    )
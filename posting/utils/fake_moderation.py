@@ -0,0 +1,114 @@
+"""
+Local stand-in for the OpenAI moderation client.
+
+Answers client.moderations.create(input=...) in the same shape as the
+openai package (results with flagged, categories and category_scores),
+scoring text with simple keyword rules instead of a network call:
+
+- text matching the crisis keywords scores high on self-harm
+- text containing one of flag_terms scores high on harassment
+
+To exercise the resilience of the caller (moderation_resilience.py), each
+call can take `latency` seconds and fail at random with `error_rate`; a call
+slower than the timeout it is given sleeps for the timeout and raises
+FakeModerationTimeout, like the openai client's own request timeout.
+
+Select it with MODERATION_CLIENT=fake to run the moderation worker without
+an API key, or pass it to AIContentModerator(client=...) in tests.
+
+Usage:
+    client = FakeModerationClient(fail_times=2)
+    moderator = AIContentModerator(client=client)
+    moderator.check_content("text")  # raises twice via the client, then answers
+    slow = FakeModerationClient(latency=0.5, error_rate=0.2)
+"""
+
+import random
+import time
+from types import SimpleNamespace
+
+DEFAULT_FLAG_TERMS = ("hate", "idiot")
+
+CATEGORIES = [
+    "harassment",
+    "hate",
+    "self-harm",
+    "self-harm/intent",
+    "self-harm/instructions",
+    "sexual",
+    "violence",
+    "violence/graphic",
+]
+
+
+class FakeModerationError(Exception):
+    """Raised by FakeModerationClient for its simulated failures."""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        # HTTP status of the simulated failure; None like a connection error
+        self.status_code = status_code
+
+
+class FakeModerationTimeout(FakeModerationError):
+    """Raised when a simulated call takes longer than its timeout."""
+
+
+class _Model(dict):
+    """Dict with the pydantic model_dump() the moderator calls."""
+
+    def model_dump(self):
+        return dict(self)
+
+
+class FakeModerationClient:
+    """Keyword-based moderation client with the openai client's interface."""
+
+    # Version tag for results cached from this client
+    model_version = "fake-keywords"
+
+    def __init__(self, flag_terms=DEFAULT_FLAG_TERMS, fail_times=0, latency=0.0,
+                 error_rate=0.0, status_code=None, seed=None):
+        self.flag_terms = tuple(term.lower() for term in flag_terms)
+        # Number of upcoming calls that raise FakeModerationError
+        self.fail_times = fail_times
+        # Seconds each call takes, and the chance that it then fails
+        self.latency = latency
+        self.error_rate = error_rate
+        # HTTP status of simulated failures (None, 429, 500, 400, ...)
+        self.status_code = status_code
+        self._random = random.Random(seed)
+        # Inputs of every call, in order
+        self.calls = []
+        self.moderations = SimpleNamespace(create=self._create)
+
+    def _create(self, input, timeout=None, **kwargs):
+        self.calls.append(input)
+        if self.latency:
+            if timeout is not None and self.latency > timeout:
+                time.sleep(timeout)
+                raise FakeModerationTimeout(f"Simulated timeout after {timeout:.2f}s")
+            time.sleep(self.latency)
+        if self.fail_times > 0:
+            self.fail_times -= 1
+            raise FakeModerationError("Simulated moderation failure", self.status_code)
+        if self.error_rate and self._random.random() < self.error_rate:
+            raise FakeModerationError("Simulated moderation failure", self.status_code)
+        texts = [input] if isinstance(input, str) else list(input)
+        return SimpleNamespace(results=[self._score(text) for text in texts])
+
+    def _score(self, text):
+        from .ai_moderator import quick_crisis_check
+
+        lowered = text.lower()
+        scores = {category: 0.01 for category in CATEGORIES}
+        if quick_crisis_check(text):
+            scores.update({"self-harm": 0.9, "self-harm/intent": 0.8})
+        if any(term in lowered for term in self.flag_terms):
+            scores["harassment"] = 0.9
+        categories = {category: score >= 0.5 for category, score in scores.items()}
+        return SimpleNamespace(
+            flagged=any(categories.values()),
+            categories=_Model(categories),
+            category_scores=_Model(scores),
+        )
@@ -0,0 +1,58 @@
+"""
+Shared cache of rendered feed pages.
+
+Apart from vote highlighting and owner-only controls, a feed page is the
+same for every user, so the rendered feed section is cached under its
+query string (sort, tag, q and cursor) and shared. A cache hit runs no
+feed queries at all: owner controls and CSRF tokens are resolved from the
+request by apply_viewer_state(), and home.js fetches the viewer's votes
+for the visible posts and comments from posting:vote_state.
+
+Every cached page key includes a generation number. posting.signals bumps
+it after posts are created, edited, hidden or deleted, comments are edited
+or deleted, or tags change, which invalidates all cached pages at once.
+Votes and new comments don't: bumping on every one would leave the cache
+almost always cold, so their score and count changes appear within
+FEED_PAGE_CACHE_SECONDS (the voter's own highlights come from
+posting:vote_state right away). The same bound applies to writes that
+bypass the signals and, with the default per-process cache, to writes made
+by other worker processes.
+
+Usage:
+    key = feed_page_key(request.GET)
+    html = cache.get(key)
+"""
+
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.utils.http import urlencode
+
+FEED_PAGE_CACHE_SECONDS = 30
+GENERATION_KEY = "posting:feed_generation"
+
+
+def _generation():
+    """Current feed generation, starting a fresh one if the key was evicted."""
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # A new starting point, so pages cached under an evicted generation never match
+        cache.add(GENERATION_KEY, time.time_ns(), None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def invalidate_feed_pages():
+    """Invalidate every cached feed page."""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, time.time_ns(), None)
+
+
+def feed_page_key(params):
+    """Cache key for the feed page addressed by the GET params (a QueryDict)."""
+    query = urlencode(sorted((key, value) for key, values in params.lists() for value in values))
+    digest = hashlib.md5(query.encode()).hexdigest()
+    return f"posting:feed_page:{_generation()}:{digest}"
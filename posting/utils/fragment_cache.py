@@ -0,0 +1,125 @@
+"""
+Rendered HTML cache for feed post cards.
+
+Each card (post header, body, actions and its inline comment thread) is
+rendered once per post version and reused by every viewer. Post.render_version
+is bumped by every write that changes the card - edits, moderation, post and
+comment votes, new, edited or deleted comments - and is part of the cache key
+together with the displayed timestamp and search snippet, so a bumped
+version is never served stale even by another worker process's cache.
+
+Cached HTML contains no viewer-specific state. The templates emit markers
+instead, which apply_viewer_state() resolves per request:
+
+- vote buttons: a marker that becomes "active" for the viewer's own votes
+- owner-only controls ({% owneronly author_id %}): kept for the author and
+  staff, removed for everyone else
+- CSRF tokens: a placeholder swapped for the request's token
+
+Markers are HTML comments, which escaped user content can never contain.
+
+Usage:
+    cards = render_post_cards(page, prepare=attach_comment_threads)
+    html = apply_viewer_state(cards[post.pk], request, user_votes, user_comment_votes)
+"""
+
+import hashlib
+import re
+from functools import lru_cache
+
+from django.core.cache import cache
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+from django.utils.crypto import salted_hmac
+from django.utils.safestring import mark_safe
+
+# Upper bound on reuse; covers the inputs not tracked by render_version
+# (author display names and avatars)
+FRAGMENT_CACHE_SECONDS = 600
+CARD_TEMPLATE = "posting/components/post_card.html"
+
+_VOTE_PATTERN = re.compile(r"<!--fc:vote:(post|comment):(\d+):(UPVOTE|DOWNVOTE)-->")
+_OWNER_PATTERN = re.compile(r"<!--fc:owner:(\d*)-->(.*?)<!--fc:/owner-->", re.DOTALL)
+
+
+@lru_cache(maxsize=1)
+def csrf_placeholder():
+    """Stand-in CSRF token rendered into cached HTML; unguessable, stable across processes."""
+    return salted_hmac("posting.fragment_cache", "csrf-placeholder").hexdigest()
+
+
+def vote_marker(kind, pk, vote_type):
+    """Marker resolved to "active" when the viewer cast vote_type on the object."""
+    return f"<!--fc:vote:{kind}:{pk}:{vote_type}-->"
+
+
+def owner_block(author_id, content):
+    """Wrap content that only the author (and staff) should see."""
+    return f"<!--fc:owner:{author_id or ''}-->{content}<!--fc:/owner-->"
+
+
+def apply_viewer_state(html, request, post_votes=None, comment_votes=None):
+    """
+    Resolve the viewer markers in rendered HTML for request.user.
+
+    post_votes and comment_votes are {id: vote_type} dicts of the viewer's
+    votes on the objects in html.
+    """
+    user = request.user
+    post_votes = post_votes or {}
+    comment_votes = comment_votes or {}
+
+    def vote_class(match):
+        kind, pk, vote_type = match.groups()
+        votes = post_votes if kind == "post" else comment_votes
+        return "active" if votes.get(int(pk)) == vote_type else ""
+
+    def owner_content(match):
+        author_id, content = match.groups()
+        is_owner = author_id != "" and author_id == str(user.pk)
+        return content if is_owner or user.is_staff else ""
+
+    html = _OWNER_PATTERN.sub(owner_content, html)
+    html = _VOTE_PATTERN.sub(vote_class, html)
+    return mark_safe(html.replace(csrf_placeholder(), get_token(request)))
+
+
+def card_cache_key(post):
+    """Cache key for a post's card: id, render version and time-dependent inputs."""
+    from ..templatetags.posting_tags import smart_date
+
+    # smart_date is relative ("5 minutes ago") for new posts
+    varying = "|".join([
+        post.created_at.isoformat(),
+        smart_date(post.created_at),
+        getattr(post, "search_snippet", ""),
+    ])
+    digest = hashlib.md5(varying.encode()).hexdigest()
+    return f"posting:post_card:{post.pk}:v{post.render_version}:{digest}"
+
+
+def render_post_cards(posts, prepare=None):
+    """
+    Return {post id: card HTML} for posts, rendering only uncached cards.
+
+    prepare(posts) is called with just the cache misses before they are
+    rendered, so data only the template needs (comment threads) is loaded
+    for those alone. The returned HTML still needs apply_viewer_state().
+    """
+    keys = {card_cache_key(post): post for post in posts}
+    cards = {keys[key].pk: html for key, html in cache.get_many(list(keys)).items()}
+
+    misses = [post for post in posts if post.pk not in cards]
+    if misses:
+        if prepare is not None:
+            prepare(misses)
+        rendered = {}
+        for key, post in keys.items():
+            if post.pk in cards:
+                continue
+            html = render_to_string(
+                CARD_TEMPLATE, {"post": post, "csrf_token": csrf_placeholder()}
+            )
+            rendered[key] = cards[post.pk] = html
+        cache.set_many(rendered, FRAGMENT_CACHE_SECONDS)
+    return cards
@@ -0,0 +1,125 @@
+"""
+Micro-batching of moderation calls from concurrent callers.
+
+The moderation endpoint takes a list of inputs, so N texts cost one round
+trip instead of N. ModerationBatcher.check_content() has the same interface
+as AIContentModerator.check_content(), but instead of calling the API itself
+it hands the text to a collector thread and waits. The collector sends
+whatever arrived within MAX_WAIT_SECONDS of the first text (or as soon as
+MAX_BATCH_SIZE texts are waiting) in one check_contents() call and hands
+each caller its own result.
+
+The moderation worker doesn't need this: it already sends each claimed
+batch of jobs in one call (see moderation_queue.py). The background pool,
+which moderates one new post or comment per thread, goes through
+get_batcher() instead.
+
+Usage:
+    result = get_batcher().check_content(text)
+    results = get_batcher().check_contents(texts)
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Optional
+
+from django.db import close_old_connections, connections
+
+from .ai_moderator import MAX_BATCH_INPUTS, get_moderator
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_SIZE = MAX_BATCH_INPUTS
+MAX_WAIT_SECONDS = 0.05
+
+
+class ModerationBatcher:
+    """Collects texts from concurrent callers into batched moderation calls."""
+
+    def __init__(self, moderator=None, max_batch_size=MAX_BATCH_SIZE, max_wait=MAX_WAIT_SECONDS):
+        self._moderator = moderator
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        # Number of check_contents() calls made, for tests and benchmarks
+        self.batches_sent = 0
+
+    @property
+    def moderator(self):
+        return self._moderator or get_moderator()
+
+    def submit(self, text) -> Future:
+        """Queue text for the next batch; the Future resolves to its result dict."""
+        future = Future()
+        self._ensure_collector()
+        self._queue.put((text, future))
+        return future
+
+    def check_content(self, text, timeout=None) -> dict:
+        """Moderate text as part of a batch, blocking until its result is in."""
+        return self.submit(text).result(timeout=timeout)
+
+    def check_contents(self, texts, timeout=None) -> list[dict]:
+        """Moderate several texts as part of batches, in order."""
+        futures = [self.submit(text) for text in texts]
+        return [future.result(timeout=timeout) for future in futures]
+
+    def _ensure_collector(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._collect, name="moderation-batcher", daemon=True
+                )
+                self._thread.start()
+
+    def _next_batch(self):
+        """Block for a first text, then gather more until the window closes or the batch is full."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _collect(self):
+        while True:
+            batch = self._next_batch()
+            # The result cache queries the database from this long-lived
+            # thread: drop connections past CONN_MAX_AGE or broken (e.g. by
+            # a database restart) before the batch, and don't hold one idle
+            # between batches
+            close_old_connections()
+            try:
+                results = self.moderator.check_contents([text for text, _ in batch])
+                self.batches_sent += 1
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                logger.error(f"Batched moderation failed for {len(batch)} text(s): {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            finally:
+                connections.close_all()
+
+
+# Singleton instance for reuse
+_batcher_instance: Optional[ModerationBatcher] = None
+
+
+def get_batcher() -> ModerationBatcher:
+    """Get or create the process-wide batcher (using the shared moderator)."""
+    global _batcher_instance
+    if _batcher_instance is None:
+        _batcher_instance = ModerationBatcher()
+    return _batcher_instance
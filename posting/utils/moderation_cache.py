@@ -0,0 +1,149 @@
+"""
+Moderation results cached by normalized content hash.
+
+Texts are normalized (Unicode NFKC, case-folded, whitespace collapsed) and
+hashed with SHA-256, so "Same" and "  same " share one result. Lookups go
+through two levels before AIContentModerator calls the API:
+
+- an in-process LRU of the most recent LRU_SIZE results
+- the ModerationResult table, shared by all processes
+
+Every result is tagged with the moderation model that produced it, so
+changing MODERATION_MODEL starts a fresh cache, and results older than
+MODERATION_CACHE_TTL_DAYS are ignored (and deleted by purge_expired()).
+Failed calls are never cached, and only the API's own output (flag,
+categories and scores) is stored: AIContentModerator re-derives severity
+and crisis from the scores on every lookup.
+
+Usage:
+    cache = ModerationCache()
+    found = cache.get_many(texts, model_version)  # {text: result}
+    cache.set_many({text: result}, model_version)
+"""
+
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+LRU_SIZE = 4096
+
+
+def normalize(text):
+    """Canonical form of text for hashing: NFKC, case-folded, single spaces."""
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+def content_hash(text):
+    """SHA-256 hex digest of the normalized text."""
+    return hashlib.sha256(normalize(text).encode()).hexdigest()
+
+
+def ttl():
+    """How long results are reused, or None when the cache is disabled."""
+    days = getattr(settings, "MODERATION_CACHE_TTL_DAYS", 30)
+    return timedelta(days=days) if days > 0 else None
+
+
+class ModerationCache:
+    """In-process LRU in front of the ModerationResult table."""
+
+    def __init__(self, size=LRU_SIZE):
+        self.size = size
+        self._lru = OrderedDict()  # (model_version, hash) -> (result, created_at)
+        self._lock = threading.Lock()
+        # Lookups answered by each level, for tests and benchmarks
+        self.lru_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    def _lru_get(self, key, cutoff):
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is None or entry[1] < cutoff:
+                return None
+            self._lru.move_to_end(key)
+            return entry[0]
+
+    def _lru_set(self, key, result, created_at):
+        with self._lock:
+            self._lru[key] = (result, created_at)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.size:
+                self._lru.popitem(last=False)
+
+    def get_many(self, texts, model_version):
+        """Return {text: cached result} for the texts with a fresh cached result."""
+        from ..models import ModerationResult
+
+        lifetime = ttl()
+        if lifetime is None:
+            return {}
+        cutoff = timezone.now() - lifetime
+
+        found, missing = {}, {}
+        for text in set(texts):
+            key = (model_version, content_hash(text))
+            result = self._lru_get(key, cutoff)
+            if result is not None:
+                found[text] = result
+                self.lru_hits += 1
+            else:
+                missing.setdefault(key[1], []).append(text)
+
+        if missing:
+            rows = ModerationResult.objects.filter(
+                content_hash__in=list(missing),
+                model_version=model_version,
+                created_at__gte=cutoff,
+            ).values_list("content_hash", "result", "created_at")
+            for digest, result, created_at in rows:
+                self._lru_set((model_version, digest), result, created_at)
+                for text in missing.pop(digest):
+                    found[text] = result
+                    self.db_hits += 1
+        self.misses += sum(len(group) for group in missing.values())
+        return found
+
+    def set_many(self, results, model_version):
+        """Store {text: result} for model_version, replacing any older results."""
+        from ..models import ModerationResult
+
+        if ttl() is None or not results:
+            return
+        now = timezone.now()
+        rows = {}
+        for text, result in results.items():
+            digest = content_hash(text)
+            self._lru_set((model_version, digest), result, now)
+            rows[digest] = ModerationResult(
+                content_hash=digest, model_version=model_version, result=result, created_at=now
+            )
+        ModerationResult.objects.bulk_create(
+            list(rows.values()),
+            update_conflicts=True,
+            unique_fields=["content_hash", "model_version"],
+            update_fields=["result", "created_at"],
+        )
+
+    def clear(self):
+        """Empty the in-process LRU (the table is left alone)."""
+        with self._lock:
+            self._lru.clear()
+
+
+def purge_expired():
+    """Delete stored results past the TTL. Returns the number deleted."""
+    from ..models import ModerationResult
+
+    lifetime = ttl()
+    if lifetime is None:
+        return ModerationResult.objects.all().delete()[0]
+    return ModerationResult.objects.filter(created_at__lt=timezone.now() - lifetime).delete()[0]
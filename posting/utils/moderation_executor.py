@@ -0,0 +1,185 @@
+"""
+Bounded per-process pool for background moderation.
+
+run_moderation_async() used to start a thread per post. Tasks now go to a
+fixed pool of MODERATION_EXECUTOR_WORKERS threads through a queue of at
+most MODERATION_EXECUTOR_QUEUE_SIZE tasks, so a burst of posts can't
+multiply threads or database connections:
+
+- backpressure: when the queue is full, submit() returns False and the
+  task's fallback runs instead. run_moderation_async() needs none: the
+  forms have already queued a ModerationJob, which the moderation worker
+  processes if the pool doesn't
+- failures: a task that raises is counted and its fallback runs too
+- connections: each worker thread closes its database connections after
+  every task
+- shutdown: shutdown() (registered with atexit) stops accepting tasks,
+  lets the workers finish the queue for up to DRAIN_TIMEOUT_SECONDS, and
+  runs the fallback of anything still queued, so no task is silently lost
+
+stats() reports queued, running, completed, failed and deferred counts
+(also shown by the moderation_status view).
+
+Usage:
+    get_executor().submit(moderate_job_now, job_id)
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from typing import Optional
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Seconds shutdown() waits for queued tasks before deferring the rest
+DRAIN_TIMEOUT_SECONDS = 10
+
+# Queue item that stops a worker thread
+_STOP = object()
+
+
+class ModerationExecutor:
+    """Fixed-size thread pool with a bounded queue and per-task fallbacks."""
+
+    def __init__(self, max_workers=None, queue_size=None):
+        self.max_workers = max_workers or getattr(settings, "MODERATION_EXECUTOR_WORKERS", 4)
+        queue_size = queue_size or getattr(settings, "MODERATION_EXECUTOR_QUEUE_SIZE", 100)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._threads = []
+        self._accepting = True
+        # Counters for stats()
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.deferred = 0
+
+    def submit(self, fn, *args, fallback=None) -> bool:
+        """
+        Queue fn(*args) to run on a worker thread.
+
+        Returns False, after running fallback(), if the executor is shut
+        down or the queue is full. fallback also runs if fn raises.
+        """
+        with self._lock:
+            accepting = self._accepting
+            if accepting:
+                self._start_workers()
+        if accepting:
+            try:
+                self._queue.put_nowait((fn, args, fallback))
+                return True
+            except queue.Full:
+                logger.warning("Moderation executor queue full; deferring task")
+        self._defer(fallback)
+        return False
+
+    def _start_workers(self):
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+        while len(self._threads) < self.max_workers:
+            thread = threading.Thread(
+                target=self._work, name=f"moderation-executor-{len(self._threads)}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                return
+            fn, args, fallback = item
+            with self._lock:
+                self.running += 1
+            try:
+                fn(*args)
+            except Exception as e:
+                logger.error(f"Background moderation task failed: {e}")
+                with self._lock:
+                    self.failed += 1
+                self._defer(fallback)
+            else:
+                with self._lock:
+                    self.completed += 1
+            finally:
+                with self._lock:
+                    self.running -= 1
+                # Connections are per thread; don't leave this one open between tasks
+                connections.close_all()
+                self._queue.task_done()
+
+    def _defer(self, fallback):
+        if fallback is None:
+            return
+        with self._lock:
+            self.deferred += 1
+        try:
+            fallback()
+        except Exception as e:
+            logger.error(f"Deferring background moderation task failed: {e}")
+
+    def shutdown(self, timeout=DRAIN_TIMEOUT_SECONDS):
+        """
+        Stop accepting tasks and drain the queue for up to timeout seconds.
+
+        Tasks still queued after that are taken off the queue and deferred.
+        Returns the number of tasks deferred this way.
+        """
+        with self._lock:
+            self._accepting = False
+            threads = [thread for thread in self._threads if thread.is_alive()]
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline and threads:
+            time.sleep(0.01)
+
+        left = 0
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._queue.task_done()
+            if item is not _STOP:
+                left += 1
+                self._defer(item[2])
+        for _ in threads:
+            try:
+                self._queue.put_nowait(_STOP)
+            except queue.Full:
+                break
+        if left:
+            logger.warning(f"Moderation executor shut down with {left} task(s) deferred")
+        return left
+
+    def stats(self) -> dict:
+        """Counts of queued, running, completed, failed and deferred tasks."""
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "queued": self._queue.qsize(),
+                "running": self.running,
+                "completed": self.completed,
+                "failed": self.failed,
+                "deferred": self.deferred,
+            }
+
+
+# Singleton instance for reuse
+_executor_instance: Optional[ModerationExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ModerationExecutor:
+    """Get or create the process-wide executor, drained at interpreter exit."""
+    global _executor_instance
+    with _executor_lock:
+        if _executor_instance is None:
+            _executor_instance = ModerationExecutor()
+            atexit.register(_executor_instance.shutdown)
+        return _executor_instance
@@ -0,0 +1,250 @@
+"""
+Local pre-classifier that lets clearly benign text skip the moderation API.
+
+Most posts and comments score near zero in every moderation category. A
+TF-IDF + logistic regression model (scikit-learn, as for TagSuggester) is
+trained on text that has already been moderated, and predicts the chance
+that the API would consider a text risky:
+
+- risky: hidden by a moderator, flagged by the API, or with a top category
+  score of at least RISKY_SCORE
+- benign: everything else with a stored API result
+
+Text moderated by the pre-classifier itself is never used for training, and
+text matching the crisis keywords is always sent to the API.
+
+The skip threshold is calibrated on held-out data for a target recall: the
+share of risky validation texts that would still reach the API. It is
+never above MAX_SKIP_THRESHOLD, so only confidently benign text is skipped.
+`python manage.py calibrate_preclassifier` trains, reports skip rate and
+recall per threshold, and saves the model to MODERATION_PRECLASSIFIER_PATH.
+
+settings.MODERATION_PRECLASSIFIER selects the mode:
+- "off": not used
+- "shadow": every text still goes to the API; agreement with the API is
+  logged and counted, to check the model before trusting it
+- "on": texts below the threshold get a benign result without an API call
+
+Usage:
+    classifier = get_preclassifier()
+    benign = classifier.benign_mask(texts)
+"""
+
+import logging
+import os
+import threading
+from typing import Optional
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .ai_moderator import quick_crisis_check
+
+logger = logging.getLogger(__name__)
+
+# Top category score from which stored text counts as risky for training
+RISKY_SCORE = 0.2
+DEFAULT_TARGET_RECALL = 0.99
+# Text is only skipped below this predicted risk, however well separated
+# the validation data is ("confidently benign")
+MAX_SKIP_THRESHOLD = 0.1
+MIN_TRAINING_SAMPLES = 200
+
+OFF = "off"
+SHADOW = "shadow"
+ON = "on"
+
+
+def mode():
+    """The configured pre-classifier mode: "off", "shadow" or "on"."""
+    return getattr(settings, "MODERATION_PRECLASSIFIER", OFF)
+
+
+def _is_risky(severity_score, categories, ai_flagged, hidden):
+    if hidden or ai_flagged:
+        return True
+    if severity_score is None:
+        severity_score = max((categories or {}).values(), default=0.0)
+    return severity_score >= RISKY_SCORE
+
+
+def training_data():
+    """Return (texts, labels) from moderated posts and comments; label 1 is risky."""
+    from ..models import Comment, Post
+
+    texts, labels = [], []
+    posts = Post.objects.filter(ai_severity_score__isnull=False).values_list(
+        "title", "body", "ai_severity_score", "ai_categories", "ai_flagged", "is_hidden"
+    )
+    for title, body, score, categories, ai_flagged, hidden in posts.iterator():
+        texts.append(f"{title}\n\n{body}")
+        labels.append(int(_is_risky(score, categories, ai_flagged, hidden)))
+
+    # Comment deletions mix moderator hides with authors' own deletes, so
+    # only the API verdict is used for comments
+    comments = Comment.objects.filter(ai_severity_score__isnull=False).filter(
+        Q(is_deleted=False) | Q(ai_flagged=True)
+    ).values_list("body", "ai_severity_score", "ai_categories", "ai_flagged")
+    for body, score, categories, ai_flagged in comments.iterator():
+        texts.append(body)
+        labels.append(int(_is_risky(score, categories, ai_flagged, False)))
+    return texts, labels
+
+
+def threshold_for_recall(risky_probabilities, target_recall):
+    """
+    Highest skip threshold that keeps at least target_recall of the risky
+    texts, capped at MAX_SKIP_THRESHOLD.
+    """
+    ranked = sorted(risky_probabilities)
+    if not ranked:
+        return 0.0
+    # Texts with probability below the threshold are skipped, so at most
+    # this many risky texts may fall below it
+    allowed_misses = int(len(ranked) * (1 - target_recall) + 1e-9)
+    return min(ranked[allowed_misses], MAX_SKIP_THRESHOLD)
+
+
+class PreClassifier:
+    """A trained text pipeline and the probability below which text is skipped."""
+
+    def __init__(self, pipeline, threshold, report=None):
+        self.pipeline = pipeline
+        self.threshold = threshold
+        self.report = report or {}
+        self._lock = threading.Lock()
+        # Shadow mode agreement with the API
+        self.shadow_agreed = 0
+        self.shadow_disagreed = 0
+        # Texts the API flagged that the pre-classifier would have skipped
+        self.shadow_missed = 0
+
+    def risk_scores(self, texts):
+        """Predicted probability that each text is risky."""
+        return list(self.pipeline.predict_proba(texts)[:, 1])
+
+    def benign_mask(self, texts):
+        """Whether each text is confidently benign (safe to skip the API)."""
+        return [
+            score < self.threshold and not quick_crisis_check(text)
+            for text, score in zip(texts, self.risk_scores(texts))
+        ]
+
+    def record_shadow(self, texts, results):
+        """Compare predictions with the API results for the same texts and log them."""
+        for text, benign, result in zip(texts, self.benign_mask(texts), results):
+            if "error" in result:
+                continue
+            api_risky = result["flagged"] or result["severity_score"] >= RISKY_SCORE
+            with self._lock:
+                if benign == (not api_risky):
+                    self.shadow_agreed += 1
+                else:
+                    self.shadow_disagreed += 1
+                    if benign:
+                        self.shadow_missed += 1
+            if benign and api_risky:
+                logger.warning(
+                    f"Pre-classifier would have skipped text the API rated risky "
+                    f"(severity {result['severity_score']:.2f})"
+                )
+        logger.info(
+            f"Pre-classifier shadow: {self.shadow_agreed} agreed, "
+            f"{self.shadow_disagreed} disagreed, {self.shadow_missed} risky missed"
+        )
+
+    def save(self, path):
+        """Write the model to path with joblib."""
+        import joblib
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        joblib.dump(
+            {"pipeline": self.pipeline, "threshold": self.threshold, "report": self.report},
+            path,
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Read a model written by save()."""
+        import joblib
+
+        data = joblib.load(path)
+        return cls(data["pipeline"], data["threshold"], data["report"])
+
+
+def train_preclassifier(target_recall=DEFAULT_TARGET_RECALL, validation_fraction=0.25,
+                        min_samples=MIN_TRAINING_SAMPLES, random_state=0):
+    """
+    Train a PreClassifier on stored moderation results.
+
+    Returns (classifier, report), or (None, report) when there is too little
+    data. The report has the validation recall and skip rate for the chosen
+    threshold and for a range of other thresholds.
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.model_selection import train_test_split
+    from sklearn.pipeline import make_pipeline
+
+    texts, labels = training_data()
+    risky = sum(labels)
+    report = {"samples": len(texts), "risky": risky, "target_recall": target_recall}
+    if len(texts) < min_samples or risky < 2 or risky == len(texts):
+        report["error"] = (
+            f"Need at least {min_samples} moderated texts with both classes "
+            f"(have {len(texts)}, {risky} risky)"
+        )
+        return None, report
+
+    train_texts, val_texts, train_labels, val_labels = train_test_split(
+        texts, labels, test_size=validation_fraction, stratify=labels, random_state=random_state
+    )
+    pipeline = make_pipeline(
+        TfidfVectorizer(ngram_range=(1, 2), min_df=1, sublinear_tf=True),
+        LogisticRegression(class_weight="balanced", max_iter=1000),
+    )
+    pipeline.fit(train_texts, train_labels)
+
+    scores = pipeline.predict_proba(val_texts)[:, 1]
+    risky_scores = [score for score, label in zip(scores, val_labels) if label]
+    threshold = threshold_for_recall(risky_scores, target_recall)
+
+    def evaluate(candidate):
+        skipped = [score < candidate for score in scores]
+        missed = sum(1 for skip, label in zip(skipped, val_labels) if skip and label)
+        return {
+            "threshold": round(float(candidate), 4),
+            "recall": 1 - missed / len(risky_scores),
+            "skip_rate": sum(skipped) / len(skipped),
+        }
+
+    report.update(evaluate(threshold))
+    report["curve"] = [evaluate(candidate) for candidate in (0.01, 0.02, 0.05, 0.1, 0.2, 0.3, 0.5)]
+    report["trained_at"] = timezone.now().isoformat()
+    return PreClassifier(pipeline, float(threshold), report), report
+
+
+# Loaded model, reloaded when the file on disk changes
+_classifier_instance: Optional[PreClassifier] = None
+_classifier_mtime: Optional[float] = None
+
+
+def get_preclassifier() -> Optional[PreClassifier]:
+    """Return the saved pre-classifier, or None if off or not trained yet."""
+    global _classifier_instance, _classifier_mtime
+    if mode() == OFF:
+        return None
+    path = settings.MODERATION_PRECLASSIFIER_PATH
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    if mtime != _classifier_mtime:
+        try:
+            _classifier_instance = PreClassifier.load(path)
+        except Exception as e:
+            logger.error(f"Failed to load moderation pre-classifier from {path}: {e}")
+            _classifier_instance = None
+        _classifier_mtime = mtime
+    return _classifier_instance
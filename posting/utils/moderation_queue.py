@@ -0,0 +1,271 @@
+"""
+Database-backed queue for AI moderation of posts and comments.
+
+Saving a post or comment must not wait on the moderation API, so saves only
+apply the local crisis lexicon (crisis_lexicon.py) and PostForm/CommentForm
+enqueue a ModerationJob in the same transaction.atomic() block as the save
+(and the post's tags), so a saved post or comment always has its job.
+Once committed, the forms also hand the job to this process's bounded
+background pool (run_moderation_async(), see moderation_executor.py), which
+usually moderates it within moments; the job stays queued meanwhile, so
+whatever the pool can't take or finish is left to
+`python manage.py moderation_worker`, which:
+
+- claims a batch of due jobs with a lease (SELECT ... FOR UPDATE SKIP LOCKED
+  on PostgreSQL, so several workers can run side by side); a job whose
+  worker died is claimed again once its lease expires
+- moderates the current text of each post or comment, the whole batch in
+  one API call, and writes the AI fields (ai_flagged, ai_severity_score,
+  ai_categories, show_crisis_resources, and is_flagged when flagged)
+- deletes finished jobs; failed ones are retried after an exponential
+  backoff, and dead-lettered (status DEAD, with the last error) after
+  MAX_ATTEMPTS claims
+
+Usage:
+    job_id = enqueue_moderation(ModerationJob.POST, post.pk)
+    process_moderation_jobs(batch_size=32)
+"""
+
+import logging
+import os
+import socket
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .ai_moderator import get_moderator, quick_crisis_check
+from .feed_cache import invalidate_feed_pages
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 32
+LEASE_SECONDS = 120
+MAX_ATTEMPTS = 5
+# Retry delays: 30 s, 1 min, 2 min, ... capped at an hour
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 3600
+
+
+def default_worker_id():
+    """Lease owner name for this process."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue_moderation(target, object_id):
+    """
+    Queue a post or comment for moderation, unless a job is already waiting for it.
+
+    Returns the id of the new or waiting job.
+    """
+    from ..models import ModerationJob
+
+    # A waiting job reads the latest text when it runs; a leased one may
+    # already have read an older version, so it doesn't count
+    job_id = (
+        ModerationJob.objects.filter(
+            target=target, object_id=object_id, status=ModerationJob.PENDING
+        )
+        .values_list("pk", flat=True)
+        .first()
+    )
+    if job_id is None:
+        job_id = ModerationJob.objects.create(target=target, object_id=object_id).pk
+    return job_id
+
+
+def retry_delay(attempts):
+    """Backoff before the next attempt of a job that has failed `attempts` times."""
+    return timedelta(seconds=min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS))
+
+
+def claim_jobs(worker_id, batch_size=DEFAULT_BATCH_SIZE, lease_seconds=LEASE_SECONDS, job_ids=None):
+    """Lease up to batch_size due jobs (including expired leases), or only those of job_ids, to worker_id."""
+    from ..models import ModerationJob
+
+    now = timezone.now()
+    with transaction.atomic():
+        due = ModerationJob.objects.select_for_update(skip_locked=True).filter(
+            Q(status=ModerationJob.PENDING, run_after__lte=now)
+            | Q(status=ModerationJob.LEASED, leased_until__lt=now)
+        )
+        if job_ids is not None:
+            due = due.filter(pk__in=job_ids)
+        jobs = list(due.order_by("run_after", "pk")[:batch_size])
+        leased_until = now + timedelta(seconds=lease_seconds)
+        ModerationJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status=ModerationJob.LEASED,
+            leased_until=leased_until,
+            lease_owner=worker_id,
+            attempts=F("attempts") + 1,
+        )
+    for job in jobs:
+        job.status = ModerationJob.LEASED
+        job.leased_until = leased_until
+        job.lease_owner = worker_id
+        job.attempts += 1
+    return jobs
+
+
+def moderation_text(target, obj):
+    """The text sent for moderation: title and body for posts, the body for comments."""
+    from ..models import ModerationJob
+
+    if target == ModerationJob.POST:
+        return f"{obj.title}\n\n{obj.body}"
+    return obj.body
+
+
+def _load_texts(jobs):
+    """Return {job pk: (object, text)} for jobs whose post or comment still exists."""
+    from ..models import Comment, ModerationJob, Post
+
+    objects = {}
+    for target, model in ((ModerationJob.POST, Post), (ModerationJob.COMMENT, Comment)):
+        ids = [job.object_id for job in jobs if job.target == target]
+        if ids:
+            objects[target] = model.objects.in_bulk(ids)
+    texts = {}
+    for job in jobs:
+        obj = objects.get(job.target, {}).get(job.object_id)
+        if obj is not None:
+            texts[job.pk] = (obj, moderation_text(job.target, obj))
+    return texts
+
+
+def result_fields(text, result):
+    """
+    The AI field values a check_content() result gives a post or comment.
+
+    is_flagged is only included when the result is flagged: flags for human
+    review are added, never cleared.
+    """
+    flagged = result.get("flagged", False)
+    fields = {
+        "ai_flagged": flagged,
+        "ai_severity_score": result.get("severity_score"),
+        "ai_categories": result.get("category_scores"),
+        # The inline keyword check stays on even if the API disagrees
+        "show_crisis_resources": result.get("is_crisis", False) or quick_crisis_check(text),
+    }
+    if flagged:
+        # Auto-flag for human review
+        fields["is_flagged"] = True
+    return fields
+
+
+def apply_result(target, obj, text, result):
+    """Write a check_content() result to the post or comment."""
+    from ..models import ModerationJob, Post
+
+    fields = result_fields(text, result)
+    if target == ModerationJob.POST:
+        Post.objects.filter(pk=obj.pk).update(**fields, render_version=F("render_version") + 1)
+    else:
+        type(obj).objects.filter(pk=obj.pk).update(**fields)
+        # Comments are part of their post's cached feed card
+        Post.objects.bump_render_version(obj.post_id)
+    transaction.on_commit(invalidate_feed_pages)
+
+
+def complete_job(job):
+    """Remove a finished job, unless its lease was lost to another worker."""
+    from ..models import ModerationJob
+
+    ModerationJob.objects.filter(pk=job.pk, lease_owner=job.lease_owner).delete()
+
+
+def fail_job(job, error):
+    """Schedule a retry of a failed job, or dead-letter it after MAX_ATTEMPTS."""
+    from ..models import ModerationJob
+
+    if job.attempts >= MAX_ATTEMPTS:
+        changes = {"status": ModerationJob.DEAD}
+        logger.error(f"Dead-lettered {job} after {job.attempts} attempts: {error}")
+    else:
+        changes = {
+            "status": ModerationJob.PENDING,
+            "run_after": timezone.now() + retry_delay(job.attempts),
+        }
+        logger.warning(f"Moderation of {job.target} #{job.object_id} failed, will retry: {error}")
+    ModerationJob.objects.filter(pk=job.pk, lease_owner=job.lease_owner).update(
+        leased_until=None, last_error=str(error), **changes
+    )
+
+
+def process_jobs(jobs, moderator=None):
+    """
+    Moderate leased jobs. Returns (completed, failed) counts.
+
+    All texts go to the API together (check_contents() sends up to
+    MAX_BATCH_INPUTS per call), then each result is written to its row.
+    """
+    moderator = moderator or get_moderator()
+    texts = _load_texts(jobs)
+    moderated = [job for job in jobs if job.pk in texts]
+    results = dict(zip(
+        [job.pk for job in moderated],
+        moderator.check_contents([texts[job.pk][1] for job in moderated]),
+    ))
+
+    completed = failed = 0
+    for job in jobs:
+        if job.pk not in texts:
+            # The post or comment was deleted since
+            complete_job(job)
+            completed += 1
+            continue
+        obj, text = texts[job.pk]
+        try:
+            result = results[job.pk]
+            if result.get("error"):
+                raise RuntimeError(result["error"])
+            with transaction.atomic():
+                apply_result(job.target, obj, text, result)
+                complete_job(job)
+            completed += 1
+        except Exception as e:
+            fail_job(job, e)
+            failed += 1
+    return completed, failed
+
+
+def process_moderation_jobs(batch_size=DEFAULT_BATCH_SIZE, worker_id=None, moderator=None):
+    """Claim and process one batch of jobs. Returns (completed, failed) counts."""
+    jobs = claim_jobs(worker_id or default_worker_id(), batch_size)
+    if not jobs:
+        return 0, 0
+    return process_jobs(jobs, moderator)
+
+
+def moderate_job_now(job_id, moderator=None):
+    """
+    Claim and process one job right away, unless a worker already has it.
+
+    Run by the background pool (see run_moderation_async()). Texts go
+    through the batcher, so posts moderated concurrently share API calls.
+    Raises if moderation failed; the job is then retried by the moderation
+    worker like any other.
+    """
+    from .moderation_batcher import get_batcher
+
+    jobs = claim_jobs(f"{default_worker_id()}:pool", job_ids=[job_id])
+    if not jobs:
+        return
+    _, failed = process_jobs(jobs, moderator or get_batcher())
+    if failed:
+        raise RuntimeError(f"Moderation job {job_id} failed; left to the moderation worker")
+
+
+def requeue_dead_jobs():
+    """Give every dead-lettered job a fresh set of attempts. Returns the number requeued."""
+    from ..models import ModerationJob
+
+    return ModerationJob.objects.filter(status=ModerationJob.DEAD).update(
+        status=ModerationJob.PENDING,
+        attempts=0,
+        run_after=timezone.now(),
+        leased_until=None,
+        lease_owner="",
+    )
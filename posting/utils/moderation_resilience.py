@@ -0,0 +1,274 @@
+"""
+Deadlines, retries, a circuit breaker and a concurrency cap for moderation calls.
+
+A slow or failing moderation API must not tie up the processes calling it.
+ResilientCaller wraps each call to client.moderations.create():
+
+- deadline: the call, retries included, gets MODERATION_TIMEOUT_SECONDS;
+  each attempt is passed the time left as its request timeout
+- retries: up to MODERATION_MAX_RETRIES more attempts for connection errors,
+  timeouts, 429 and 5xx, after an exponential backoff with full jitter that
+  must fit in the deadline
+- circuit breaker: once at least BREAKER_MIN_CALLS of the last BREAKER_WINDOW
+  attempts were made and MODERATION_BREAKER_ERROR_RATE of them failed, calls
+  fail fast for MODERATION_BREAKER_COOLDOWN_SECONDS; then a single probe call
+  decides whether to close it again
+- concurrency cap: at most MODERATION_MAX_IN_FLIGHT attempts per process;
+  callers wait for a slot only as long as their deadline allows
+
+Calls refused by the breaker or the cap raise ModerationUnavailable, which
+AIContentModerator turns into error results that still carry the local
+crisis keyword check. stats() reports breaker state, counters and recent
+latencies for monitoring (see the moderation_status view).
+
+Usage:
+    caller = ResilientCaller()
+    response = caller.call(lambda timeout: client.moderations.create(input=texts, timeout=timeout))
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DEADLINE_SECONDS = 10
+# Attempts the breaker's error rate is computed over
+BREAKER_WINDOW = 20
+# Attempts needed in the window before the breaker can open
+BREAKER_MIN_CALLS = 10
+# Backoff before retry n is uniform in [0, min(BACKOFF_CAP, BACKOFF_BASE * 2**n)]
+BACKOFF_BASE_SECONDS = 0.2
+BACKOFF_CAP_SECONDS = 2.0
+# Recent attempt latencies kept for stats()
+LATENCY_WINDOW = 200
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class ModerationUnavailable(Exception):
+    """Raised without calling the API when the breaker is open or the cap is reached."""
+
+
+def is_retryable(error) -> bool:
+    """Whether a failed attempt may succeed if repeated (not a 4xx other than 429)."""
+    if isinstance(error, ModerationUnavailable):
+        return False
+    status = getattr(error, "status_code", None)
+    return status is None or status == 429 or status >= 500
+
+
+class CircuitBreaker:
+    """Error-rate circuit breaker over the most recent attempts."""
+
+    def __init__(self, error_rate=None, cooldown=None, window=BREAKER_WINDOW,
+                 min_calls=BREAKER_MIN_CALLS, clock=time.monotonic):
+        self.error_rate = (
+            error_rate if error_rate is not None
+            else getattr(settings, "MODERATION_BREAKER_ERROR_RATE", 0.5)
+        )
+        self.cooldown = (
+            cooldown if cooldown is not None
+            else getattr(settings, "MODERATION_BREAKER_COOLDOWN_SECONDS", 30)
+        )
+        self.min_calls = min_calls
+        self.clock = clock
+        self._outcomes = deque(maxlen=window)  # True for a failed attempt
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = None
+        self._probing = False
+        # Times the breaker opened, for stats()
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == OPEN and self.clock() - self._opened_at >= self.cooldown:
+            self._state = HALF_OPEN
+            self._probing = False
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether an attempt may go ahead; in half-open state only one probe at a time."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record(self, failed: bool):
+        """Record the outcome of an attempt allowed by allow()."""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probing = False
+                if failed:
+                    self._open()
+                else:
+                    self._state = CLOSED
+                    self._outcomes.clear()
+                    logger.info("Moderation circuit breaker closed")
+                return
+            self._outcomes.append(failed)
+            failures = sum(self._outcomes)
+            if (
+                self._state == CLOSED
+                and len(self._outcomes) >= self.min_calls
+                and failures / len(self._outcomes) >= self.error_rate
+            ):
+                self._open()
+
+    def _open(self):
+        self._state = OPEN
+        self._opened_at = self.clock()
+        self._outcomes.clear()
+        self.trips += 1
+        logger.warning(
+            f"Moderation circuit breaker opened; failing fast for {self.cooldown}s"
+        )
+
+
+class ResilientCaller:
+    """Runs moderation calls under a deadline, retry policy, breaker and concurrency cap."""
+
+    def __init__(self, deadline=None, max_retries=None, max_in_flight=None, breaker=None,
+                 sleep=time.sleep, clock=time.monotonic):
+        # Deadline and retries are read from settings on each call unless given
+        self._deadline = deadline
+        self._max_retries = max_retries
+        self.max_in_flight = (
+            max_in_flight if max_in_flight is not None
+            else getattr(settings, "MODERATION_MAX_IN_FLIGHT", 4)
+        )
+        self.breaker = breaker or CircuitBreaker(clock=clock)
+        self.sleep = sleep
+        self.clock = clock
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self.in_flight = 0
+        # Counters for stats()
+        self.calls = 0
+        self.attempts = 0
+        self.retries = 0
+        self.failures = 0
+        self.rejected = 0
+        self.saturated = 0
+
+    @property
+    def deadline(self) -> float:
+        if self._deadline is not None:
+            return self._deadline
+        return getattr(settings, "MODERATION_TIMEOUT_SECONDS", DEFAULT_DEADLINE_SECONDS)
+
+    @property
+    def max_retries(self) -> int:
+        if self._max_retries is not None:
+            return self._max_retries
+        return getattr(settings, "MODERATION_MAX_RETRIES", 2)
+
+    def call(self, request):
+        """
+        Call request(timeout) until it succeeds, retries run out or the deadline passes.
+
+        request is passed the seconds left before the deadline and should
+        use them as its own timeout. Returns its result, or raises its last
+        error or ModerationUnavailable.
+        """
+        with self._lock:
+            self.calls += 1
+        expires = self.clock() + self.deadline
+        attempt = 0
+        while True:
+            try:
+                return self._attempt(request, expires)
+            except ModerationUnavailable:
+                raise
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                backoff = random.uniform(
+                    0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt)
+                )
+                if self.clock() + backoff >= expires:
+                    raise
+                logger.info(f"Moderation call failed, retrying in {backoff:.2f}s: {e}")
+                self.sleep(backoff)
+                attempt += 1
+                with self._lock:
+                    self.retries += 1
+
+    def _attempt(self, request, expires):
+        if not self._slots.acquire(timeout=max(0.0, expires - self.clock())):
+            with self._lock:
+                self.saturated += 1
+            raise ModerationUnavailable(
+                f"{self.max_in_flight} moderation calls already in flight"
+            )
+        if not self.breaker.allow():
+            self._slots.release()
+            with self._lock:
+                self.rejected += 1
+            raise ModerationUnavailable("Moderation circuit breaker is open")
+        with self._lock:
+            self.in_flight += 1
+            self.attempts += 1
+        started = self.clock()
+        try:
+            response = request(max(0.0, expires - started))
+        except Exception as e:
+            # 4xx other than 429 are our own mistakes, not an upstream problem
+            self.breaker.record(failed=is_retryable(e))
+            with self._lock:
+                self.failures += 1
+            raise
+        else:
+            self.breaker.record(failed=False)
+            return response
+        finally:
+            with self._lock:
+                self._latencies.append(self.clock() - started)
+                self.in_flight -= 1
+            self._slots.release()
+
+    def stats(self) -> dict:
+        """Breaker state, counters and latency percentiles (seconds) of recent attempts."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = {
+                "breaker": self.breaker.state,
+                "breaker_trips": self.breaker.trips,
+                "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight,
+                "calls": self.calls,
+                "attempts": self.attempts,
+                "retries": self.retries,
+                "failures": self.failures,
+                "rejected": self.rejected,
+                "saturated": self.saturated,
+            }
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 4)
+
+        stats["latency"] = {
+            "samples": len(latencies),
+            "p50": percentile(0.5),
+            "p95": percentile(0.95),
+            "max": round(latencies[-1], 4) if latencies else None,
+        }
+        return stats
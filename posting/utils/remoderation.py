@@ -0,0 +1,186 @@
+"""
+Resumable re-moderation of existing posts and comments.
+
+The AI fields are normally written once, by the moderation worker after a
+submit. After a change of moderation model or thresholds, `python manage.py
+remoderate` re-scores history with remoderate():
+
+- rows are streamed in primary key order with .iterator(), chunk_size at a
+  time, so memory stays flat however large the table
+- each chunk is split into API-sized batches that `workers` threads send
+  concurrently, at most `rate` calls per second (the moderator's own
+  concurrency cap and circuit breaker still apply)
+- rows whose results changed are written with one bulk_update() per chunk
+- after every chunk the last primary key is saved in a BackfillCheckpoint,
+  so an interrupted run resumes where it stopped
+
+Texts go through the moderator's content-hash cache, so a run with an
+unchanged MODERATION_MODEL mostly avoids API calls; the cache keeps only the
+API's scores, so changed thresholds still apply to cached texts. Texts the API
+couldn't score (errors) or that the pre-classifier skipped keep their
+current values.
+
+Usage:
+    stats = remoderate(ModerationJob.POST, chunk_size=500, workers=4, rate=5)
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections
+from django.db.models import F
+
+from .ai_moderator import MAX_BATCH_INPUTS, get_moderator
+from .feed_cache import invalidate_feed_pages
+
+DEFAULT_CHUNK_SIZE = 500
+DEFAULT_WORKERS = 4
+
+AI_FIELDS = ["ai_flagged", "ai_severity_score", "ai_categories", "show_crisis_resources", "is_flagged"]
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across threads (rate 0: no limit)."""
+
+    def __init__(self, rate, clock=time.monotonic, sleep=time.sleep):
+        self.interval = 1 / rate if rate else 0
+        self.clock = clock
+        self.sleep = sleep
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = self.clock()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            self.sleep(start - now)
+
+
+def checkpoint_name(target):
+    return f"remoderate:{target}"
+
+
+def reset_checkpoint(target):
+    """Forget the progress of earlier runs, so the next one starts from the beginning."""
+    from ..models import BackfillCheckpoint
+
+    BackfillCheckpoint.objects.filter(name=checkpoint_name(target)).delete()
+
+
+def _moderate_in_thread(moderator, limiter, texts):
+    limiter.wait()
+    try:
+        return moderator.check_contents(texts)
+    finally:
+        # Pool threads have their own connections (for the result cache)
+        connections.close_all()
+
+
+def _changed_fields(obj, text, result):
+    """Apply result to obj like the moderation worker would; return whether anything changed."""
+    from .moderation_queue import result_fields
+
+    values = result_fields(text, result)
+    changed = any(getattr(obj, field) != value for field, value in values.items())
+    for field, value in values.items():
+        setattr(obj, field, value)
+    return changed
+
+
+def remoderate(target, chunk_size=DEFAULT_CHUNK_SIZE, workers=DEFAULT_WORKERS, rate=0,
+               moderator=None, progress=None):
+    """
+    Re-moderate every post or comment after the saved checkpoint.
+
+    target is ModerationJob.POST or ModerationJob.COMMENT. progress, if
+    given, is called with the stats dict after each chunk. Returns stats:
+    processed, updated, skipped (by the pre-classifier), failed,
+    cache_hits (texts answered from the result cache), seconds and last_pk.
+    """
+    from ..models import BackfillCheckpoint, Comment, ModerationJob, Post
+    from .moderation_queue import moderation_text
+
+    moderator = moderator or get_moderator()
+    model = Post if target == ModerationJob.POST else Comment
+    checkpoint, _ = BackfillCheckpoint.objects.get_or_create(name=checkpoint_name(target))
+    limiter = RateLimiter(rate)
+    cache = moderator.cache
+    hits_before = cache.lru_hits + cache.db_hits
+    stats = {
+        "processed": 0,
+        "updated": 0,
+        "skipped": 0,
+        "failed": 0,
+        "cache_hits": 0,
+        "seconds": 0.0,
+        "last_pk": checkpoint.last_pk,
+    }
+    started = time.monotonic()
+
+    fields = ["pk", *AI_FIELDS, "body"] + (["title"] if model is Post else ["post_id"])
+    rows = model.objects.filter(pk__gt=checkpoint.last_pk).order_by("pk").only(*fields)
+
+    def run_chunk(chunk, pool):
+        texts = [moderation_text(target, obj) for obj in chunk]
+        batches = [texts[i:i + MAX_BATCH_INPUTS] for i in range(0, len(texts), MAX_BATCH_INPUTS)]
+        if pool is None:
+            results = []
+            for batch in batches:
+                limiter.wait()
+                results.append(moderator.check_contents(batch))
+        else:
+            results = pool.map(lambda batch: _moderate_in_thread(moderator, limiter, batch), batches)
+
+        changed = []
+        for obj, text, result in zip(chunk, texts, (r for batch in results for r in batch)):
+            if result.get("error"):
+                stats["failed"] += 1
+            elif result.get("skipped"):
+                stats["skipped"] += 1
+            elif _changed_fields(obj, text, result):
+                changed.append(obj)
+
+        if changed:
+            if model is Post:
+                for post in changed:
+                    post.render_version = F("render_version") + 1
+                Post.objects.bulk_update(changed, AI_FIELDS + ["render_version"])
+            else:
+                Comment.objects.bulk_update(changed, AI_FIELDS)
+                # Comments are part of their post's cached feed card
+                Post.objects.filter(pk__in={comment.post_id for comment in changed}).update(
+                    render_version=F("render_version") + 1
+                )
+            invalidate_feed_pages()
+
+        checkpoint.last_pk = chunk[-1].pk
+        checkpoint.processed += len(chunk)
+        checkpoint.save(update_fields=["last_pk", "processed", "updated_at"])
+        stats["processed"] += len(chunk)
+        stats["updated"] += len(changed)
+        stats["cache_hits"] = cache.lru_hits + cache.db_hits - hits_before
+        stats["seconds"] = time.monotonic() - started
+        stats["last_pk"] = checkpoint.last_pk
+        if progress:
+            progress(stats)
+
+    pool = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        chunk = []
+        for obj in rows.iterator(chunk_size=chunk_size):
+            chunk.append(obj)
+            if len(chunk) >= chunk_size:
+                run_chunk(chunk, pool)
+                chunk = []
+        if chunk:
+            run_chunk(chunk, pool)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    stats["seconds"] = time.monotonic() - started
+    return stats
@@ -0,0 +1,257 @@
+"""
+Full-text search over posts and their comments.
+
+Each post has one search document: title (highest weight), body, and the
+bodies of its visible comments. The document is indexed per database:
+
+- PostgreSQL: Post.search_vector, a weighted tsvector with a GIN index,
+  ranked with ts_rank and highlighted with ts_headline.
+- SQLite: the posting_post_fts FTS5 table (rowid = post id), ranked with
+  bm25() and highlighted with snippet().
+
+Other backends fall back to the old icontains filter. Documents are
+refreshed by Post.save / Comment.save / Comment.delete through
+index_post(); `python manage.py rebuild_search_index` rebuilds them all.
+FTS rows left behind by deleted posts never match, since search_posts()
+filters the posts table, and are cleared by the rebuild.
+
+Usage:
+    posts = search_posts(Post.objects.filter(is_hidden=False), "exam tips")
+    page = paginate_by_cursor(posts, sort_field="search_rank")
+    attach_search_snippets(page, "exam tips")
+"""
+
+import logging
+import re
+
+from django.db import connection
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+from django.utils.html import escape
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "posting_post_fts"
+# Text search configuration used for the PostgreSQL tsvector and queries
+SEARCH_CONFIG = "english"
+# Only the first few words of a query are matched
+MAX_QUERY_TERMS = 8
+# bm25 column weights for (title, body, comments)
+FTS_WEIGHTS = (10.0, 4.0, 1.0)
+SNIPPET_WORDS = 24
+
+# Highlight markers are control characters so they survive HTML escaping
+_MARK_START = "\x02"
+_MARK_END = "\x03"
+_TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def _backend():
+    """Return 'postgresql', 'sqlite' or None for the active search backend."""
+    return connection.vendor if connection.vendor in ("postgresql", "sqlite") else None
+
+
+def query_terms(query):
+    """Split a raw search box query into the words that are matched."""
+    return _TERM_PATTERN.findall(query.lower())[:MAX_QUERY_TERMS]
+
+
+def _fts_match(terms):
+    """
+    Build an FTS5 MATCH expression requiring every term.
+
+    The last term is a prefix match so results update while typing. Terms
+    are quoted, so FTS5 operators in user input are treated as words.
+    """
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _pg_search_query(terms):
+    """Build the equivalent PostgreSQL tsquery (all terms, last one prefix)."""
+    from django.contrib.postgres.search import SearchQuery
+
+    raw = " & ".join(terms[:-1] + [f"{terms[-1]}:*"])
+    return SearchQuery(raw, search_type="raw", config=SEARCH_CONFIG)
+
+
+def search_posts(queryset, query):
+    """
+    Filter queryset to posts matching query, annotated with search_rank.
+
+    search_rank is a float where higher means more relevant, so results
+    can be ordered (and keyset-paginated) on it like any stored column.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    backend = _backend()
+    if backend == "postgresql":
+        from django.contrib.postgres.search import SearchRank
+
+        search_query = _pg_search_query(terms)
+        # Cast the float4 rank to double so cursor values round-trip exactly
+        return queryset.filter(search_vector=search_query).annotate(
+            search_rank=Cast(SearchRank(F("search_vector"), search_query), FloatField())
+        )
+
+    if backend == "sqlite":
+        match = _fts_match(terms)
+        table = queryset.model._meta.db_table
+        weights = ", ".join(str(w) for w in FTS_WEIGHTS)
+        return queryset.filter(
+            pk__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (match,))
+        ).annotate(
+            # bm25() is lower-is-better, so negate it
+            search_rank=RawSQL(
+                f"SELECT -bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id",
+                (match,),
+                output_field=FloatField(),
+            )
+        )
+
+    return queryset.filter(
+        Q(title__icontains=query) | Q(body__icontains=query)
+    ).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+def _highlight(text):
+    """Escape a snippet and turn the highlight markers into <mark> tags."""
+    return (
+        escape(text)
+        .replace(_MARK_START, "<mark>")
+        .replace(_MARK_END, "</mark>")
+    )
+
+
+def attach_search_snippets(posts, query):
+    """
+    Set post.search_snippet to an HTML excerpt with matched words highlighted.
+
+    Runs one query for the given page of posts. On SQLite the excerpt comes
+    from whichever column (title, body or comments) matched best; on
+    PostgreSQL it is taken from the body.
+    """
+    posts = list(posts)
+    terms = query_terms(query)
+    backend = _backend()
+    if not posts or not terms or backend is None:
+        return
+
+    post_ids = [post.pk for post in posts]
+    snippets = {}
+    if backend == "postgresql":
+        from django.contrib.postgres.search import SearchHeadline
+
+        from ..models import Post
+
+        options = f"MaxWords={SNIPPET_WORDS}, MinWords={SNIPPET_WORDS // 2}"
+        snippets = dict(
+            Post.objects.filter(pk__in=post_ids)
+            .annotate(
+                snippet=SearchHeadline(
+                    "body",
+                    _pg_search_query(terms),
+                    config=SEARCH_CONFIG,
+                    start_sel=_MARK_START,
+                    stop_sel=_MARK_END,
+                    options=options,
+                )
+            )
+            .values_list("pk", "snippet")
+        )
+    else:
+        placeholders = ", ".join(["%s"] * len(post_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, snippet({FTS_TABLE}, -1, %s, %s, '...', {SNIPPET_WORDS}) "
+                f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid IN ({placeholders})",
+                [_MARK_START, _MARK_END, _fts_match(terms), *post_ids],
+            )
+            snippets = dict(cursor.fetchall())
+
+    for post in posts:
+        snippet = snippets.get(post.pk)
+        post.search_snippet = _highlight(snippet) if snippet else ""
+
+
+def _document_parts(post_ids):
+    """Return {post_id: (title, body, comments_text)} for the given posts."""
+    from ..models import Comment, Post
+
+    comments = {}
+    for post_id, body in (
+        Comment.objects.filter(post_id__in=post_ids, is_deleted=False)
+        .order_by("post_id", "pk")
+        .values_list("post_id", "body")
+    ):
+        comments.setdefault(post_id, []).append(body)
+
+    return {
+        pk: (title, body, "\n".join(comments.get(pk, [])))
+        for pk, title, body in Post.objects.filter(pk__in=post_ids).values_list(
+            "pk", "title", "body"
+        )
+    }
+
+
+def index_posts(post_ids):
+    """
+    Rewrite the search documents of the given posts.
+
+    Posts that no longer exist are dropped from the index.
+    """
+    post_ids = list(post_ids)
+    backend = _backend()
+    if not post_ids or backend is None:
+        return 0
+
+    if backend == "postgresql":
+        from django.contrib.postgres.search import SearchVector
+
+        from ..models import Post
+
+        for pk, (_, _, comments_text) in _document_parts(post_ids).items():
+            Post.objects.filter(pk=pk).update(
+                search_vector=(
+                    SearchVector("title", weight="A", config=SEARCH_CONFIG)
+                    + SearchVector("body", weight="B", config=SEARCH_CONFIG)
+                    + SearchVector(Value(comments_text), weight="C", config=SEARCH_CONFIG)
+                )
+            )
+        return len(post_ids)
+
+    documents = _document_parts(post_ids)
+    placeholders = ", ".join(["%s"] * len(post_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", post_ids)
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, body, comments) VALUES (%s, %s, %s, %s)",
+            [(pk, *parts) for pk, parts in documents.items()],
+        )
+    return len(documents)
+
+
+def index_post(post_id):
+    """Rewrite one post's search document."""
+    return index_posts([post_id])
+
+
+def rebuild_search_index(batch_size=500):
+    """Rebuild every post's search document. Returns the number indexed."""
+    from ..models import Post
+
+    if _backend() == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+
+    indexed = 0
+    post_ids = list(Post.objects.order_by("pk").values_list("pk", flat=True))
+    for start in range(0, len(post_ids), batch_size):
+        indexed += index_posts(post_ids[start:start + batch_size])
+    logger.info(f"Rebuilt search index for {indexed} posts")
+    return indexed
@@ -0,0 +1,219 @@
+"""
+In-memory prefix index for search box suggestions.
+
+search_suggestions is called on every debounced keystroke, so instead of
+querying the database it answers from a per-process index over tag names
+(with visible post counts) and the titles of the most recent visible posts.
+Each index is a sorted array of (word, key) pairs searched with bisect:
+a query matches when every query word is a prefix of some word in the name
+or title.
+
+The index is built lazily on first use and fully rebuilt every
+REBUILD_SECONDS. In between, the save/delete signals in posting.signals
+apply changes made by this process incrementally; changes made by other
+worker processes show up at their next rebuild.
+
+Usage:
+    index = get_suggestion_index()
+    tags, posts = index.suggest("mgt 5")
+"""
+
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Full rebuild interval; catches changes made by other worker processes
+REBUILD_SECONDS = 300
+# Only this many of the newest visible post titles are indexed
+RECENT_POST_LIMIT = 1000
+
+_WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text):
+    """Lower-cased words of text, as matched by the prefix index."""
+    return _WORD_PATTERN.findall(text.lower())
+
+
+class PrefixIndex:
+    """Sorted (word, key) pairs supporting word-prefix lookups by bisect."""
+
+    def __init__(self):
+        self._entries = []
+        self._words = {}
+
+    def __len__(self):
+        return len(self._words)
+
+    def add(self, key, text):
+        """Index text under key, replacing anything indexed for key before."""
+        self.remove(key)
+        words = set(tokenize(text))
+        for word in words:
+            insort(self._entries, (word, key))
+        self._words[key] = words
+
+    def remove(self, key):
+        """Drop key from the index if present."""
+        for word in self._words.pop(key, ()):
+            i = bisect_left(self._entries, (word, key))
+            if i < len(self._entries) and self._entries[i] == (word, key):
+                del self._entries[i]
+
+    def _keys_with_prefix(self, prefix):
+        keys = set()
+        i = bisect_left(self._entries, (prefix,))
+        while i < len(self._entries) and self._entries[i][0].startswith(prefix):
+            keys.add(self._entries[i][1])
+            i += 1
+        return keys
+
+    def search(self, terms):
+        """Return keys whose text has a word starting with every term."""
+        if not terms:
+            return set()
+        keys = self._keys_with_prefix(terms[0])
+        for term in terms[1:]:
+            keys = {
+                key for key in keys
+                if any(word.startswith(term) for word in self._words[key])
+            }
+        return keys
+
+
+class SuggestionIndex:
+    """Prefix indexes over tag names and recent post titles."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._built_at = None
+        self._tag_index = PrefixIndex()
+        self._tags = {}  # tag id -> (name, visible post count)
+        self._post_index = PrefixIndex()
+        self._posts = {}  # post id -> (created_at, title)
+
+    @property
+    def is_built(self):
+        return self._built_at is not None
+
+    def is_stale(self):
+        return not self.is_built or time.monotonic() - self._built_at > REBUILD_SECONDS
+
+    def rebuild(self):
+        """Rebuild both indexes from the database (two queries)."""
+        from ..models import Post, Tag
+
+        tags = {
+            pk: (name, count)
+            for pk, name, count in Tag.objects.values_list(
+                "pk", "name", "visible_posts_count"
+            )
+        }
+        posts = {
+            pk: (created_at, title)
+            for pk, title, created_at in Post.objects.filter(is_hidden=False)
+            .order_by("-created_at")
+            .values_list("pk", "title", "created_at")[:RECENT_POST_LIMIT]
+        }
+
+        tag_index = PrefixIndex()
+        for pk, (name, _) in tags.items():
+            tag_index.add(pk, name)
+        post_index = PrefixIndex()
+        for pk, (_, title) in posts.items():
+            post_index.add(pk, title)
+
+        with self._lock:
+            self._tags, self._tag_index = tags, tag_index
+            self._posts, self._post_index = posts, post_index
+            self._built_at = time.monotonic()
+        logger.debug(f"Rebuilt suggestion index: {len(tags)} tags, {len(posts)} posts")
+
+    def suggest(self, query, tag_limit=5, post_limit=3):
+        """
+        Return (tags, posts) matching query.
+
+        tags: [{"name": ..., "count": ...}] with the most-used tags first
+        posts: [{"id": ..., "title": ...}] with the newest posts first
+        """
+        terms = tokenize(query)
+        with self._lock:
+            tags = sorted(
+                (self._tags[pk] for pk in self._tag_index.search(terms)),
+                key=lambda tag: (-tag[1], tag[0]),
+            )[:tag_limit]
+            posts = sorted(
+                ((pk, *self._posts[pk]) for pk in self._post_index.search(terms)),
+                key=lambda post: post[1],
+                reverse=True,
+            )[:post_limit]
+        return (
+            [{"name": name, "count": count} for name, count in tags],
+            [{"id": pk, "title": title} for pk, _, title in posts],
+        )
+
+    def update_tags(self, tag_ids):
+        """Re-read the given tags (name and visible post count) from the database."""
+        from ..models import Tag
+
+        tag_ids = set(tag_ids)
+        if not self.is_built or not tag_ids:
+            return
+        rows = Tag.objects.filter(pk__in=tag_ids).values_list(
+            "pk", "name", "visible_posts_count"
+        )
+        with self._lock:
+            for pk, name, count in rows:
+                self._tags[pk] = (name, count)
+                self._tag_index.add(pk, name)
+                tag_ids.discard(pk)
+            for pk in tag_ids:  # deleted tags
+                self._tags.pop(pk, None)
+                self._tag_index.remove(pk)
+
+    def update_post(self, post):
+        """Add, refresh or drop a post's title after it was saved."""
+        if not self.is_built:
+            return
+        if post.is_hidden:
+            self.remove_post(post.pk)
+            return
+        with self._lock:
+            if post.pk not in self._posts and len(self._posts) >= RECENT_POST_LIMIT:
+                oldest = min(self._posts, key=lambda pk: self._posts[pk][0])
+                if self._posts[oldest][0] >= post.created_at:
+                    return
+                del self._posts[oldest]
+                self._post_index.remove(oldest)
+            self._posts[post.pk] = (post.created_at, post.title)
+            self._post_index.add(post.pk, post.title)
+
+    def remove_post(self, post_id):
+        """Drop a post's title from the index."""
+        with self._lock:
+            self._posts.pop(post_id, None)
+            self._post_index.remove(post_id)
+
+
+# Global instance
+_index_instance: Optional[SuggestionIndex] = None
+
+
+def get_suggestion_index() -> SuggestionIndex:
+    """Return the process-wide suggestion index, rebuilding it when stale."""
+    global _index_instance
+    if _index_instance is None:
+        _index_instance = SuggestionIndex()
+    if _index_instance.is_stale():
+        _index_instance.rebuild()
+    return _index_instance
+
+
+def peek_suggestion_index() -> Optional[SuggestionIndex]:
+    """Return the index if this process has built one, without building it."""
+    return _index_instance
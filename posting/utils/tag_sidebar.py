@@ -0,0 +1,39 @@
+"""
+Cached list of tags shown in the feed's tag filter.
+
+Built from the stored Tag.visible_posts_count, so building it is a plain
+scan of the tags table rather than a COUNT over the tag-post relation.
+The cached copy is dropped whenever a count or tag changes (see
+TagManager.adjust_visible_counts and posting.signals). With the default per-process
+cache, other worker processes pick the change up within
+TAG_SIDEBAR_CACHE_SECONDS.
+
+Usage:
+    for tag in get_tag_sidebar(): tag["name"], tag["slug"], tag["count"]
+"""
+
+from django.core.cache import cache
+from django.db.models import F
+
+TAG_SIDEBAR_CACHE_KEY = "posting:tag_sidebar"
+TAG_SIDEBAR_CACHE_SECONDS = 300
+
+
+def get_tag_sidebar():
+    """Return [{"name", "slug", "count"}] for tags with visible posts, by name."""
+    from ..models import Tag
+
+    tags = cache.get(TAG_SIDEBAR_CACHE_KEY)
+    if tags is None:
+        tags = list(
+            Tag.objects.filter(visible_posts_count__gte=1)
+            .order_by("name")
+            .values("name", "slug", count=F("visible_posts_count"))
+        )
+        cache.set(TAG_SIDEBAR_CACHE_KEY, tags, TAG_SIDEBAR_CACHE_SECONDS)
+    return tags
+
+
+def invalidate_tag_sidebar():
+    """Drop the cached tag sidebar so the next request rebuilds it."""
+    cache.delete(TAG_SIDEBAR_CACHE_KEY)
@@ -4,23 +4,79 @@ Tag Suggestion using TF-IDF.
 100% local processing - no external API calls.
 Suggests tags based on content similarity to existing posts with those tags.
 
+The model is kept up to date incrementally instead of being rebuilt:
+
+- texts are hashed into N_FEATURES columns (scikit-learn's
+  HashingVectorizer), so there is no vocabulary to refit when new words
+  appear
+- each tag keeps the running sum of its posts' (l2-normalized) term
+  vectors, and every column a count of the post-tag pairs that contain it
+  (document frequency), from which IDF weights are derived
+- every UPDATE_INTERVAL_SECONDS, suggest() picks up post-tag links added
+  since the last check (by any process): each new post adds its vector to
+  its tags' sums and its columns to the document frequencies
+- a full re-fit every REFIT_INTERVAL_SECONDS (or refresh()) drops deleted,
+  hidden and edited posts and removed tags, which increments can't undo
+
+`python manage.py build_tag_model` runs the full fit once and saves it with
+save() to a new version directory under TAG_MODEL_DIR, as .npy files (the
+float32 CSR tag matrix, IDF, tag sums and document frequencies) plus a
+meta.json with the tag names and hashing parameters, then points the
+CURRENT file at it. Web processes load() the current version when the WSGI
+application starts and whenever CURRENT changes (checked with the
+updates), memory-mapping the arrays, so they serve suggestions at once
+without a database scan and share one copy of the model in the page cache.
+While a saved model is in use, processes don't re-fit on their own; run
+the command periodically instead. Posts added since the build are applied
+as usual, to a private copy of the arrays.
+
 Usage:
     suggester = get_suggester()
     tags = suggester.suggest("My title", "My post body", top_k=4)
 """
 
+import json
 import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
 from typing import Optional
 
+from django.conf import settings
+from django.utils import timezone
+
 logger = logging.getLogger(__name__)
 
+N_FEATURES = 2 ** 18
+# Seconds between checks for new post-tag links
+UPDATE_INTERVAL_SECONDS = 5
+# Seconds between full re-fits
+REFIT_INTERVAL_SECONDS = 6 * 3600
+# Posts hashed per batch during a full fit
+FIT_BATCH_SIZE = 500
+MIN_SIMILARITY = 0.05
+
+# Saved model layout; a version with another format is ignored
+ARTIFACT_FORMAT = 1
+CURRENT_FILE = "CURRENT"
+# Versions kept on disk, including the current one
+KEEP_VERSIONS = 3
+ARRAYS = {
+    "tag_vectors": ("data", "indices", "indptr"),
+    "tag_sums": ("data", "indices", "indptr"),
+}
+
 
 class TagSuggester:
     """
     TF-IDF based tag suggestion system.
 
     Learns from existing posts and their tags to suggest relevant tags
-    for new content. Uses scikit-learn's TfidfVectorizer.
+    for new content, with per-tag centroid sums that are updated as posts
+    are tagged (see the module docstring).
     """
 
     _instance: Optional["TagSuggester"] = None
@@ -37,65 +93,311 @@ class TagSuggester:
             return
 
         self.vectorizer = None
-        self.tag_vectors = None
+        # Tag names, one per row of tag_sums
         self.tags = []
+        self._tag_rows = {}  # tag id -> row
+        # Sum of each tag's post vectors (tags x N_FEATURES, float32 CSR)
+        self.tag_sums = None
+        # Post-tag pairs containing each column, and the number of pairs
+        self.doc_freq = None
+        self.n_docs = 0
+        # IDF-weighted, row-normalized tag_sums used for matching, and the
+        # weights; suggest() reads the (tag_vectors, tags, idf) snapshot so
+        # it never sees a half-applied update
+        self.tag_vectors = None
+        self.idf = None
+        self._snapshot = None
+        # Newest post-tag link included in the model
+        self.last_link_id = 0
+        # Saved model version in use, if loaded from TAG_MODEL_DIR
+        self.version = None
+        self._rejected_version = None
+        self._fitted_at = None
+        self._checked_at = None
+        self._lock = threading.Lock()
         self._initialized = True
 
     def _ensure_vectorizer(self):
-        """Lazy initialization of TfidfVectorizer."""
+        """Lazy initialization of HashingVectorizer."""
         if self.vectorizer is None:
             try:
-                from sklearn.feature_extraction.text import TfidfVectorizer
-                self.vectorizer = TfidfVectorizer(
-                    max_features=1000,
+                from sklearn.feature_extraction.text import HashingVectorizer
+                self.vectorizer = HashingVectorizer(
+                    n_features=N_FEATURES,
                     stop_words="english",
                     ngram_range=(1, 2),  # Include bigrams for better matching
-                    min_df=1,
-                    max_df=0.95,
+                    alternate_sign=False,
+                    dtype="float32",
                 )
             except ImportError:
                 logger.warning("scikit-learn not installed. Tag suggestions disabled.")
                 return False
         return True
 
+    def _hash(self, texts):
+        return self.vectorizer.transform(texts)
+
+    def _accumulate(self, rows, vectors):
+        """Add vectors (one per post-tag pair) to their tag rows and the document frequencies."""
+        import numpy as np
+        import scipy.sparse as sp
+
+        vectors = sp.csr_matrix(vectors)
+        incidence = sp.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, np.arange(len(rows)))),
+            shape=(len(self.tags), len(rows)),
+        )
+        delta = (incidence @ vectors).tocsr()
+        tag_sums = self.tag_sums
+        if tag_sums.shape[0] < len(self.tags):
+            padding = sp.csr_matrix((len(self.tags) - tag_sums.shape[0], N_FEATURES), dtype=np.float32)
+            tag_sums = sp.vstack([tag_sums, padding], format="csr")
+        # New arrays rather than in place: loaded ones are read-only mappings
+        self.tag_sums = (tag_sums + delta).tocsr()
+        self.doc_freq = self.doc_freq + np.bincount(vectors.indices, minlength=N_FEATURES)
+        self.n_docs += len(rows)
+
+    def _row_for(self, tag_id, name):
+        row = self._tag_rows.get(tag_id)
+        if row is None:
+            row = self._tag_rows[tag_id] = len(self.tags)
+            self.tags.append(name)
+        return row
+
+    def _rebuild_vectors(self):
+        """Weight tag_sums by the current IDF and normalize each row."""
+        import numpy as np
+        from sklearn.preprocessing import normalize
+
+        # Smoothed IDF, as TfidfVectorizer computes it
+        idf = (np.log((1 + self.n_docs) / (1 + self.doc_freq)) + 1).astype(np.float32)
+        tag_vectors = normalize(self.tag_sums.multiply(idf).tocsr())
+        self.tag_vectors, self.idf = tag_vectors, idf
+        self._snapshot = (tag_vectors, tuple(self.tags), idf)
+
     def train(self):
         """
-        Build TF-IDF model from existing posts.
+        Build the model from all visible tagged posts.
 
-        Should be called on app startup and periodically to update.
+        Tags without posts are represented by their name. Called on first
+        use and every REFIT_INTERVAL_SECONDS; new posts in between are
+        added incrementally.
         """
         if not self._ensure_vectorizer():
             return
 
         try:
             # Import here to avoid circular imports
-            from posting.models import Tag
-
-            tags = list(Tag.objects.prefetch_related("posts").all())
-            if not tags:
-                logger.info("No tags found for training tag suggester.")
-                return
-
-            self.tags = tags
-            tag_texts = []
-
-            for tag in tags:
-                # Get sample of posts for this tag
-                posts = tag.posts.all()[:50]
-                if posts:
-                    text = " ".join([f"{p.title} {p.body}" for p in posts])
-                else:
-                    # Fallback to tag name if no posts
-                    text = tag.name
-                tag_texts.append(text)
-
-            if tag_texts:
-                self.tag_vectors = self.vectorizer.fit_transform(tag_texts)
-                logger.info(f"Tag suggester trained on {len(tags)} tags.")
+            import numpy as np
+            import scipy.sparse as sp
+
+            from posting.models import Post, Tag
+
+            with self._lock:
+                self.tags = []
+                self._tag_rows = {}
+                for tag_id, name in Tag.objects.order_by("pk").values_list("pk", "name"):
+                    self._row_for(tag_id, name)
+                if not self.tags:
+                    logger.info("No tags found for training tag suggester.")
+                    self.tag_vectors = self._snapshot = None
+                    return
+
+                self.tag_sums = sp.csr_matrix((len(self.tags), N_FEATURES), dtype=np.float32)
+                self.doc_freq = np.zeros(N_FEATURES, dtype=np.int64)
+                self.n_docs = 0
+                links = Post.tags.through.objects
+                self.last_link_id = links.order_by("-pk").values_list("pk", flat=True).first() or 0
+
+                tagged = set()
+                pairs = (
+                    links.filter(pk__lte=self.last_link_id, post__is_hidden=False)
+                    .order_by("post_id")
+                    .values_list("post_id", "tag_id", "post__title", "post__body")
+                )
+                batch = []
+                for post_id, tag_id, title, body in pairs.iterator(chunk_size=FIT_BATCH_SIZE):
+                    batch.append((self._tag_rows[tag_id], f"{title} {body}"))
+                    tagged.add(tag_id)
+                    if len(batch) >= FIT_BATCH_SIZE:
+                        self._accumulate([row for row, _ in batch], self._hash([t for _, t in batch]))
+                        batch = []
+
+                # Fallback to tag name if no posts
+                for tag_id, row in self._tag_rows.items():
+                    if tag_id not in tagged:
+                        batch.append((row, self.tags[row]))
+                if batch:
+                    self._accumulate([row for row, _ in batch], self._hash([t for _, t in batch]))
+
+                self._rebuild_vectors()
+                self._fitted_at = self._checked_at = time.monotonic()
+                logger.info(f"Tag suggester trained on {len(self.tags)} tags.")
 
         except Exception as e:
             logger.error(f"Failed to train tag suggester: {e}")
 
+    def update(self):
+        """
+        Add post-tag links created since the last fit or update.
+
+        Costs one query plus hashing of each new post, whatever the size of
+        the model. Returns the number of links added.
+        """
+        if self.tag_sums is None or not self._ensure_vectorizer():
+            return 0
+
+        from posting.models import Post
+
+        with self._lock:
+            self._checked_at = time.monotonic()
+            pairs = list(
+                Post.tags.through.objects.filter(pk__gt=self.last_link_id)
+                .order_by("pk")
+                .values_list("pk", "tag_id", "tag__name", "post__is_hidden", "post__title", "post__body")
+            )
+            if not pairs:
+                return 0
+            self.last_link_id = pairs[-1][0]
+            visible = [pair for pair in pairs if not pair[3]]
+            if visible:
+                rows = [self._row_for(tag_id, name) for _, tag_id, name, _, _, _ in visible]
+                texts = [f"{title} {body}" for *_, title, body in visible]
+                self._accumulate(rows, self._hash(texts))
+                self._rebuild_vectors()
+            return len(visible)
+
+    def save(self, directory=None) -> str:
+        """
+        Save the model as a new version under directory (TAG_MODEL_DIR) and make it current.
+
+        Returns the version name. Older versions beyond KEEP_VERSIONS are
+        removed; processes still mapping them keep working.
+        """
+        import numpy as np
+
+        if self.tag_sums is None:
+            raise ValueError("No trained model to save")
+        root = Path(directory or settings.TAG_MODEL_DIR)
+        root.mkdir(parents=True, exist_ok=True)
+        version = timezone.now().strftime("v%Y%m%d%H%M%S%f")
+        staging = Path(tempfile.mkdtemp(dir=root, prefix=".build-"))
+        try:
+            matrices = {"tag_vectors": self.tag_vectors, "tag_sums": self.tag_sums}
+            for name, parts in ARRAYS.items():
+                for part in parts:
+                    np.save(staging / f"{name}.{part}.npy", getattr(matrices[name], part))
+            np.save(staging / "idf.npy", self.idf)
+            np.save(staging / "doc_freq.npy", self.doc_freq)
+            meta = {
+                "format": ARTIFACT_FORMAT,
+                "version": version,
+                "n_features": N_FEATURES,
+                "ngram_range": list(self.vectorizer.ngram_range),
+                "stop_words": self.vectorizer.stop_words,
+                "n_docs": int(self.n_docs),
+                "last_link_id": self.last_link_id,
+                "tags": list(self.tags),
+                "tag_ids": list(self._tag_rows),
+                "built_at": timezone.now().isoformat(),
+            }
+            (staging / "meta.json").write_text(json.dumps(meta))
+            os.rename(staging, root / version)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        # Switch versions atomically; readers see the old or the new name
+        pointer = root / f".{CURRENT_FILE}.{version}"
+        pointer.write_text(version)
+        os.replace(pointer, root / CURRENT_FILE)
+        self.version = version
+
+        versions = sorted(p.name for p in root.iterdir() if p.is_dir() and p.name.startswith("v"))
+        for old in versions[:-KEEP_VERSIONS]:
+            shutil.rmtree(root / old, ignore_errors=True)
+        return version
+
+    def load(self, directory=None) -> bool:
+        """
+        Memory-map the current saved version, unless it is already loaded.
+
+        Returns whether a new version was loaded. Post-tag links added
+        after the build are picked up by the next update().
+        """
+        root = Path(directory or settings.TAG_MODEL_DIR)
+        try:
+            version = (root / CURRENT_FILE).read_text().strip()
+        except OSError:
+            return False
+        if version in ("", self.version, self._rejected_version) or not self._ensure_vectorizer():
+            return False
+
+        try:
+            import numpy as np
+            import scipy.sparse as sp
+
+            path = root / version
+            meta = json.loads((path / "meta.json").read_text())
+            # Vectors from other vectorizer settings would silently score wrong
+            compatible = (
+                meta["format"] == ARTIFACT_FORMAT
+                and meta["n_features"] == N_FEATURES
+                and meta.get("ngram_range") == list(self.vectorizer.ngram_range)
+                and meta.get("stop_words") == self.vectorizer.stop_words
+            )
+            if not compatible:
+                logger.error(f"Ignoring incompatible tag model {version} in {root}")
+                self._rejected_version = version
+                return False
+            shape = (len(meta["tags"]), N_FEATURES)
+            matrices = {
+                name: sp.csr_matrix(
+                    tuple(np.load(path / f"{name}.{part}.npy", mmap_mode="r") for part in parts),
+                    shape=shape,
+                    copy=False,
+                )
+                for name, parts in ARRAYS.items()
+            }
+            idf = np.load(path / "idf.npy", mmap_mode="r")
+            doc_freq = np.load(path / "doc_freq.npy", mmap_mode="r")
+        except Exception as e:
+            logger.error(f"Failed to load tag model {version} from {root}: {e}")
+            return False
+
+        with self._lock:
+            self.tags = list(meta["tags"])
+            self._tag_rows = {tag_id: row for row, tag_id in enumerate(meta["tag_ids"])}
+            self.tag_sums = matrices["tag_sums"]
+            self.tag_vectors = matrices["tag_vectors"]
+            self.idf = idf
+            self.doc_freq = doc_freq
+            self.n_docs = meta["n_docs"]
+            self.last_link_id = meta["last_link_id"]
+            self.version = version
+            self._snapshot = (self.tag_vectors, tuple(self.tags), idf)
+            self._fitted_at = self._checked_at = time.monotonic()
+        logger.info(f"Loaded tag model {version} with {len(self.tags)} tags.")
+        return True
+
+    def _refresh_if_due(self):
+        now = time.monotonic()
+        if self._snapshot is not None and now - self._checked_at < UPDATE_INTERVAL_SECONDS:
+            return
+        # A newly built model replaces whatever is in memory
+        if self.load():
+            return
+        if self._snapshot is None:
+            self.train()
+        elif self.version is None and now - self._fitted_at >= REFIT_INTERVAL_SECONDS:
+            # Saved models are re-fitted by build_tag_model instead
+            self.train()
+        else:
+            try:
+                self.update()
+            except Exception as e:
+                logger.error(f"Failed to update tag suggester: {e}")
+
     def suggest(self, title: str, body: str, top_k: int = 4) -> list[str]:
         """
         Suggest tags for new post content.
@@ -111,28 +413,30 @@ class TagSuggester:
         if not self._ensure_vectorizer():
             return []
 
-        # Train if not already trained
-        if self.tag_vectors is None or len(self.tags) == 0:
-            self.train()
+        # Train if not already trained; pick up new posts
+        self._refresh_if_due()
 
-        if self.tag_vectors is None or len(self.tags) == 0:
+        snapshot = self._snapshot
+        if snapshot is None:
             return []
 
         try:
-            from sklearn.metrics.pairwise import cosine_similarity
+            from sklearn.preprocessing import normalize
 
             text = f"{title} {body}"
-            text_vector = self.vectorizer.transform([text])
-            similarities = cosine_similarity(text_vector, self.tag_vectors)[0]
+            tag_vectors, tags, idf = snapshot
+            text_vector = normalize(self._hash([text]).multiply(idf).tocsr())
+            # Rows are normalized, so the dot product is the cosine similarity
+            similarities = (tag_vectors @ text_vector.T).toarray().ravel()
 
             # Get indices of top K matches
             top_indices = similarities.argsort()[-top_k:][::-1]
 
             # Filter by minimum similarity threshold
             suggestions = [
-                self.tags[i].name
+                tags[i]
                 for i in top_indices
-                if similarities[i] > 0.05
+                if similarities[i] > MIN_SIMILARITY
             ]
 
             return suggestions
@@ -143,11 +447,12 @@ class TagSuggester:
 
     def refresh(self):
         """
-        Force refresh of the model.
+        Force a full re-fit of the model.
 
-        Call this when new tags are created or significant content changes.
+        New posts are picked up incrementally; this also drops deleted,
+        hidden and edited posts and removed tags.
         """
-        self.tag_vectors = None
+        self.tag_vectors = self._snapshot = None
         self.tags = []
         self.train()
 
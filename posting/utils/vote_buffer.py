@@ -0,0 +1,221 @@
+"""
+Write-behind buffering for post and comment votes.
+
+With settings.VOTE_WRITE_BEHIND on, a vote click appends a PendingVote row
+to an append-only table and never updates the hot post's Vote rows or
+counters. To answer with the resulting vote, record_vote() first reads the
+voter's stored vote and pending clicks on that object (two indexed reads,
+no locks), and the response shows counts adjusted optimistically.
+
+These reads and the insert are not atomic, so two concurrent clicks by the
+same voter (a double-click) can both be answered from the same state, and
+the optimistic vote and counts shown for them are best-effort. The flush
+is authoritative: it replays every recorded click in order, so the stored
+vote and counters always end up right and the next page view shows them.
+
+flush_pending_votes() (run by `python manage.py flush_votes`) then applies
+the buffer in batches, one transaction per batch:
+
+- clicks are replayed in order per (object, voter) against the stored vote,
+  with the same toggle rule as a synchronous vote
+- changed votes are upserted (INSERT ... ON CONFLICT on the unique
+  (object, voter) constraint) and removed votes deleted, so each voter
+  still has at most one vote per object
+- post counters are shifted once per post by the batch's net change
+
+Run a single flusher: batches are claimed with SELECT ... FOR UPDATE SKIP
+LOCKED on PostgreSQL, but clicks from one voter must be applied in order.
+
+Usage:
+    click = record_vote(PendingVote.POST, post.pk, request.user, Vote.UPVOTE)
+    flush_pending_votes()
+"""
+
+import logging
+from collections import defaultdict, namedtuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+
+# stored: the applied vote, previous: including earlier pending clicks,
+# new: after this click (each "UPVOTE", "DOWNVOTE" or None)
+VoteClick = namedtuple("VoteClick", ["stored", "previous", "new"])
+
+
+def is_enabled():
+    """Whether vote clicks are buffered instead of applied right away."""
+    return getattr(settings, "VOTE_WRITE_BEHIND", False)
+
+
+def toggle(current, clicked):
+    """Vote state after clicking `clicked`: the same button removes the vote."""
+    return None if current == clicked else clicked
+
+
+def _replay(stored, clicks):
+    state = stored
+    for clicked in clicks:
+        state = toggle(state, clicked)
+    return state
+
+
+def vote_model(target):
+    """Return (vote model, object foreign key field) for a PendingVote target."""
+    from ..models import CommentVote, PendingVote, Vote
+
+    if target == PendingVote.POST:
+        return Vote, "post"
+    return CommentVote, "comment"
+
+
+def record_vote(target, object_id, voter, clicked):
+    """
+    Buffer a vote click and return the resulting VoteClick.
+
+    The returned state is best-effort under concurrent clicks by the same
+    voter; see the module docstring.
+    """
+    from ..models import PendingVote
+
+    model, field = vote_model(target)
+    stored = (
+        model.objects.filter(**{f"{field}_id": object_id}, voter=voter)
+        .values_list("vote_type", flat=True)
+        .first()
+    )
+    pending = PendingVote.objects.filter(
+        target=target, object_id=object_id, voter=voter
+    ).values_list("vote_type", flat=True)
+    previous = _replay(stored, pending)
+
+    PendingVote.objects.create(
+        target=target, object_id=object_id, voter=voter, vote_type=clicked
+    )
+    return VoteClick(stored, previous, toggle(previous, clicked))
+
+
+def pending_vote_states(target, voter, votes, object_ids):
+    """
+    Return the voter's {object id: vote type} with pending clicks applied.
+
+    votes holds the stored votes for object_ids, as loaded by the caller.
+    """
+    from ..models import PendingVote
+
+    clicks = defaultdict(list)
+    for object_id, clicked in PendingVote.objects.filter(
+        target=target, voter=voter, object_id__in=object_ids
+    ).values_list("object_id", "vote_type"):
+        clicks[object_id].append(clicked)
+
+    states = dict(votes)
+    for object_id, object_clicks in clicks.items():
+        states[object_id] = _replay(votes.get(object_id), object_clicks)
+    return {object_id: state for object_id, state in states.items() if state}
+
+
+def _apply_clicks(target, clicks):
+    """
+    Apply {(object_id, voter_id): [clicked, ...]} for one target type.
+
+    Returns the ids of the posts whose cards changed.
+    """
+    from ..models import Comment, Post
+
+    model, field = vote_model(target)
+    fk = f"{field}_id"
+    parent = Post if field == "post" else Comment
+
+    # Clicks on objects deleted since are dropped
+    object_ids = set(
+        parent.objects.filter(pk__in={object_id for object_id, _ in clicks})
+        .values_list("pk", flat=True)
+    )
+    clicks = {key: value for key, value in clicks.items() if key[0] in object_ids}
+    if not clicks:
+        return set()
+
+    stored = {
+        (object_id, voter_id): vote_type
+        for object_id, voter_id, vote_type in model.objects.filter(
+            **{f"{fk}__in": object_ids},
+            voter_id__in={voter_id for _, voter_id in clicks},
+        ).values_list(fk, "voter_id", "vote_type")
+    }
+
+    upserts, removals = [], defaultdict(list)
+    deltas = defaultdict(lambda: [0, 0])  # object_id -> [upvotes, downvotes]
+    for (object_id, voter_id), object_clicks in clicks.items():
+        old = stored.get((object_id, voter_id))
+        new = _replay(old, object_clicks)
+        if new == old:
+            continue
+        if new is None:
+            removals[object_id].append(voter_id)
+        else:
+            upserts.append(model(**{fk: object_id}, voter_id=voter_id, vote_type=new))
+        deltas[object_id][0] += (new == "UPVOTE") - (old == "UPVOTE")
+        deltas[object_id][1] += (new == "DOWNVOTE") - (old == "DOWNVOTE")
+
+    model.objects.bulk_create(
+        upserts,
+        update_conflicts=True,
+        unique_fields=[field, "voter"],
+        update_fields=["vote_type"],
+    )
+    for object_id, voter_ids in removals.items():
+        model.objects.filter(**{fk: object_id}, voter_id__in=voter_ids).delete()
+
+    if field == "post":
+        for post_id, (upvotes, downvotes) in deltas.items():
+            Post.objects.apply_vote_deltas(post_id, upvotes, downvotes)
+        return set()
+
+    # Comment votes have no stored counters, but they change the post's card
+    return set(
+        Comment.objects.filter(pk__in=deltas).values_list("post_id", flat=True)
+    )
+
+
+def flush_pending_votes(batch_size=DEFAULT_BATCH_SIZE):
+    """Apply one batch of buffered votes. Returns the number of clicks applied."""
+    from ..models import PendingVote, Post
+
+    with transaction.atomic():
+        rows = list(
+            PendingVote.objects.select_for_update(skip_locked=True)
+            .order_by("pk")
+            .values_list("pk", "target", "object_id", "voter_id", "vote_type")[:batch_size]
+        )
+        if not rows:
+            return 0
+
+        clicks = {PendingVote.POST: defaultdict(list), PendingVote.COMMENT: defaultdict(list)}
+        for _, target, object_id, voter_id, clicked in rows:
+            clicks[target][(object_id, voter_id)].append(clicked)
+
+        _apply_clicks(PendingVote.POST, clicks[PendingVote.POST])
+        post_ids = _apply_clicks(PendingVote.COMMENT, clicks[PendingVote.COMMENT])
+        if post_ids:
+            Post.objects.filter(pk__in=post_ids).update(render_version=F("render_version") + 1)
+
+        PendingVote.objects.filter(pk__in=[row[0] for row in rows]).delete()
+
+    logger.debug(f"Flushed {len(rows)} buffered vote(s)")
+    return len(rows)
+
+
+def flush_all_pending_votes(batch_size=DEFAULT_BATCH_SIZE):
+    """Flush batches until the buffer is empty. Returns the number of clicks applied."""
+    flushed = 0
+    while True:
+        count = flush_pending_votes(batch_size)
+        flushed += count
+        if count < batch_size:
+            return flushed
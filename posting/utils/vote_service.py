@@ -0,0 +1,206 @@
+"""
+Vote toggling shared by posts and comments.
+
+A click on a vote button toggles the voter's vote: no vote -> clicked type,
+same type -> removed, other type -> switched. Instead of reading the
+existing vote and then writing (which races between the two and costs a
+query per step), the toggle is a sequence of conditional statements inside
+one transaction, each acting only if the row is in the state it expects:
+
+    INSERT ... ON CONFLICT (object, voter) DO NOTHING   -> added
+    DELETE ... WHERE vote_type = clicked                -> removed
+    UPDATE ... SET vote_type = clicked                  -> switched
+
+The first statement that touches a row decides the outcome, so a new vote
+(the common case) is a single INSERT. Post counters are then shifted in
+the same transaction and the resulting counts read back before commit.
+The same SQL runs on PostgreSQL and SQLite (3.24+). With
+VOTE_COUNTER_SHARDS set, the counter change goes to a shard row instead of
+the post row (see counter_shards.py).
+
+With VOTE_WRITE_BEHIND on, clicks are buffered instead (see vote_buffer.py)
+and the counts returned are optimistic.
+
+Votes bump the post's render_version (its cached card) but don't
+invalidate cached feed pages; new scores appear there within
+FEED_PAGE_CACHE_SECONDS (see feed_cache.py).
+
+Usage:
+    result = post_votes.toggle(post, request.user, Vote.UPVOTE)
+    result.user_vote, result.upvotes, result.downvotes
+"""
+
+from typing import NamedTuple, Optional
+
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from . import counter_shards, vote_buffer
+
+UPVOTE = "UPVOTE"
+DOWNVOTE = "DOWNVOTE"
+# Attempts before giving up on a row that keeps changing under us
+MAX_TOGGLE_ATTEMPTS = 3
+
+
+class VoteResult(NamedTuple):
+    """Outcome of a vote click: the voter's vote before and after, and the new counts."""
+
+    previous: Optional[str]
+    user_vote: Optional[str]
+    upvotes: int
+    downvotes: int
+
+    @property
+    def score(self):
+        return self.upvotes - self.downvotes
+
+    @property
+    def action(self):
+        """One of "added", "removed", "changed" or "none"."""
+        if self.previous == self.user_vote:
+            return "none"
+        if self.previous is None:
+            return "added"
+        if self.user_vote is None:
+            return "removed"
+        return "changed"
+
+
+class VoteService:
+    """Atomic vote toggle for one kind of votable object."""
+
+    # PendingVote target name; set by subclasses
+    target = None
+
+    @property
+    def model(self):
+        """The vote model (Vote or CommentVote)."""
+        return vote_buffer.vote_model(self.target)[0]
+
+    @property
+    def field(self):
+        """Name of the vote model's foreign key to the voted object."""
+        return vote_buffer.vote_model(self.target)[1]
+
+    def toggle(self, obj, voter, clicked):
+        """Apply a click on the `clicked` vote button and return a VoteResult."""
+        if vote_buffer.is_enabled():
+            return self._buffer(obj, voter, clicked)
+
+        with transaction.atomic():
+            previous, user_vote = self._toggle_row(obj.pk, voter.pk, clicked)
+            if previous != user_vote:
+                self.record_change(obj, previous, user_vote)
+            upvotes, downvotes = self.counts(obj)
+        return VoteResult(previous, user_vote, upvotes, downvotes)
+
+    def _buffer(self, obj, voter, clicked):
+        """Buffer the click; counts are adjusted as if it were already applied."""
+        click = vote_buffer.record_vote(self.target, obj.pk, voter, clicked)
+        upvotes, downvotes = self.counts(obj)
+        upvotes += (click.new == UPVOTE) - (click.stored == UPVOTE)
+        downvotes += (click.new == DOWNVOTE) - (click.stored == DOWNVOTE)
+        return VoteResult(click.previous, click.new, upvotes, downvotes)
+
+    def _toggle_row(self, object_id, voter_id, clicked):
+        """Toggle the vote row; returns (previous vote type, new vote type)."""
+        meta = self.model._meta
+        table = meta.db_table
+        object_column = meta.get_field(self.field).column
+        voter_column = meta.get_field("voter").column
+        other = DOWNVOTE if clicked == UPVOTE else UPVOTE
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+
+        with connection.cursor() as cursor:
+            for _ in range(MAX_TOGGLE_ATTEMPTS):
+                cursor.execute(
+                    f"INSERT INTO {table} ({object_column}, {voter_column}, vote_type, created_at) "
+                    f"VALUES (%s, %s, %s, %s) "
+                    f"ON CONFLICT ({object_column}, {voter_column}) DO NOTHING",
+                    [object_id, voter_id, clicked, now],
+                )
+                if cursor.rowcount:
+                    return None, clicked
+                cursor.execute(
+                    f"DELETE FROM {table} "
+                    f"WHERE {object_column} = %s AND {voter_column} = %s AND vote_type = %s",
+                    [object_id, voter_id, clicked],
+                )
+                if cursor.rowcount:
+                    return clicked, None
+                cursor.execute(
+                    f"UPDATE {table} SET vote_type = %s "
+                    f"WHERE {object_column} = %s AND {voter_column} = %s AND vote_type = %s",
+                    [clicked, object_id, voter_id, other],
+                )
+                if cursor.rowcount:
+                    return other, clicked
+
+        # A concurrent request kept changing the row; leave it as it is
+        stored = (
+            self.model.objects.filter(**{f"{self.field}_id": object_id}, voter_id=voter_id)
+            .values_list("vote_type", flat=True)
+            .first()
+        )
+        return stored, stored
+
+    def record_change(self, obj, previous, user_vote):
+        """Update whatever is derived from the votes on obj."""
+        raise NotImplementedError
+
+    def counts(self, obj):
+        """Return the current (upvotes, downvotes) on obj."""
+        raise NotImplementedError
+
+
+class PostVoteService(VoteService):
+    """Votes on posts; counts are the stored counters on Post."""
+
+    target = "post"
+
+    def record_change(self, post, previous, user_vote):
+        from ..models import Post
+
+        if counter_shards.is_enabled():
+            counter_shards.add_vote_deltas(
+                post.pk,
+                (user_vote == UPVOTE) - (previous == UPVOTE),
+                (user_vote == DOWNVOTE) - (previous == DOWNVOTE),
+            )
+        else:
+            Post.objects.apply_vote_change(post.pk, previous, user_vote)
+
+    def counts(self, post):
+        from ..models import Post
+
+        if counter_shards.is_enabled():
+            return counter_shards.vote_counts(post.pk)
+        return Post.objects.values_list("upvotes_count", "downvotes_count").get(pk=post.pk)
+
+
+class CommentVoteService(VoteService):
+    """Votes on comments; counts are aggregated from the votes in one query."""
+
+    target = "comment"
+
+    def record_change(self, comment, previous, user_vote):
+        from ..models import Post
+
+        # Comment scores are part of the post's cached feed card
+        if counter_shards.is_enabled():
+            counter_shards.add_vote_deltas(comment.post_id, 0, 0)
+        else:
+            Post.objects.bump_render_version(comment.post_id)
+
+    def counts(self, comment):
+        totals = self.model.objects.filter(comment_id=comment.pk).aggregate(
+            upvotes=Count("pk", filter=Q(vote_type=UPVOTE)),
+            downvotes=Count("pk", filter=Q(vote_type=DOWNVOTE)),
+        )
+        return totals["upvotes"], totals["downvotes"]
+
+
+post_votes = PostVoteService()
+comment_votes = CommentVoteService()
@@ -1,13 +1,15 @@
 # Import all views for backward compatibility
 # This allows `from posting.views import home, upvote_post, downvote_post, flag_post` to work as before
 
-from .api import suggest_tags, search_suggestions, tag_categories
+from .api import moderation_status, suggest_tags, search_suggestions, tag_categories, vote_state
 from .comments import (
     add_comment,
     add_reply,
+    comment_replies,
     delete_comment,
     downvote_comment,
     flag_comment,
+    post_comments,
     upvote_comment,
 )
 from .feed import home
@@ -24,6 +26,8 @@ __all__ = [
     "aggregated_stats",
     "add_comment",
     "add_reply",
+    "post_comments",
+    "comment_replies",
     "upvote_comment",
     "downvote_comment",
     "flag_comment",
@@ -31,5 +35,7 @@ __all__ = [
     "suggest_tags",
     "search_suggestions",
     "tag_categories",
+    "vote_state",
+    "moderation_status",
 ]
 
@@ -2,6 +2,8 @@
 
 This module provides AJAX/JSON API endpoints for the posting app features:
 - Tag suggestions using TF-IDF similarity
+- The current user's vote state for cached feed pages
+- Moderation API health for monitoring (staff only)
 
 These endpoints are designed for client-side JavaScript consumption and
 require authentication.
@@ -10,12 +12,17 @@ require authentication.
 import json
 
 from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
-from django.db.models import Count
 
+from ..models import CommentVote, ModerationJob, PendingVote, Vote
+from ..utils import vote_buffer
+from ..utils.ai_moderator import get_moderator
+from ..utils.moderation_executor import get_executor
+from ..utils.suggestion_index import get_suggestion_index
+from ..utils.tag_sidebar import get_tag_sidebar
 from ..utils.tag_suggester import get_suggester
-from ..models import Tag, Post
 
 
 @login_required
@@ -44,6 +51,54 @@ def suggest_tags(request):
 
     return JsonResponse({"tags": suggestions})
 
+# Upper bound on the post or comment ids accepted per vote_state request
+VOTE_STATE_MAX_IDS = 500
+
+
+def _id_list(value):
+    """Parse a comma-separated list of ids, ignoring anything that isn't one."""
+    ids = [int(part) for part in value.split(",") if part.strip().isdigit()]
+    return ids[:VOTE_STATE_MAX_IDS]
+
+
+@login_required
+def vote_state(request):
+    """
+    AJAX endpoint returning the current user's votes on the given posts and comments.
+
+    Feed pages are cached and shared between users without vote
+    highlighting; home.js calls this once per page load to apply it.
+
+    Query params: posts, comments (comma-separated ids)
+    Returns JSON: {"posts": {"12": "UPVOTE"}, "comments": {"40": "DOWNVOTE"}}
+    """
+    post_ids = _id_list(request.GET.get("posts", ""))
+    comment_ids = _id_list(request.GET.get("comments", ""))
+
+    post_votes = {}
+    if post_ids:
+        post_votes = dict(
+            Vote.objects.filter(voter=request.user, post_id__in=post_ids)
+            .values_list("post_id", "vote_type")
+        )
+    comment_votes = {}
+    if comment_ids:
+        comment_votes = dict(
+            CommentVote.objects.filter(voter=request.user, comment_id__in=comment_ids)
+            .values_list("comment_id", "vote_type")
+        )
+
+    # Include clicks still waiting in the write-behind buffer
+    if vote_buffer.is_enabled():
+        post_votes = vote_buffer.pending_vote_states(
+            PendingVote.POST, request.user, post_votes, post_ids
+        )
+        comment_votes = vote_buffer.pending_vote_states(
+            PendingVote.COMMENT, request.user, comment_votes, comment_ids
+        )
+
+    return JsonResponse({"posts": post_votes, "comments": comment_votes})
+
 
 @login_required
 def search_suggestions(request):
@@ -61,21 +116,10 @@ def search_suggestions(request):
     if len(query) < 2:
         return JsonResponse({"tags": [], "recent_posts": []})
 
-    # Get matching tags
-    tags = Tag.objects.filter(name__icontains=query).annotate(
-        post_count=Count('posts')
-    ).order_by('-post_count')[:5]
+    # Answered from the in-memory prefix index - no database queries
+    tags, posts = get_suggestion_index().suggest(query, tag_limit=5, post_limit=3)
 
-    # Get recent matching posts
-    posts = Post.objects.filter(
-        title__icontains=query,
-        is_hidden=False
-    ).select_related('author').order_by('-created_at')[:3]
-
-    return JsonResponse({
-        "tags": [{"name": tag.name, "count": tag.post_count} for tag in tags],
-        "recent_posts": [{"id": post.pk, "title": post.title} for post in posts]
-    })
+    return JsonResponse({"tags": tags, "recent_posts": posts})
 
 
 @login_required
@@ -93,23 +137,10 @@ def tag_categories(request):
         ]
     }
     """
-    from django.db.models import Q
     from ..utils.tag_categorizer import get_categorizer
 
-    # Get tags with at least 1 visible post
-    tags = Tag.objects.annotate(
-        post_count=Count('posts', filter=Q(posts__is_hidden=False))
-    ).filter(post_count__gte=1).order_by('name')
-
-    # Build tag info dict for quick lookup
-    tag_info = {
-        tag.name: {
-            'name': tag.name,
-            'slug': tag.slug,
-            'count': tag.post_count
-        }
-        for tag in tags
-    }
+    # Tags with at least 1 visible post (cached sidebar list), keyed by name
+    tag_info = {tag['name']: tag for tag in get_tag_sidebar()}
 
     # Get AI-powered categorization
     tag_names = list(tag_info.keys())
@@ -130,3 +161,28 @@ def tag_categories(request):
             })
 
     return JsonResponse({'categories': categories})
+
+
+@login_required
+def moderation_status(request):
+    """
+    Staff endpoint reporting this process's moderation API health.
+
+    Returns JSON: {
+        "client": {"breaker": "closed", "in_flight": 0, "latency": {"p95": ...}, ...},
+        "executor": {"queued": 0, "running": 1, "failed": 0, "deferred": 0, ...},
+        "queue": {"pending": 3, "dead": 0}
+    }
+    """
+    if not (request.user.is_staff or request.user.is_superuser):
+        raise PermissionDenied
+
+    queue = {
+        "pending": ModerationJob.objects.exclude(status=ModerationJob.DEAD).count(),
+        "dead": ModerationJob.objects.filter(status=ModerationJob.DEAD).count(),
+    }
+    return JsonResponse({
+        "client": get_moderator().caller.stats(),
+        "executor": get_executor().stats(),
+        "queue": queue,
+    })
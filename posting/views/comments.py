@@ -1,15 +1,30 @@
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db import IntegrityError
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse
 from urllib.parse import urlparse
 
 from ..forms import CommentForm
 from ..models import Comment, CommentVote, Post
+from ..utils.comment_tree import MAX_INLINE_DEPTH, load_thread
+from ..utils.cursor_pagination import paginate_by_cursor
+from ..utils.fragment_cache import apply_viewer_state
+from ..utils.vote_service import comment_votes
 from django.template.loader import render_to_string
 from django.http import JsonResponse
 
+# Top-level comments returned per "Load more comments" request
+COMMENTS_PAGE_SIZE = 10
+# Direct replies returned per "View more replies" request
+REPLIES_PAGE_SIZE = 10
+
+
+def thread_queryset():
+    """Visible top-level comments; their replies are loaded with load_thread()."""
+    return Comment.objects.filter(
+        is_deleted=False, parent_comment__isnull=True
+    ).select_related("author")
+
 
 def _safe_redirect(request, default_url):
     """
@@ -29,6 +44,80 @@ def _safe_redirect(request, default_url):
     return redirect(default_url)
 
 
+def _render_thread(request, comments, user_comment_votes):
+    """Render a flat thread list with comment_item.html for the requesting user."""
+    html = "".join(
+        render_to_string('posting/components/comment_item.html', {'comment': comment}, request=request)
+        for comment in comments
+    )
+    return apply_viewer_state(html, request, comment_votes=user_comment_votes)
+
+
+@login_required
+def post_comments(request, post_pk):
+    """
+    AJAX endpoint returning one page of a post's top-level comments as HTML.
+
+    Each top-level comment is rendered with its replies as a flat list.
+
+    Query param: after (cursor from the previous page)
+    Returns JSON: {"success": true, "html": "...", "next_cursor": "..." or null}
+    """
+    post = get_object_or_404(Post, pk=post_pk, is_hidden=False)
+
+    page = paginate_by_cursor(
+        thread_queryset().filter(post=post),
+        after=request.GET.get("after"),
+        per_page=COMMENTS_PAGE_SIZE,
+        descending=False,
+    )
+    user_comment_votes = dict(
+        CommentVote.objects.filter(voter=request.user, comment__post=post)
+        .values_list("comment_id", "vote_type")
+    )
+
+    return JsonResponse({
+        'success': True,
+        'html': _render_thread(request, load_thread(page), user_comment_votes),
+        'next_cursor': page.next_cursor,
+    })
+
+
+@login_required
+def comment_replies(request, comment_pk):
+    """
+    AJAX endpoint returning the next slice of a comment's replies as HTML.
+
+    Used for threads deeper than the feed renders inline. Direct replies are
+    paged on the (parent_comment, created_at) index; each comes with its own
+    replies down to MAX_INLINE_DEPTH further levels, below which the thread
+    collapses again, so very deep threads load a level band at a time.
+
+    Query param: after (cursor from the previous slice)
+    Returns JSON: {"success": true, "html": "...", "next_cursor": "..." or null}
+    """
+    parent = get_object_or_404(Comment, pk=comment_pk, post__is_hidden=False)
+
+    page = paginate_by_cursor(
+        Comment.objects.filter(parent_comment=parent).select_related("author"),
+        after=request.GET.get("after"),
+        per_page=REPLIES_PAGE_SIZE,
+        descending=False,
+    )
+    thread = load_thread(page, max_depth=parent.depth + MAX_INLINE_DEPTH)
+    user_comment_votes = dict(
+        CommentVote.objects.filter(
+            voter=request.user, comment_id__in=[comment.pk for comment in thread]
+        ).values_list("comment_id", "vote_type")
+    )
+
+    return JsonResponse({
+        'success': True,
+        'html': _render_thread(request, thread, user_comment_votes),
+        'next_cursor': page.next_cursor,
+    })
+
+
 @login_required
 def add_comment(request, post_pk):
     """Add a top-level comment to a post."""
@@ -43,17 +132,15 @@ def add_comment(request, post_pk):
         
         if request.headers.get('x-requested-with') == 'XMLHttpRequest':
             # return new comment html
-            context = {
-                'comment': comment,
-                'user_comment_votes': {}, # No votes yet on new comment
-                'user': request.user,
-            }
-            html = render_to_string('posting/components/comment_item.html', context, request=request)
+            # No votes yet on a new comment
+            html = _render_thread(request, [comment], {})
             return JsonResponse({
                 'success': True,
                 'message': 'Comment added!',
                 'html': html,
-                'comment_count': post.comments.count()
+                'comment_count': Post.objects.values_list(
+                    'visible_comments_count', flat=True
+                ).get(pk=post.pk)
             })
             
         messages.success(request, "Comment added!")
@@ -83,6 +170,11 @@ def add_reply(request, comment_pk):
         messages.error(request, "Cannot reply to a deleted comment.")
         return _safe_redirect(request, reverse("posting:home"))
 
+    # Block replies past the deepest level the thread path can store
+    if parent_comment.depth >= Comment.MAX_DEPTH:
+        messages.error(request, "This thread is too deep to reply to.")
+        return _safe_redirect(request, reverse("posting:home"))
+
     form = CommentForm(
         request.POST, post=parent_comment.post, parent_comment=parent_comment
     )
@@ -90,12 +182,7 @@ def add_reply(request, comment_pk):
         comment = form.save(author=request.user)
         
         if request.headers.get('x-requested-with') == 'XMLHttpRequest':
-            context = {
-                'comment': comment,
-                'user_comment_votes': {},
-                'user': request.user,
-            }
-            html = render_to_string('posting/components/comment_item.html', context, request=request)
+            html = _render_thread(request, [comment], {})
             return JsonResponse({
                 'success': True,
                 'message': 'Reply added!',
@@ -116,9 +203,8 @@ def add_reply(request, comment_pk):
     return _safe_redirect(request, reverse("posting:home"))
 
 
-@login_required
-def upvote_comment(request, pk):
-    """Handle upvote with toggle behavior."""
+def _handle_comment_vote(request, pk, vote_type):
+    """Toggle the user's vote on a comment."""
     if request.method != "POST":
         return redirect(reverse("posting:home"))
 
@@ -129,105 +215,41 @@ def upvote_comment(request, pk):
         messages.error(request, "Cannot vote on a deleted comment.")
         return _safe_redirect(request, reverse("posting:home"))
 
-    existing_vote = comment.get_user_vote(request.user)
-
-    if existing_vote is None:
-        # No vote exists, create upvote (handle race condition)
-        try:
-            CommentVote.objects.create(
-                comment=comment, voter=request.user, vote_type=CommentVote.UPVOTE
-            )
-            messages.success(request, "Upvote recorded.")
-            user_vote = "UPVOTE"
-            action = "added"
-        except IntegrityError:
-            # Race condition: vote was created by another request
-            messages.info(request, "Vote already recorded.")
-            user_vote = "UPVOTE"
-            action = "none"
-    elif existing_vote.vote_type == CommentVote.DOWNVOTE:
-        # User has downvoted, change to upvote
-        existing_vote.vote_type = CommentVote.UPVOTE
-        existing_vote.save(update_fields=["vote_type"])
-        messages.success(request, "Changed to upvote.")
-        user_vote = "UPVOTE"
-        action = "changed"
-    else:
-        # User has upvoted, remove vote (toggle off)
-        existing_vote.delete()
-        messages.info(request, "Upvote removed.")
-        user_vote = None
-        action = "removed"
+    result = comment_votes.toggle(comment, request.user, vote_type)
 
     if request.headers.get('x-requested-with') == 'XMLHttpRequest':
         return JsonResponse({
             'success': True,
             'message': 'Vote updated',
-            'new_score': comment.get_net_votes(),
-            'user_vote': user_vote,
-            'action': action,
-            'upvotes': comment.get_upvotes_count(),
-            'downvotes': comment.get_downvotes_count()
+            'new_score': result.score,
+            'user_vote': result.user_vote,
+            'action': result.action,
+            'upvotes': result.upvotes,
+            'downvotes': result.downvotes
         })
 
+    kind = "upvote" if vote_type == CommentVote.UPVOTE else "downvote"
+    if result.action == "added":
+        messages.success(request, f"{kind.capitalize()} recorded.")
+    elif result.action == "changed":
+        messages.success(request, f"Changed to {kind}.")
+    elif result.action == "removed":
+        messages.info(request, f"{kind.capitalize()} removed.")
+    else:
+        messages.info(request, "Vote already recorded.")
     return _safe_redirect(request, reverse("posting:home"))
 
 
 @login_required
-def downvote_comment(request, pk):
-    """Handle downvote with toggle behavior."""
-    if request.method != "POST":
-        return redirect(reverse("posting:home"))
-
-    comment = get_object_or_404(Comment, pk=pk)
-
-    # Block voting on deleted comments
-    if comment.is_deleted:
-        messages.error(request, "Cannot vote on a deleted comment.")
-        return _safe_redirect(request, reverse("posting:home"))
-
-    existing_vote = comment.get_user_vote(request.user)
-
-    if existing_vote is None:
-        # No vote exists, create downvote (handle race condition)
-        try:
-            CommentVote.objects.create(
-                comment=comment, voter=request.user, vote_type=CommentVote.DOWNVOTE
-            )
-            messages.success(request, "Downvote recorded.")
-            user_vote = "DOWNVOTE"
-            action = "added"
-        except IntegrityError:
-            # Race condition: vote was created by another request
-            messages.info(request, "Vote already recorded.")
-            user_vote = "DOWNVOTE"
-            action = "none"
-    elif existing_vote.vote_type == CommentVote.UPVOTE:
-        # User has upvoted, change to downvote
-        existing_vote.vote_type = CommentVote.DOWNVOTE
-        existing_vote.save(update_fields=["vote_type"])
-        messages.success(request, "Changed to downvote.")
-        user_vote = "DOWNVOTE"
-        action = "changed"
-    else:
-        # User has downvoted, remove vote (toggle off)
-        existing_vote.delete()
-        messages.info(request, "Downvote removed.")
-        user_vote = None
-        action = "removed"
+def upvote_comment(request, pk):
+    """Handle upvote with toggle behavior."""
+    return _handle_comment_vote(request, pk, CommentVote.UPVOTE)
 
-    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
-        return JsonResponse({
-            'success': True,
-            'message': 'Vote updated',
-            'new_score': comment.get_net_votes(),
-            'user_vote': user_vote,
-            'action': action,
-            'upvotes': comment.get_upvotes_count(),
-            'downvotes': comment.get_downvotes_count()
-        })
 
-    return _safe_redirect(request, reverse("posting:home"))
+@login_required
+def downvote_comment(request, pk):
+    """Handle downvote with toggle behavior."""
+    return _handle_comment_vote(request, pk, CommentVote.DOWNVOTE)
 
 
 @login_required
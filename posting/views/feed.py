@@ -1,85 +1,178 @@
+import hashlib
+
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.core.cache import cache
 from django.db import models
-from django.db.models import Count, Prefetch, Q, F, ExpressionWrapper, FloatField, Subquery, OuterRef, IntegerField
-from django.db.models.functions import Extract, Coalesce
+from django.db.models import Prefetch, prefetch_related_objects
 from django.shortcuts import redirect, render
+from django.template.loader import render_to_string
 from django.urls import reverse
+from django.utils.safestring import mark_safe
 from django.utils import timezone
 from datetime import timedelta
 
 from ..forms import PostForm
-from ..models import Comment, CommentVote, Post, Tag, Vote
-
-
-@login_required(login_url='auth_landing:landing')
-def home(request):
-    """Homepage showing recent posts with optional tag filtering, search, and submission form."""
-    tag_slug = request.GET.get("tag")
-    search_query = request.GET.get("q", "").strip()
-    sort = request.GET.get("sort", "recent")  # Default to recent
-    view_mode = request.GET.get("view", "home")  # 'home' or 'posts'
-
-    # Prefetch for nested comments (top-level only, replies handled via related_name)
-    # Only prefetch non-deleted comments for display
-    comments_prefetch = Prefetch(
-        "comments",
-        queryset=Comment.objects.filter(is_deleted=False).select_related("author").prefetch_related("votes", "replies__author", "replies__votes"),
+from ..models import Post
+from ..utils.comment_tree import load_thread
+from ..utils.cursor_pagination import cursor_for, paginate_by_cursor
+from ..utils.feed_cache import FEED_PAGE_CACHE_SECONDS, feed_page_key
+from ..utils.fragment_cache import apply_viewer_state, render_post_cards
+from ..utils.search import attach_search_snippets, search_posts
+from .comments import thread_queryset
+
+FEED_PAGE_SIZE = 12
+# Top-level comments rendered inline per post; the rest are loaded on demand
+FEED_PREVIEW_COMMENTS = 3
+# Result counts for search/tag filters are cached briefly instead of
+# running a COUNT over the filtered feed on every page view
+FEED_COUNT_CACHE_SECONDS = 60
+# Maximum age of the precomputed trending scores before the feed refreshes
+# them, with TRENDING_REFRESH_IN_REQUESTS on
+TRENDING_REFRESH_SECONDS = 300
+
+
+def _cached_result_count(posts, tag_slug, search_query):
+    """Return the (approximate, cached) number of posts matching the filters."""
+    digest = hashlib.md5(f"{tag_slug or ''}|{search_query}".encode()).hexdigest()
+    cache_key = f"posting:feed_count:{digest}"
+    count = cache.get(cache_key)
+    if count is None:
+        count = posts.count()
+        cache.set(cache_key, count, FEED_COUNT_CACHE_SECONDS)
+    return count
+
+
+def _attach_comment_previews(posts):
+    """
+    Load each post's comment preview and mark if more exist.
+
+    Only the first few top-level comments per post are fetched (one extra
+    to know whether to show "Load more"); the rest load on demand via
+    posting:post_comments, so feed cost doesn't grow with thread size.
+    The reply threads under every previewed comment are then loaded with
+    one query and attached as post.comment_thread, a flat list in display
+    order.
+    """
+    prefetch_related_objects(
+        posts,
+        Prefetch(
+            "comments",
+            queryset=thread_queryset().order_by("created_at", "pk")[: FEED_PREVIEW_COMMENTS + 1],
+            to_attr="preview_comments",
+        ),
     )
-
-    # Base queryset with optimizations - exclude hidden posts
-    # Use subqueries for vote counts to avoid JOIN multiplication issues
-    # that can occur when combined with other queries (like trending)
-    upvotes_subquery = Vote.objects.filter(
-        post=OuterRef('pk'),
-        vote_type=Vote.UPVOTE
-    ).values('post').annotate(cnt=Count('id')).values('cnt')
-
-    downvotes_subquery = Vote.objects.filter(
-        post=OuterRef('pk'),
-        vote_type=Vote.DOWNVOTE
-    ).values('post').annotate(cnt=Count('id')).values('cnt')
-
-    posts = (
-        Post.objects.filter(is_hidden=False)
-        .select_related("author", "author__profile")
-        .prefetch_related("tags", "votes", comments_prefetch)
-        .annotate(
-            upvotes_count=Coalesce(Subquery(upvotes_subquery), 0),
-            downvotes_count=Coalesce(Subquery(downvotes_subquery), 0),
-            visible_comments_count=Count("comments", filter=Q(comments__is_deleted=False)),
-        )
-        .annotate(
-            score=F('upvotes_count') - F('downvotes_count')
+    roots = []
+    for post in posts:
+        previews = post.preview_comments
+        post.has_more_comments = len(previews) > FEED_PREVIEW_COMMENTS
+        post.preview_comments = previews[:FEED_PREVIEW_COMMENTS]
+        post.comments_cursor = (
+            cursor_for(post.preview_comments[-1]) if post.has_more_comments else None
         )
-    )
+        post.comment_thread = []
+        roots.extend(post.preview_comments)
+
+    threads = {post.pk: post.comment_thread for post in posts}
+    for comment in load_thread(roots):
+        threads[comment.post_id].append(comment)
+
+
+def _refresh_trending_if_stale():
+    """
+    Refresh stored trending scores at most once per TRENDING_REFRESH_SECONDS.
+
+    Only with settings.TRENDING_REFRESH_IN_REQUESTS (for development without
+    a scheduler): the refresh is a table-wide UPDATE that the first reader
+    after each interval would wait for. In production the scheduled
+    refresh_rankings command keeps the scores current. cache.add() only
+    succeeds for the first caller after the key expires, so concurrent
+    requests don't all recompute.
+    """
+    if not getattr(settings, "TRENDING_REFRESH_IN_REQUESTS", False):
+        return
+    if cache.add("posting:trending_refreshed", True, TRENDING_REFRESH_SECONDS):
+        Post.objects.refresh_trending_scores()
+
+
+def _render_feed_section(request, tag_slug, search_query, sort):
+    """
+    Render the feed listing for the given filters, without viewer state.
+
+    The result is shared between users (see utils/feed_cache.py); markers
+    for owner controls and CSRF tokens are resolved by the caller.
+    """
+    # Base queryset with optimizations - exclude hidden posts
+    # Vote and comment counts are stored on Post (upvotes_count, downvotes_count,
+    # score, visible_comments_count), so no per-request aggregation is needed.
+    # Comment previews are loaded only for cards missing from the fragment cache.
+    posts = Post.objects.filter(is_hidden=False).select_related("author", "author__profile")
 
-    # Apply search filter
+    # Apply search filter (full-text index over titles, bodies and comments)
     if search_query:
-        posts = posts.filter(
-            Q(title__icontains=search_query) | Q(body__icontains=search_query)
-        )
+        posts = search_posts(posts, search_query)
 
     # Apply tag filter
     if tag_slug:
         posts = posts.filter(tags__slug=tag_slug)
 
-    # Apply sorting
+    # Count results for screen reader announcement (only shown when filtering)
+    posts_count = None
+    if search_query or tag_slug:
+        posts_count = _cached_result_count(posts, tag_slug, search_query)
+
+    # Apply sorting - sort_field is the keyset column used by cursor pagination
+    sort_field = None
     if sort == "trending":
-        try:
-            posts = Post.objects.get_trending_posts(posts)
-        except Exception as e:
-            # Fallback to recent if trending query fails
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Trending query failed: {e}")
-            posts = posts.order_by("-created_at")
+        # trending_score is precomputed (see PostManager.refresh_trending_scores)
+        _refresh_trending_if_stale()
+        sort_field = "trending_score"
     elif sort == "popular":
-        # score is already annotated as upvotes - downvotes
-        posts = posts.order_by("-score", "-created_at")
-    else:
-        posts = posts.order_by("-created_at")
+        # score is the stored upvotes - downvotes column (indexed with created_at)
+        sort_field = "score"
+    elif sort == "relevance" and search_query:
+        # search_rank is annotated by search_posts()
+        sort_field = "search_rank"
+
+    # Keyset pagination: ?after=<cursor> / ?before=<cursor> instead of ?page=N
+    page_obj = paginate_by_cursor(
+        posts,
+        sort_field=sort_field,
+        after=request.GET.get("after"),
+        before=request.GET.get("before"),
+        per_page=FEED_PAGE_SIZE,
+    )
+
+    if search_query:
+        attach_search_snippets(page_obj, search_query)
+
+    # Cards are cached per post version, so only changed posts are rendered
+    cards = render_post_cards(page_obj, prepare=_attach_comment_previews)
+    for post in page_obj:
+        post.card_html = mark_safe(cards[post.pk])
+
+    return render_to_string(
+        "posting/components/feed_section.html",
+        {
+            "posts": page_obj,  # CursorPage with next_cursor/previous_cursor
+            "active_tag": tag_slug,
+            "search_query": search_query,
+            "sort": sort,
+            "posts_count": posts_count,
+        },
+        request=request,
+    )
+
+
+@login_required(login_url='auth_landing:landing')
+def home(request):
+    """Homepage showing recent posts with optional tag filtering, search, and submission form."""
+    tag_slug = request.GET.get("tag")
+    search_query = request.GET.get("q", "").strip()
+    # Default to recent, or to relevance when searching
+    sort = request.GET.get("sort") or ("relevance" if search_query else "recent")
+    view_mode = request.GET.get("view", "home")  # 'home' or 'posts'
 
     form = PostForm()
 
@@ -90,55 +183,26 @@ def home(request):
             messages.success(request, "Post submitted successfully!")
             return redirect(reverse("posting:home"))
 
-    # Get tags with at least 1 visible post (excludes hidden/deleted posts)
-    tags = (
-        Tag.objects.annotate(
-            post_count=Count("posts", filter=Q(posts__is_hidden=False))
-        )
-        .filter(post_count__gte=1)
-        .order_by("name")
-    )
-
-    # Get user votes for all posts and comments to check vote state in template
-    user_votes = {}
-    user_comment_votes = {}
-    if request.user.is_authenticated:
-        # Post votes
-        post_votes = Vote.objects.filter(
-            post__in=posts,
-            voter=request.user
-        ).select_related("post")
-        user_votes = {vote.post_id: vote for vote in post_votes}
-
-        # Comment votes - get all comments from these posts
-        comment_votes = CommentVote.objects.filter(
-            comment__post__in=posts,
-            voter=request.user
-        ).select_related("comment")
-        user_comment_votes = {vote.comment_id: vote for vote in comment_votes}
-
-    # Count results for screen reader announcement
-    posts_count = posts.count()
-
-    # Pagination
-    paginator = Paginator(posts, 12)  # 12 posts per page
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    # The feed listing is the same for every user, so it is served from a
+    # shared cache; home.js fetches the viewer's vote highlights afterwards
+    feed_html = ""
+    if view_mode != "create":
+        cache_key = feed_page_key(request.GET)
+        section = cache.get(cache_key)
+        if section is None:
+            section = _render_feed_section(request, tag_slug, search_query, sort)
+            cache.set(cache_key, section, FEED_PAGE_CACHE_SECONDS)
+        feed_html = apply_viewer_state(section, request)
 
     return render(
         request,
         "posting/home.html",
         {
             "form": form,
-            "posts": page_obj,  # Pass page_obj instead of posts
-            "tags": tags,
+            "feed_html": feed_html,
             "active_tag": tag_slug,
             "search_query": search_query,
             "sort": sort,
             "view_mode": view_mode,
-            "user_votes": user_votes,
-            "user_comment_votes": user_comment_votes,
-            "posts_count": posts_count,
         },
     )
-
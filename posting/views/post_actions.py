@@ -1,12 +1,12 @@
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db import IntegrityError
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse
 from urllib.parse import urlparse
 
 from ..models import Post, Vote
+from ..utils.vote_service import post_votes
 
 
 def _is_ajax(request):
@@ -54,48 +54,29 @@ def downvote_post(request, pk):
     return _handle_vote(request, pk, Vote.DOWNVOTE)
 
 
+# Flash message per VoteResult.action
+VOTE_MESSAGES = {
+    "added": "Vote recorded.",
+    "removed": "Vote removed.",
+    "changed": "Vote changed.",
+    "none": "Vote already recorded.",
+}
+
+
 def _handle_vote(request, pk, vote_type):
     """Unified vote handler."""
     post = get_object_or_404(Post, pk=pk)
-    existing_vote = post.get_user_vote(request.user)
-    message = ""
-    user_vote = None
-
-    if existing_vote is None:
-        # Create new vote
-        try:
-            Vote.objects.create(post=post, voter=request.user, vote_type=vote_type)
-            message = "Vote recorded."
-            user_vote = "UPVOTE" if vote_type == Vote.UPVOTE else "DOWNVOTE"
-        except IntegrityError:
-            message = "Vote already recorded."
-    
-    elif existing_vote.vote_type == vote_type:
-        # Toggle OFF (delete existing same vote)
-        existing_vote.delete()
-        message = "Vote removed."
-        user_vote = None
-    
-    else:
-        # Switch vote (update existing)
-        existing_vote.vote_type = vote_type
-        existing_vote.save(update_fields=["vote_type"])
-        message = "Vote changed."
-        user_vote = "UPVOTE" if vote_type == Vote.UPVOTE else "DOWNVOTE"
+    result = post_votes.toggle(post, request.user, vote_type)
+    message = VOTE_MESSAGES[result.action]
 
     if _is_ajax(request):
-        # Calculate new counts - use explicit separate queries to avoid ORM issues
-        # Refresh from database to ensure we get latest counts
-        upvotes = Vote.objects.filter(post_id=post.pk, vote_type=Vote.UPVOTE).count()
-        downvotes = Vote.objects.filter(post_id=post.pk, vote_type=Vote.DOWNVOTE).count()
-
         return JsonResponse({
             "success": True,
             "message": message,
-            "net_votes": upvotes - downvotes,
-            "upvotes_count": upvotes,
-            "downvotes_count": downvotes,
-            "user_vote": user_vote
+            "net_votes": result.score,
+            "upvotes_count": result.upvotes,
+            "downvotes_count": result.downvotes,
+            "user_vote": result.user_vote
         })
 
     messages.success(request, message)
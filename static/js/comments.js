@@ -65,37 +65,18 @@ function initCommentInteractions() {
                 // For a new comment on post, it's the specific list.
 
                 // If reply:
-                const replyContainer = form.closest('.reply-form-container');
+                const replyContainer = form.closest('.comment-reply-form');
                 if (replyContainer) {
-                    // It's a reply
-                    // Insert before the reply form or at the end of siblings?
-                    // Usually we replace the form or append to the children list.
-                    // Let's assume standard structure: .comment-item -> .replies
-                    // But for now, we can reload or just show toast?
-                    // The view returns 'html'.
-
-                    // Simple approach: show toast, reload or insert if simple
-                    if (data.html) {
-                        // Insert the new comment HTML
-                        // If invalid html structure, might be tricky. 
-                        // Assuming data.html is the <li>...</li>
-
-                        // If it is a reply
-                        const parentComment = replyContainer.closest('.comment-item');
-                        if (parentComment) {
-                            let repliesList = parentComment.querySelector('.replies-list');
-                            if (!repliesList) {
-                                repliesList = document.createElement('ul');
-                                repliesList.className = 'replies-list';
-                                parentComment.appendChild(repliesList);
-                            }
-                            repliesList.insertAdjacentHTML('beforeend', data.html);
-
-                            // Hide form
-                            replyContainer.style.display = 'none';
-                            form.reset();
-                        }
+                    // Threads render as a flat list ordered depth-first, so the
+                    // reply goes after the last item of the parent's subtree
+                    const parentComment = replyContainer.closest('.comment-item');
+                    if (data.html && parentComment) {
+                        lastInSubtree(parentComment).insertAdjacentHTML('afterend', data.html);
                     }
+
+                    // Hide form
+                    replyContainer.style.display = 'none';
+                    form.reset();
                 } else {
                     // Top level comment
                     const postCard = form.closest('.post-card');
@@ -154,6 +135,106 @@ function initCommentInteractions() {
             handleFormAction(btn.form, csrfToken);
         }
     });
+
+    // 3. Load more top-level comments (the feed only renders the first few)
+    document.body.addEventListener('click', async function (e) {
+        const btn = e.target.closest('.load-more-comments-btn');
+        if (!btn) return;
+
+        e.preventDefault();
+        const commentsList = btn.closest('.comments-section')?.querySelector('.comments-list');
+        if (!commentsList || btn.disabled) return;
+
+        btn.disabled = true;
+        const url = `${btn.dataset.url}?after=${encodeURIComponent(btn.dataset.cursor)}`;
+
+        try {
+            const data = await fetchCommentPage(url);
+            if (data.success) {
+                commentsList.insertAdjacentHTML('beforeend', data.html);
+                if (data.next_cursor) {
+                    btn.dataset.cursor = data.next_cursor;
+                } else {
+                    btn.remove();
+                }
+            } else {
+                showToast(data.message || 'Could not load comments', 'error');
+            }
+        } catch (err) {
+            console.error(err);
+            showToast('Connection error', 'error');
+        } finally {
+            btn.disabled = false;
+        }
+    });
+
+    // 4. Load replies below the inline depth limit, one slice at a time
+    document.body.addEventListener('click', async function (e) {
+        const btn = e.target.closest('.view-more-replies-btn');
+        if (!btn) return;
+
+        e.preventDefault();
+        const collapsed = btn.closest('.comment-replies-collapsed');
+        const parentComment = document.querySelector(
+            `.comment-item[data-comment-id="${btn.dataset.commentId}"]`
+        );
+        if (!collapsed || !parentComment || btn.disabled) return;
+
+        btn.disabled = true;
+        const cursor = btn.dataset.cursor;
+        const url = cursor ? `${btn.dataset.url}?after=${encodeURIComponent(cursor)}` : btn.dataset.url;
+
+        try {
+            const data = await fetchCommentPage(url);
+            if (data.success) {
+                lastInSubtree(parentComment).insertAdjacentHTML('afterend', data.html);
+                if (data.next_cursor) {
+                    // Keep the button below the replies it has loaded so far
+                    btn.dataset.cursor = data.next_cursor;
+                    btn.textContent = 'View more replies...';
+                    collapsed.dataset.parentId = parentComment.dataset.commentId;
+                    collapsed.dataset.depth = Number(parentComment.dataset.depth || 0) + 1;
+                    collapsed.style.setProperty('--depth', collapsed.dataset.depth);
+                    lastInSubtree(parentComment).after(collapsed);
+                } else {
+                    collapsed.remove();
+                }
+            } else {
+                showToast(data.message || 'Could not load replies', 'error');
+            }
+        } catch (err) {
+            console.error(err);
+            showToast('Connection error', 'error');
+        } finally {
+            btn.disabled = false;
+        }
+    });
+}
+
+/**
+ * Return the last rendered element of a comment's subtree.
+ *
+ * Threads render as a flat list in depth-first order, so a comment's
+ * descendants are the following siblings that sit deeper than it, up to its
+ * own "view more replies" button if that has been moved below them.
+ */
+function lastInSubtree(commentItem) {
+    const depth = Number(commentItem.dataset.depth || 0);
+    let last = commentItem;
+    let next = last.nextElementSibling;
+    while (next && Number(next.dataset.depth || 0) > depth &&
+        next.dataset.parentId !== commentItem.dataset.commentId) {
+        last = next;
+        next = last.nextElementSibling;
+    }
+    return last;
+}
+
+async function fetchCommentPage(url) {
+    const response = await fetch(url, {
+        headers: { 'X-Requested-With': 'XMLHttpRequest' }
+    });
+    return response.json();
 }
 
 async function handleVoteCheck(e, btn, csrfToken) {
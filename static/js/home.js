@@ -875,6 +875,62 @@ if (window._homeJsInitialized) {
         }
     }
 
+    // ================== Cursor Pagination ==================
+    // Feed pages are addressed by opaque ?after= / ?before= cursors rather than
+    // page numbers. Rebuild the link from the current URL so every active filter
+    // (q, tag, sort, view) is kept, drop any stale cursor, and land on the feed.
+    function initCursorPagination() {
+        const nav = document.querySelector('[data-cursor-pagination]');
+        if (!nav) return;
+
+        nav.addEventListener('click', function (e) {
+            const link = e.target.closest('a[data-cursor]');
+            if (!link) return;
+
+            e.preventDefault();
+            const params = new URLSearchParams(window.location.search);
+            params.delete('after');
+            params.delete('before');
+            params.delete('page');
+            params.set(link.dataset.cursorDirection, link.dataset.cursor);
+            window.location.href = `${window.location.pathname}?${params.toString()}#posts-section`;
+        });
+    }
+
+    // ================== Viewer Vote State ==================
+    // Feed pages are cached and shared between users, so they arrive without
+    // vote highlighting. Fetch this user's votes on the visible posts and
+    // comments in one request and mark the matching buttons active.
+    async function initVoteState() {
+        const section = document.getElementById('posts-section');
+        const url = section?.dataset.voteStateUrl;
+        if (!url) return;
+
+        const postIds = Array.from(section.querySelectorAll('.post-card[data-post-id]'), el => el.dataset.postId);
+        const commentIds = Array.from(section.querySelectorAll('.comment-item[data-comment-id]'), el => el.dataset.commentId);
+        if (!postIds.length) return;
+
+        const params = new URLSearchParams({ posts: postIds.join(','), comments: commentIds.join(',') });
+        try {
+            const response = await fetch(`${url}?${params.toString()}`, {
+                headers: { 'X-Requested-With': 'XMLHttpRequest' }
+            });
+            if (!response.ok) return;
+            const data = await response.json();
+
+            Object.entries(data.posts).forEach(([postId, voteType]) => {
+                const btn = section.querySelector(`.post-card[data-post-id="${postId}"] .vote-btn[data-vote-type="${voteType}"]`);
+                if (btn) btn.classList.add('active');
+            });
+            Object.entries(data.comments).forEach(([commentId, voteType]) => {
+                const btn = section.querySelector(`.comment-item[data-comment-id="${commentId}"] .comment-vote-btn[data-vote-type="${voteType}"]`);
+                if (btn) btn.classList.add('active');
+            });
+        } catch (e) {
+            console.error('Vote state error:', e);
+        }
+    }
+
     // ================== Initialization ==================
     // ================== Vote Button Click Isolation ==================
     function initVoteButtonHandlers() {
@@ -1064,6 +1120,8 @@ if (window._homeJsInitialized) {
         initSearchHighlight();
         initPostFormLoading(); // Loading indicator for post submission
         initTagFilterDropdown(); // Tag filter dropdown with search
+        initCursorPagination(); // Next/previous feed pages via cursors
+        initVoteState(); // Vote highlights for the cached feed page
 
         // AI Tag Suggestions needs URL from template
         const suggestTagsUrl = document.querySelector('[data-suggest-tags-url]')?.dataset.suggestTagsUrl;
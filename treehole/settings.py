@@ -245,6 +245,49 @@ ALLOWED_EMAIL_DOMAINS = config('ALLOWED_EMAIL_DOMAINS', default='yale.edu', cast
 
 # OpenAI API Configuration (for content moderation)
 OPENAI_API_KEY = config('OPENAI_API_KEY', default=None)
+# Moderation client: 'openai', or 'fake' for the local keyword-based client
+# (posting/utils/fake_moderation.py) so the moderation worker runs without a key
+MODERATION_CLIENT = config('MODERATION_CLIENT', default='openai')
+# Moderation model, also the version tag of cached moderation results
+MODERATION_MODEL = config('MODERATION_MODEL', default='omni-moderation-latest')
+# Days a cached moderation result is reused for identical text (0 disables the cache)
+MODERATION_CACHE_TTL_DAYS = config('MODERATION_CACHE_TTL_DAYS', default=30, cast=int)
+# Moderation API resilience (posting/utils/moderation_resilience.py): seconds
+# per call including retries, retries for transient errors, calls in flight
+# per process, and the error rate that opens the circuit breaker for the
+# cooldown (calls then fail fast to the local crisis keyword check)
+MODERATION_TIMEOUT_SECONDS = config('MODERATION_TIMEOUT_SECONDS', default=10, cast=float)
+MODERATION_MAX_RETRIES = config('MODERATION_MAX_RETRIES', default=2, cast=int)
+MODERATION_MAX_IN_FLIGHT = config('MODERATION_MAX_IN_FLIGHT', default=4, cast=int)
+MODERATION_BREAKER_ERROR_RATE = config('MODERATION_BREAKER_ERROR_RATE', default=0.5, cast=float)
+MODERATION_BREAKER_COOLDOWN_SECONDS = config('MODERATION_BREAKER_COOLDOWN_SECONDS', default=30, cast=float)
+# Background moderation pool per process (posting/utils/moderation_executor.py):
+# worker threads, and queued posts beyond which new ones are left to the
+# moderation worker
+MODERATION_EXECUTOR_WORKERS = config('MODERATION_EXECUTOR_WORKERS', default=4, cast=int)
+MODERATION_EXECUTOR_QUEUE_SIZE = config('MODERATION_EXECUTOR_QUEUE_SIZE', default=100, cast=int)
+# Local pre-classifier for clearly benign text: 'off', 'shadow' (log agreement
+# with the API) or 'on' (skip the API); trained by `calibrate_preclassifier`
+MODERATION_PRECLASSIFIER = config('MODERATION_PRECLASSIFIER', default='off')
+MODERATION_PRECLASSIFIER_PATH = config(
+    'MODERATION_PRECLASSIFIER_PATH',
+    default=str(BASE_DIR / 'artifacts' / 'moderation_preclassifier.joblib'),
+)
+# Saved tag suggestion model (posting/utils/tag_suggester.py), written by
+# `build_tag_model` and memory-mapped by web processes
+TAG_MODEL_DIR = config('TAG_MODEL_DIR', default=str(BASE_DIR / 'artifacts' / 'tag_model'))
+
+# Recompute trending scores from the trending feed request, at most every
+# 5 minutes (development only; production schedules `refresh_rankings`)
+TRENDING_REFRESH_IN_REQUESTS = config('TRENDING_REFRESH_IN_REQUESTS', default=False, cast=bool)
+
+# Write-behind voting: vote clicks are buffered in PendingVote and applied in
+# bulk by `python manage.py flush_votes`, which must then run continuously
+VOTE_WRITE_BEHIND = config('VOTE_WRITE_BEHIND', default=False, cast=bool)
+
+# Sharded vote counters: with N > 0, vote counter changes go to one of N
+# shard rows per post and are folded into the post by `flush_votes`
+VOTE_COUNTER_SHARDS = config('VOTE_COUNTER_SHARDS', default=0, cast=int)
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -15,3 +15,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'treehole.settings')
 
 application = get_wsgi_application()
+
+# Map the saved tag suggestion model (see `manage.py build_tag_model`) before
+# the first request, so no worker trains its own
+from posting.utils.tag_suggester import get_suggester  # noqa: E402
+
+get_suggester().load()